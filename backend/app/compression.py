@@ -0,0 +1,187 @@
+"""
+Response Compression — gzip/brotli negotiation above a size threshold.
+
+Brotli is preferred when the client accepts it and the `brotli` package is
+installed; otherwise gzip. Small bodies (< COMPRESSION_MIN_BYTES) and
+already-compressed media (EXCLUDED_CONTENT_TYPES: zip exports, PDFs,
+images) pass through untouched.
+Brotli runs in the threadpool for bodies of BROTLI_THREAD_MIN_BYTES or more,
+so a large export doesn't stall the event loop while it compresses.
+"""
+
+import os
+import zlib
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+# Dynamic responses: quality 11 is far too slow per request; 4-5 is close to gzip -9 in size
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+BROTLI_THREAD_MIN_BYTES = int(os.getenv("BROTLI_THREAD_MIN_BYTES", str(64 * 1024)))
+# Already compressed: another pass only costs CPU and adds framing bytes
+EXCLUDED_CONTENT_TYPES = frozenset({"application/zip", "application/gzip", "application/pdf", "image/*"})
+
+
+def accepted_encodings(header: str) -> set:
+    """Codings from an Accept-Encoding header, minus those with q=0."""
+    accepted = set()
+    for part in header.split(","):
+        token, _, params = part.partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        name, _, value = params.strip().partition("=")
+        if name.strip().lower() == "q":
+            try:
+                q = float(value)
+            except ValueError:
+                q = 0.0
+        if q > 0:
+            accepted.add(token)
+    return accepted
+
+
+def is_excluded_content_type(content_type: str) -> bool:
+    """Whether a Content-Type is already compressed media (EXCLUDED_CONTENT_TYPES)."""
+    media_type = content_type.partition(";")[0].strip().lower()
+    return media_type in EXCLUDED_CONTENT_TYPES or f"{media_type.partition('/')[0]}/*" in EXCLUDED_CONTENT_TYPES
+
+
+class IdentityResponder:
+    """Buffers the response start until the first body chunk decides the encoding.
+
+    Subclasses override `apply_compression`; this base sends bodies as-is.
+    Kept local because starlette only grew a public equivalent in recent
+    releases. Responses that already carry a Content-Encoding, are partial
+    (206) or have an EXCLUDED_CONTENT_TYPES media type pass through untouched.
+    """
+
+    content_encoding = "identity"
+
+    def __init__(self, app, minimum_size: int):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.send = None
+        self.initial_message = {}
+        self.started = False
+        self.passthrough = False
+
+    async def __call__(self, scope, receive, send):
+        self.send = send
+        await self.app(scope, receive, self.send_with_compression)
+
+    async def send_with_compression(self, message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            self.initial_message = message
+            headers = Headers(raw=message["headers"])
+            self.passthrough = (
+                "content-encoding" in headers or message["status"] == 206
+                or is_excluded_content_type(headers.get("content-type", ""))
+            )
+            if self.passthrough:
+                await self.send(message)
+        elif self.passthrough or message_type != "http.response.body":
+            if not self.passthrough and not self.started:
+                # e.g. http.response.pathsend: nothing to compress
+                self.started = True
+                await self.send(self.initial_message)
+            await self.send(message)
+        elif not self.started:
+            self.started = True
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if len(body) < self.minimum_size and not more_body:
+                await self.send(self.initial_message)
+                await self.send(message)
+                return
+            compressed = await self.apply_compression(body, more_body=more_body)
+            headers = MutableHeaders(raw=self.initial_message["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            if compressed != body:
+                headers["Content-Encoding"] = self.content_encoding
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    headers["Content-Length"] = str(len(compressed))
+                message["body"] = compressed
+            await self.send(self.initial_message)
+            await self.send(message)
+        else:
+            more_body = message.get("more_body", False)
+            message["body"] = await self.apply_compression(message.get("body", b""), more_body=more_body)
+            await self.send(message)
+
+    async def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        return body
+
+
+class GZipResponder(IdentityResponder):
+    content_encoding = "gzip"
+
+    def __init__(self, app, minimum_size: int, compresslevel: int = GZIP_LEVEL):
+        super().__init__(app, minimum_size)
+        # wbits 31: gzip header and trailer around the deflate stream
+        self.compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, 31)
+
+    async def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        out = self.compressor.compress(body)
+        return out + self.compressor.flush(zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH)
+
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app, minimum_size: int, quality: int = BROTLI_QUALITY,
+                 thread_min_bytes: int = BROTLI_THREAD_MIN_BYTES):
+        super().__init__(app, minimum_size)
+        self.quality = quality
+        self.thread_min_bytes = thread_min_bytes
+        self.compressor = None
+
+    def _compress(self, body: bytes, more_body: bool) -> bytes:
+        if self.compressor is None:
+            self.compressor = brotli.Compressor(quality=self.quality)
+        out = self.compressor.process(body)
+        return out + (self.compressor.flush() if more_body else self.compressor.finish())
+
+    async def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if len(body) >= self.thread_min_bytes:
+            return await run_in_threadpool(self._compress, body, more_body)
+        return self._compress(body, more_body)
+
+
+class CompressionMiddleware:
+    """ASGI middleware choosing br > gzip > identity per request."""
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_BYTES,
+                 gzip_level: int = GZIP_LEVEL, brotli_quality: int = BROTLI_QUALITY,
+                 brotli_thread_min_bytes: int = BROTLI_THREAD_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.brotli_thread_min_bytes = brotli_thread_min_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        if brotli is not None and "br" in accepted:
+            responder = BrotliResponder(self.app, self.minimum_size, quality=self.brotli_quality,
+                                        thread_min_bytes=self.brotli_thread_min_bytes)
+        elif "gzip" in accepted:
+            responder = GZipResponder(self.app, self.minimum_size, compresslevel=self.gzip_level)
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+        await responder(scope, receive, send)
@@ -1,7 +1,17 @@
-from sqlalchemy import create_engine
+from fastapi import Depends, Request
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool
 
+import hashlib
 import os
+import threading
+import time
+from contextlib import contextmanager
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -17,7 +27,64 @@ if not SQLALCHEMY_DATABASE_URL:
     # But here we want to force Supabase.
     SQLALCHEMY_DATABASE_URL = "sqlite:///./mmt_mvp.db"
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+# Pool settings (env-driven). pre_ping + recycle drop connections killed by
+# Render restarts or Supabase pooler resets before a request picks them up.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").strip().lower() in ("1", "true", "yes")
+# Server-side statement timeout for Postgres (0 disables)
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long callers wait for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._wait_lock = threading.Lock()
+        self.wait_count = 0
+        self.wait_total_seconds = 0.0
+        self.wait_max_seconds = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            # Only pool exhaustion; connect failures are not waits that timed out
+            with self._wait_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._wait_lock:
+                self.wait_count += 1
+                self.wait_total_seconds += waited
+                self.wait_max_seconds = max(self.wait_max_seconds, waited)
+
+
+def _engine_kwargs(database_url: str) -> dict:
+    """Build create_engine kwargs for the given URL."""
+    kwargs = {"pool_pre_ping": DB_POOL_PRE_PING}
+    if database_url.startswith("sqlite"):
+        return kwargs
+
+    kwargs.update(
+        poolclass=InstrumentedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    if database_url.startswith("postgres") and DB_STATEMENT_TIMEOUT_MS > 0:
+        kwargs["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    return kwargs
+
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **_engine_kwargs(SQLALCHEMY_DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -28,3 +95,232 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# --- Async path (read-heavy endpoints) ---
+# Write flows stay on the sync SessionLocal; hot dashboard reads use AsyncSession
+# so concurrent clients don't tie up threadpool workers.
+
+# Supabase's pgbouncer in transaction mode (server-side prepared statements don't survive it)
+SUPABASE_POOLER_PORT = 6543
+
+
+def _async_url(database_url: str) -> str:
+    """Map the sync URL to its async driver (asyncpg / aiosqlite)."""
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    if url.get_backend_name() == "postgresql":
+        # asyncpg takes ssl via connect_args, not the libpq sslmode query param
+        url = url.set(drivername="postgresql+asyncpg").difference_update_query(["sslmode"])
+        if url.port == SUPABASE_POOLER_PORT:
+            # Transaction-mode pooler: a prepared statement may land on another backend
+            url = url.update_query_dict({"prepared_statement_cache_size": "0"})
+        return url.render_as_string(hide_password=False)
+    return database_url
+
+
+ASYNC_DATABASE_URL = os.getenv("DATABASE_ASYNC_URL") or _async_url(SQLALCHEMY_DATABASE_URL)
+
+
+def _async_engine_kwargs(async_url: str) -> dict:
+    kwargs = {"pool_pre_ping": DB_POOL_PRE_PING}
+    if async_url.startswith("sqlite"):
+        return kwargs
+
+    kwargs.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    if async_url.startswith("postgresql+asyncpg"):
+        # asyncpg's own statement cache breaks behind pgbouncer / the Supabase pooler
+        connect_args = {"statement_cache_size": 0}
+        if "sslmode=" in SQLALCHEMY_DATABASE_URL and "sslmode=disable" not in SQLALCHEMY_DATABASE_URL:
+            connect_args["ssl"] = "require"
+        if DB_STATEMENT_TIMEOUT_MS > 0:
+            connect_args["server_settings"] = {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+        kwargs["connect_args"] = connect_args
+    return kwargs
+
+
+_async_engine = None
+_AsyncSessionLocal = None
+
+
+def get_async_engine():
+    """Create the async engine on first use (keeps the async driver optional at import)."""
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        _async_engine = create_async_engine(ASYNC_DATABASE_URL, **_async_engine_kwargs(ASYNC_DATABASE_URL))
+        _AsyncSessionLocal = async_sessionmaker(bind=_async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+    return _async_engine
+
+
+async def get_async_db():
+    get_async_engine()
+    async with _AsyncSessionLocal() as db:
+        yield db
+
+
+# --- Read replica routing ---
+# Heavy reporting GETs go to DATABASE_READ_URL when set. Without a replica, or
+# while it is unreachable, they fall back to the primary session. Clients that
+# just wrote are pinned to the primary for DB_READ_YOUR_WRITES_SECONDS so they
+# never read a lagging replica; `X-Read-Your-Writes: true` forces it per request.
+
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL")
+DB_READ_YOUR_WRITES_SECONDS = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "5"))
+DB_REPLICA_RETRY_SECONDS = float(os.getenv("DB_REPLICA_RETRY_SECONDS", "30"))
+READ_YOUR_WRITES_HEADER = "X-Read-Your-Writes"
+
+read_engine = None
+ReadSessionLocal = None
+if DATABASE_READ_URL:
+    read_engine = create_engine(DATABASE_READ_URL, **_engine_kwargs(DATABASE_READ_URL))
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+ASYNC_DATABASE_READ_URL = os.getenv("DATABASE_ASYNC_READ_URL") or (
+    _async_url(DATABASE_READ_URL) if DATABASE_READ_URL else None
+)
+_async_read_engine = None
+_AsyncReadSessionLocal = None
+
+
+def get_async_read_engine():
+    """Async replica engine, created on first use (None when no replica is configured)."""
+    global _async_read_engine, _AsyncReadSessionLocal
+    if ASYNC_DATABASE_READ_URL and _async_read_engine is None:
+        _async_read_engine = create_async_engine(ASYNC_DATABASE_READ_URL, **_async_engine_kwargs(ASYNC_DATABASE_READ_URL))
+        _AsyncReadSessionLocal = async_sessionmaker(bind=_async_read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+    return _async_read_engine
+
+
+class RecentWriters:
+    """Clients that committed a write in the last `window_seconds` (bounded, in-memory)."""
+
+    def __init__(self, window_seconds: float, max_size: int = 10000, clock=time.monotonic):
+        self.window_seconds = window_seconds
+        self.max_size = max_size
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._last_write = {}
+
+    def mark(self, key: str):
+        now = self._clock()
+        with self._lock:
+            if len(self._last_write) >= self.max_size:
+                cutoff = now - self.window_seconds
+                self._last_write = {k: t for k, t in self._last_write.items() if t > cutoff}
+                if len(self._last_write) >= self.max_size:
+                    self._last_write.clear()
+            self._last_write[key] = now
+
+    def is_recent(self, key: str) -> bool:
+        with self._lock:
+            last = self._last_write.get(key)
+        return last is not None and self._clock() - last < self.window_seconds
+
+    def clear(self):
+        with self._lock:
+            self._last_write.clear()
+
+
+recent_writers = RecentWriters(DB_READ_YOUR_WRITES_SECONDS)
+_replica_down_until = 0.0
+
+
+def client_key(request: Request) -> str:
+    """Identify the caller by bearer token (hashed) or, failing that, by address."""
+    auth = request.headers.get("authorization")
+    if auth:
+        return hashlib.sha256(auth.encode()).hexdigest()
+    return f"addr:{request.client.host if request.client else ''}"
+
+
+def wants_primary(request: Request) -> bool:
+    if request.headers.get(READ_YOUR_WRITES_HEADER, "").strip().lower() in ("1", "true", "yes"):
+        return True
+    return recent_writers.is_recent(client_key(request))
+
+
+def _replica_available() -> bool:
+    return time.monotonic() >= _replica_down_until
+
+
+def _mark_replica_down():
+    global _replica_down_until
+    _replica_down_until = time.monotonic() + DB_REPLICA_RETRY_SECONDS
+
+
+def get_read_db(request: Request, primary=Depends(get_db)):
+    """Session for read-only endpoints: replica when configured and healthy, else primary."""
+    if ReadSessionLocal is None or wants_primary(request) or not _replica_available():
+        yield primary
+        return
+
+    db = ReadSessionLocal()
+    try:
+        db.connection()
+    except (OperationalError, OSError):
+        db.close()
+        _mark_replica_down()
+        yield primary
+        return
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(request: Request, primary=Depends(get_async_db)):
+    """Async counterpart of get_read_db."""
+    if get_async_read_engine() is None or wants_primary(request) or not _replica_available():
+        yield primary
+        return
+
+    async with _AsyncReadSessionLocal() as db:
+        try:
+            await db.connection()
+        except (OperationalError, OSError):
+            _mark_replica_down()
+            db = primary
+        yield db
+
+
+def pool_stats(bind=None) -> dict:
+    """Live connection-pool statistics for an engine (defaults to the primary engine)."""
+    bind = bind or engine
+    pool = getattr(bind, "sync_engine", bind).pool
+    stats = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            max_overflow=pool._max_overflow,
+            timeout_seconds=pool.timeout(),
+        )
+    if isinstance(pool, InstrumentedQueuePool):
+        with pool._wait_lock:
+            stats.update(
+                checkouts=pool.wait_count,
+                wait_total_seconds=round(pool.wait_total_seconds, 6),
+                wait_avg_seconds=round(pool.wait_total_seconds / pool.wait_count, 6) if pool.wait_count else 0.0,
+                wait_max_seconds=round(pool.wait_max_seconds, 6),
+                timeouts=pool.timeouts,
+            )
+    return stats
+
+
+@contextmanager
+def statement_timeout(db, milliseconds: int):
+    """Override the Postgres statement timeout for the current transaction.
+
+    Uses SET LOCAL, so the value resets on commit/rollback. No-op on SQLite.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text(f"SET LOCAL statement_timeout = {int(milliseconds)}"))
+    yield db
@@ -5,15 +5,36 @@ Skills Applied:
 - auth-implementation-patterns → JWT, session management
 - backend-security-coder → OWASP-compliant auth
 - api-security-best-practices → Error masking, no info leakage
+
+Verification modes (AUTH_VERIFY_MODE):
+- "remote" (default): every token is checked with `supabase.auth.get_user`.
+- "local": signature, expiry, audience and issuer are verified in-process
+  against SUPABASE_JWT_SECRET (HS256) or the cached Supabase JWKS (RS256/ES256).
+  Set AUTH_REMOTE_FALLBACK=true to fall back to the remote call when no
+  signing key can be resolved locally.
+
+Verified principals are cached per token hash (AUTH_CACHE_SIZE entries,
+AUTH_CACHE_MAX_TTL_SECONDS cap, 0 disables) until the token's `exp`.
+Revoking a user rejects every token issued (`iat`) before the revocation
+for AUTH_REVOCATION_WINDOW_SECONDS (the longest token lifetime).
+
+Operational endpoints require one of AUTH_ADMIN_ROLES (comma separated,
+matched against `app_metadata.role` / `app_metadata.roles`).
 """
 
 import logging
+from dataclasses import dataclass, field
+from typing import Optional
+
+import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from supabase import create_client, Client
 import os
 from dotenv import load_dotenv
 
+from .services.principal_cache import PrincipalCache, SessionDenylist
+
 load_dotenv()
 
 logger = logging.getLogger("mmt.auth")
@@ -25,55 +46,244 @@ supabase: Client = create_client(url, key)
 
 security = HTTPBearer()
 
+# --- Local JWT verification settings ---
+AUTH_VERIFY_MODE = os.getenv("AUTH_VERIFY_MODE", "remote").strip().lower()
+AUTH_REMOTE_FALLBACK = os.getenv("AUTH_REMOTE_FALLBACK", "false").strip().lower() in ("1", "true", "yes")
+JWT_SECRET: Optional[str] = os.getenv("SUPABASE_JWT_SECRET")
+JWT_AUDIENCE = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+JWT_ISSUER: Optional[str] = os.getenv("SUPABASE_JWT_ISSUER") or (f"{url.rstrip('/')}/auth/v1" if url else None)
+JWKS_URL: Optional[str] = os.getenv("SUPABASE_JWKS_URL") or (
+    f"{url.rstrip('/')}/auth/v1/.well-known/jwks.json" if url else None
+)
+JWKS_CACHE_SECONDS = int(os.getenv("SUPABASE_JWKS_CACHE_SECONDS", "600"))
+JWT_LEEWAY_SECONDS = int(os.getenv("JWT_LEEWAY_SECONDS", "30"))
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    """Verify JWT token and return user object.
+ASYMMETRIC_ALGORITHMS = ("RS256", "ES256")
+
+principal_cache = PrincipalCache(
+    max_size=int(os.getenv("AUTH_CACHE_SIZE", "1024")),
+    max_ttl_seconds=int(os.getenv("AUTH_CACHE_MAX_TTL_SECONDS", "300")),
+)
+# Supabase access tokens live 3600s by default
+session_denylist = SessionDenylist(window_seconds=int(os.getenv("AUTH_REVOCATION_WINDOW_SECONDS", "3600")))
+
+AUTH_ADMIN_ROLES = {
+    role.strip().lower() for role in os.getenv("AUTH_ADMIN_ROLES", "admin").split(",") if role.strip()
+}
+
+
+class SigningKeyUnavailable(Exception):
+    """Raised when the token cannot be checked locally (no secret / JWKS miss)."""
 
-    Security hardening:
-    - Internal errors are logged, not returned to client (OWASP A01)
-    - Generic error message prevents information disclosure
 
-    TODO: Switch to local JWT verification once JWT_SECRET is available.
-          This eliminates the Supabase network round-trip per request.
+@dataclass
+class AuthenticatedUser:
+    """Principal built from locally verified JWT claims.
+
+    Mirrors the attributes of the Supabase `User` object that the routers
+    rely on (`id`, `email`, `user_metadata`).
     """
-    token = credentials.credentials
+    id: str
+    email: Optional[str] = None
+    role: Optional[str] = None
+    aud: Optional[str] = None
+    exp: Optional[int] = None
+    user_metadata: dict = field(default_factory=dict)
+    app_metadata: dict = field(default_factory=dict)
+
+
+_jwks_client: Optional[jwt.PyJWKClient] = None
+
+
+def _get_jwks_client() -> jwt.PyJWKClient:
+    """Lazily build the JWKS client.
+
+    The key set is cached for JWKS_CACHE_SECONDS; an unknown `kid` forces a
+    refetch, so signing-key rotation is picked up without a restart.
+    """
+    global _jwks_client
+    if _jwks_client is None:
+        if not JWKS_URL:
+            raise SigningKeyUnavailable("JWKS URL is not configured")
+        _jwks_client = jwt.PyJWKClient(JWKS_URL, cache_jwk_set=True, lifespan=JWKS_CACHE_SECONDS)
+    return _jwks_client
+
+
+def _resolve_signing_key(token: str, algorithm: Optional[str]):
+    if algorithm == "HS256":
+        if not JWT_SECRET:
+            raise SigningKeyUnavailable("HS256 token received but SUPABASE_JWT_SECRET is not set")
+        return JWT_SECRET
+    if algorithm in ASYMMETRIC_ALGORITHMS:
+        try:
+            return _get_jwks_client().get_signing_key_from_jwt(token).key
+        except jwt.PyJWKClientError as e:
+            raise SigningKeyUnavailable(str(e))
+    raise SigningKeyUnavailable(f"Unsupported token algorithm: {algorithm}")
+
+
+def verify_token_locally(token: str) -> AuthenticatedUser:
+    """Validate signature, expiry, audience and issuer without a network call.
+
+    Raises:
+        jwt.PyJWTError: The token is malformed, expired or fails a claim check.
+        SigningKeyUnavailable: No local key can verify this token.
+    """
+    algorithm = jwt.get_unverified_header(token).get("alg")
+    signing_key = _resolve_signing_key(token, algorithm)
+
+    claims = jwt.decode(
+        token,
+        signing_key,
+        algorithms=[algorithm],
+        audience=JWT_AUDIENCE,
+        issuer=JWT_ISSUER,
+        leeway=JWT_LEEWAY_SECONDS,
+        options={"require": ["exp", "sub"], "verify_iss": JWT_ISSUER is not None},
+    )
+    return AuthenticatedUser(
+        id=claims["sub"],
+        email=claims.get("email"),
+        role=claims.get("role"),
+        aud=claims.get("aud"),
+        exp=claims.get("exp"),
+        user_metadata=claims.get("user_metadata") or {},
+        app_metadata=claims.get("app_metadata") or {},
+    )
+
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _verify_token_remotely(token: str):
     try:
         user_response = supabase.auth.get_user(token)
         if not user_response.user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid or expired authentication credentials",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+            raise _unauthorized("Invalid or expired authentication credentials")
         return user_response.user
     except HTTPException:
         raise
     except Exception as e:
         # Log the real error internally, never expose stack traces
         logger.error("Authentication verification failed: %s", str(e))
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Authentication failed. Please log in again.",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _unauthorized("Authentication failed. Please log in again.")
 
 
-def get_current_user_fpso(user=Depends(get_current_user)):
-    """Extract FPSO context from user token to enforce RBAC (Rule 01: Tenant Isolation).
-    
-    Returns a dict with 'user' and 'fpso_name'.
-    """
+def _token_claim(user, token: str, name: str) -> Optional[float]:
+    """A numeric claim (`exp`, `iat`) of an already verified token, from the principal or the token."""
+    value = getattr(user, name, None)
+    if value is None:
+        try:
+            value = jwt.decode(token, options={"verify_signature": False}).get(name)
+        except jwt.PyJWTError:
+            return None
+    return float(value) if value is not None else None
+
+
+def _user_id(user) -> Optional[str]:
+    if isinstance(user, dict):
+        return user.get("id")
+    user_id = getattr(user, "id", None)
+    return str(user_id) if user_id is not None else None
+
+
+def _build_user_context(user) -> dict:
     fpso_name = None
     if isinstance(user, dict):
         # Mock user during tests
         fpso_name = user.get("fpso_name")
     elif hasattr(user, "user_metadata"):
         # Supabase User object
-        fpso_name = user.user_metadata.get("fpso_name")
-        
-    # In strict mode, we could raise 403 if fpso_name is missing, 
-    # but some global admins might not have one. 
+        fpso_name = (user.user_metadata or {}).get("fpso_name")
+
+    # In strict mode, we could raise 403 if fpso_name is missing,
+    # but some global admins might not have one.
     return {
         "user": user,
         "fpso_name": fpso_name
     }
+
+
+def _verify_credentials(token: str):
+    if AUTH_VERIFY_MODE == "local":
+        try:
+            return verify_token_locally(token)
+        except jwt.ExpiredSignatureError:
+            raise _unauthorized("Invalid or expired authentication credentials")
+        except jwt.PyJWTError as e:
+            logger.warning("Local JWT verification rejected token: %s", str(e))
+            raise _unauthorized("Authentication failed. Please log in again.")
+        except SigningKeyUnavailable as e:
+            if not AUTH_REMOTE_FALLBACK:
+                logger.error("Local JWT verification unavailable: %s", str(e))
+                raise _unauthorized("Authentication failed. Please log in again.")
+            logger.warning("Local JWT verification unavailable, falling back to Supabase: %s", str(e))
+    return _verify_token_remotely(token)
+
+
+def _verify_token(token: str):
+    user = _verify_credentials(token)
+    if session_denylist.is_revoked(_user_id(user), _token_claim(user, token, "iat")):
+        raise _unauthorized("Invalid or expired authentication credentials")
+    return user
+
+
+def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Verify JWT token and return user object.
+
+    Security hardening:
+    - Internal errors are logged, not returned to client (OWASP A01)
+    - Generic error message prevents information disclosure
+    - In local mode a bad or expired token is rejected without contacting
+      Supabase; only a missing signing key may fall back to the remote check.
+    - Cached principals are served only until the token's `exp`.
+    - Tokens issued before the user's sessions were revoked are rejected.
+    """
+    token = credentials.credentials
+    cached = principal_cache.get(token)
+    if cached is not None:
+        return cached["user"]
+
+    user = _verify_token(token)
+    principal_cache.put(
+        token, _build_user_context(user), expires_at=_token_claim(user, token, "exp"), user_id=_user_id(user)
+    )
+    return user
+
+
+def get_current_user_fpso(user=Depends(get_current_user)):
+    """Extract FPSO context from user token to enforce RBAC (Rule 01: Tenant Isolation).
+
+    Returns a dict with 'user' and 'fpso_name', built from the principal
+    get_current_user resolved (cached or verified) for this request.
+    """
+    return _build_user_context(user)
+
+
+def _user_roles(user) -> set:
+    """Application roles of a principal (lower-case).
+
+    Supabase users carry them in `app_metadata` (only the service role can
+    set it; the top-level `role` claim is just "authenticated"). Harness
+    dict users carry a plain `role`.
+    """
+    if isinstance(user, dict):
+        metadata = user.get("app_metadata") or {}
+        roles = [user.get("role")]
+    else:
+        metadata = getattr(user, "app_metadata", None) or {}
+        roles = []
+    roles += [metadata.get("role"), *(metadata.get("roles") or [])]
+    return {str(role).strip().lower() for role in roles if role}
+
+
+def require_admin(user=Depends(get_current_user)):
+    """Allow only principals holding one of AUTH_ADMIN_ROLES (403 otherwise)."""
+    if not _user_roles(user) & AUTH_ADMIN_ROLES:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Administrator role required")
+    return user
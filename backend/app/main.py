@@ -1,17 +1,53 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Request, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from .routers import equipment, calibration, chemical, maintenance, failures, alerts, sync, planning, export, history, configuration
-from .database import engine, Base
-from .seed import seed_data
+from .routers import equipment, calibration, chemical, maintenance, failures, alerts, sync, planning, export, history, configuration, auth, scheduler as scheduler_router
+from sqlalchemy import text
+from .database import engine, read_engine, pool_stats, recent_writers, client_key
+from .dependencies import require_admin
+from .metrics import metrics_middleware, render_metrics
+from .compression import CompressionMiddleware
+from .services import parse_pool, scheduler
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="MMT API")
 
+# Schema creation and seeding run once per deploy via `python -m app.manage init`,
+# never in the workers. Startup only warms the pool; /health reports the boot time.
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "5"))
+boot_state = {"boot_seconds": None, "within_budget": None, "db_ready": False}
+
 @app.on_event("startup")
 def startup_event():
-    # Create tables and seed data in startup event so it doesn't block the process init
-    Base.metadata.create_all(bind=engine)
-    seed_data()
+    start = time.perf_counter()
+    boot_state["db_ready"] = False
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        boot_state["db_ready"] = True
+    except Exception as e:
+        # Stay up so /health answers; pre_ping reconnects once the DB is back
+        logger.warning("Database not reachable at startup: %s", e)
+    elapsed = time.perf_counter() - start
+    boot_state["boot_seconds"] = round(elapsed, 4)
+    boot_state["within_budget"] = elapsed <= STARTUP_BUDGET_SECONDS
+    if not boot_state["within_budget"]:
+        logger.warning("Startup took %.2fs (budget %.2fs)", elapsed, STARTUP_BUDGET_SECONDS)
+    # Background jobs (SLA scan, alert re-check, calibration sweep); leased per job in the DB
+    scheduler.start()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    scheduler.stop()
+    parse_pool.shutdown()
+
+# gzip/brotli for bodies above COMPRESSION_MIN_BYTES. Registered first so it sits
+# innermost and sees the route's complete body (and its Content-Length).
+app.add_middleware(CompressionMiddleware)
 
 # Setup CORS
 app.add_middleware(
@@ -22,6 +58,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Pin clients that just wrote to the primary so replica lag can't hide their writes
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+@app.middleware("http")
+async def track_recent_writes(request: Request, call_next):
+    response = await call_next(request)
+    if request.method in WRITE_METHODS and response.status_code < 400:
+        recent_writers.mark(client_key(request))
+    return response
+
+# Per-route latency, status, in-flight, DB time and response size (as sent)
+app.middleware("http")(metrics_middleware)
+
 # Include Routers
 app.include_router(equipment.router)
 app.include_router(calibration.router)
@@ -34,6 +83,8 @@ app.include_router(planning.router)
 app.include_router(export.router)
 app.include_router(history.router)
 app.include_router(configuration.router)
+app.include_router(auth.router)
+app.include_router(scheduler_router.router)
 
 from .routers import audit_simulation
 app.include_router(audit_simulation.router)
@@ -50,6 +101,18 @@ def read_root():
 
 @app.api_route("/health", methods=["GET", "HEAD"])
 def health_check():
-    return {"status": "ok", "version": "0.3.0"}
+    return {"status": "ok", "version": "0.3.0", **boot_state}
 
+@app.get("/health/db-pool")
+def db_pool_health(current_user=Depends(require_admin)):
+    """Live connection-pool stats (checked out, overflow, wait time); admin only."""
+    stats = pool_stats()
+    if read_engine is not None:
+        stats["replica"] = pool_stats(read_engine)
+    return stats
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint."""
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
@@ -0,0 +1,108 @@
+"""
+MMT management CLI — schema and seed tasks kept out of the API workers.
+
+Run once per deploy (before uvicorn/gunicorn spawns workers):
+
+    python -m app.manage migrate   # create missing tables and indexes
+    python -m app.manage seed      # load demo data into an empty database
+    python -m app.manage init      # migrate + seed
+    python -m app.manage rebuild-stats  # regenerate 2σ rolling windows from sample_results
+"""
+
+import argparse
+import time
+
+from sqlalchemy import inspect, text
+
+from . import models
+from .database import SessionLocal, engine
+from .seed import seed_data
+from .services import rolling_stats
+
+
+def _add_missing_columns():
+    """ALTER TABLE ... ADD COLUMN for nullable columns added to existing tables."""
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    preparer = engine.dialect.identifier_preparer
+    with engine.begin() as conn:
+        for table in models.Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            present = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in present and column.nullable:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(
+                        f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {preparer.format_column(column)} {column_type}"
+                    ))
+
+
+def _create_missing_indexes():
+    """CREATE INDEX for declared indexes that don't exist yet.
+
+    On Postgres they are built CONCURRENTLY (outside a transaction), so a
+    deploy adding an index to samples / sample_results doesn't block writes
+    to them while it builds.
+    """
+    concurrently = engine.dialect.name == "postgresql"
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for table in models.Base.metadata.sorted_tables:
+            for index in table.indexes:
+                if not concurrently:
+                    index.create(bind=conn, checkfirst=True)
+                    continue
+                index.dialect_kwargs["postgresql_concurrently"] = True
+                try:
+                    index.create(bind=conn, checkfirst=True)
+                finally:
+                    del index.dialect_kwargs["postgresql_concurrently"]
+
+
+def migrate():
+    """Create any missing tables, columns and indexes (idempotent).
+
+    create_all() skips tables that already exist, so nullable columns added
+    later (e.g. samples.sla_check_date) and indexes declared later (e.g. the
+    M3 history indexes) are created one by one.
+    """
+    models.Base.metadata.create_all(bind=engine)
+    _add_missing_columns()
+    _create_missing_indexes()
+
+
+def seed():
+    seed_data()
+
+
+def rebuild_stats():
+    """Regenerate every rolling-statistics window from raw results."""
+    db = SessionLocal()
+    try:
+        report = rolling_stats.rebuild_all(db)
+    finally:
+        db.close()
+    print(f"rebuild_stats: {report['windows']} windows, {report['changed']} changed, {report['removed']} removed")
+
+
+COMMANDS = {
+    "migrate": [migrate],
+    "seed": [seed],
+    "rebuild-stats": [rebuild_stats],
+    "init": [migrate, seed],
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.manage", description="MMT schema/seed tasks")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    args = parser.parse_args(argv)
+
+    for step in COMMANDS[args.command]:
+        start = time.perf_counter()
+        step()
+        print(f"{step.__name__}: done in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
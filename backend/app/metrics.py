@@ -0,0 +1,162 @@
+"""
+Request Metrics — Prometheus instrumentation for the API.
+
+Per-route (templated path) latency, status counts, in-flight requests,
+DB time per request and response size. Scraped from GET /metrics.
+
+Also tracks the SQL statements issued by each request: the same statement
+repeated SQL_N_PLUS_ONE_THRESHOLD times is logged as a likely N+1, and with
+SQL_DEBUG_HEADERS=true every response carries its query count and DB time.
+"""
+
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+SQL_DEBUG_HEADERS = os.getenv("SQL_DEBUG_HEADERS", "false").strip().lower() in ("1", "true", "yes")
+SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "10"))
+
+registry = CollectorRegistry()
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+REQUEST_LATENCY = Histogram(
+    "mmt_http_request_duration_seconds", "Request latency by route",
+    ["method", "route"], buckets=LATENCY_BUCKETS, registry=registry,
+)
+REQUESTS = Counter(
+    "mmt_http_requests_total", "Requests by route and status code",
+    ["method", "route", "status"], registry=registry,
+)
+IN_PROGRESS = Gauge(
+    "mmt_http_requests_in_progress", "Requests currently being served",
+    ["method"], registry=registry,
+)
+DB_TIME = Histogram(
+    "mmt_http_request_db_seconds", "Time spent in SQL per request",
+    ["method", "route"], buckets=LATENCY_BUCKETS, registry=registry,
+)
+DB_QUERIES = Histogram(
+    "mmt_http_request_db_queries", "SQL statements executed per request",
+    ["method", "route"], buckets=(0, 1, 2, 5, 10, 20, 50, 100, 250, 1000), registry=registry,
+)
+RESPONSE_SIZE = Histogram(
+    "mmt_http_response_size_bytes", "Response body size by route",
+    ["method", "route"], buckets=SIZE_BUCKETS, registry=registry,
+)
+N_PLUS_ONE = Counter(
+    "mmt_sql_n_plus_one_total", "Requests that repeated one SQL statement past the threshold",
+    ["method", "route"], registry=registry,
+)
+
+
+class RequestDbStats:
+    """SQL statements and time accumulated while serving one request."""
+
+    __slots__ = ("queries", "seconds", "statements")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+        self.statements = {}
+
+    def repeated(self, threshold: int = None) -> dict:
+        """Statements executed at least `threshold` times (N+1 suspects)."""
+        threshold = SQL_N_PLUS_ONE_THRESHOLD if threshold is None else threshold
+        return {sql: n for sql, n in self.statements.items() if n >= threshold}
+
+    def count_matching(self, fragment: str) -> int:
+        """Executions of statements containing `fragment` (e.g. "FROM sample_points WHERE").
+
+        Whitespace is normalized, since compiled SQL breaks lines before WHERE.
+        """
+        return sum(n for sql, n in self.statements.items() if fragment in " ".join(sql.split()))
+
+
+# Set by the middleware; sync endpoints run in the threadpool with a copy of the
+# context, so they share the same RequestDbStats object.
+current_db_stats: ContextVar[Optional[RequestDbStats]] = ContextVar("current_db_stats", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("query_start")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    stats = current_db_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.seconds += elapsed
+        stats.statements[statement] = stats.statements.get(statement, 0) + 1
+
+
+@contextmanager
+def track_queries():
+    """Collect SQL count/time for the enclosed block (services, scripts, tests)."""
+    stats = RequestDbStats()
+    token = current_db_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_db_stats.reset(token)
+
+
+def route_template(request) -> str:
+    """Templated path of the matched route (e.g. /api/chemical/samples/{sample_id})."""
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or "<unmatched>"
+
+
+async def metrics_middleware(request, call_next):
+    method = request.method
+    IN_PROGRESS.labels(method).inc()
+    start = time.perf_counter()
+    status = 500
+    response = None
+    try:
+        with track_queries() as stats:
+            response = await call_next(request)
+        status = response.status_code
+        if SQL_DEBUG_HEADERS:
+            response.headers["X-DB-Query-Count"] = str(stats.queries)
+            response.headers["X-DB-Query-Time-Ms"] = f"{stats.seconds * 1000:.2f}"
+        return response
+    finally:
+        elapsed = time.perf_counter() - start
+        IN_PROGRESS.labels(method).dec()
+
+        route = route_template(request)
+        REQUEST_LATENCY.labels(method, route).observe(elapsed)
+        REQUESTS.labels(method, route, str(status)).inc()
+        DB_TIME.labels(method, route).observe(stats.seconds)
+        DB_QUERIES.labels(method, route).observe(stats.queries)
+        size = response.headers.get("content-length") if response is not None else None
+        if size is not None:
+            RESPONSE_SIZE.labels(method, route).observe(int(size))
+
+        repeated = stats.repeated()
+        if repeated:
+            N_PLUS_ONE.labels(method, route).inc()
+            sql, n = max(repeated.items(), key=lambda item: item[1])
+            logger.warning("Possible N+1 on %s %s: statement ran %d times: %s", method, route, n, " ".join(sql.split())[:200])
+
+
+def render_metrics():
+    """Exposition-format payload and its content type."""
+    return generate_latest(registry), CONTENT_TYPE_LATEST
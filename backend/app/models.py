@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, DateTime, Float, ForeignKey, Enum, Text, Table
+from sqlalchemy import Column, Integer, String, Date, DateTime, Float, ForeignKey, Enum, Text, Table, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from .database import Base
 from datetime import datetime
@@ -339,6 +339,11 @@ class SamplingCampaign(Base):
 
 class Sample(Base):
     __tablename__ = "samples"
+    __table_args__ = (
+        Index("ix_samples_sample_point_sampling_date", "sample_point_id", "sampling_date"),  # M3 history per point
+        Index("ix_samples_status_due_date", "status", "due_date"),  # SLA / dashboard scans
+        Index("ix_samples_sla_check_date", "sla_check_date"),  # incremental SLA scan
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     campaign_id = Column(Integer, ForeignKey("sampling_campaigns.id"), nullable=True)
@@ -373,6 +378,7 @@ class Sample(Base):
     report_issue_date = Column(Date, nullable=True)  # Laudo Realizado
     fc_update_date = Column(DateTime, nullable=True)  # CV Realizado
     due_date = Column(Date, nullable=True)  # Deadline for the current step
+    sla_check_date = Column(Date, nullable=True)  # Day the current step's SLA alert falls due (services/sla_scan.py)
     
     # Results & Validation
     lab_report_url = Column(String, nullable=True)
@@ -407,6 +413,10 @@ class SampleStatusHistory(Base):
 
 class SampleResult(Base):
     __tablename__ = "sample_results"
+    __table_args__ = (
+        Index("ix_sample_results_parameter_sample_created", "parameter", "sample_id", "created_at"),  # 2σ history
+        Index("ix_sample_results_sample_id", "sample_id"),  # lab results / re-upload delete
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     sample_id = Column(Integer, ForeignKey("samples.id"))
@@ -428,6 +438,26 @@ class SampleResult(Base):
     # Relationships
     sample = relationship("Sample", back_populates="results")
 
+
+class ParameterRollingWindow(Base):
+    """Last HISTORY_SIZE results of one parameter at one sample point (2σ baseline).
+
+    Maintained by app.services.rolling_stats when SampleResult rows change;
+    `python -m app.manage rebuild-stats` regenerates it from sample_results.
+    """
+    __tablename__ = "parameter_rolling_windows"
+    __table_args__ = (UniqueConstraint("sample_point_id", "parameter", name="uq_rolling_window_point_parameter"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    sample_point_id = Column(Integer, ForeignKey("sample_points.id"), nullable=False)
+    parameter = Column(String, nullable=False)
+    capacity = Column(Integer, nullable=False)       # HISTORY_SIZE the window was built with
+    count = Column(Integer, nullable=False, default=0)
+    mean = Column(Float, nullable=True)              # Over the stored entries (n - 1 variance)
+    std = Column(Float, nullable=True)
+    entries = Column(Text, nullable=False, default="[]")  # JSON, newest first
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 # M4 - Onshore Maintenance
 class MaintenanceRecord(Base):
     __tablename__ = "maintenance_records"
@@ -808,6 +838,51 @@ class SLARule(Base):
     needs_validation = Column(Integer, default=1)
     
     created_at = Column(DateTime, default=datetime.utcnow)
+
+class SLAWatermark(Base):
+    """The SLA rules the incremental SLA scan last ran against.
+
+    A change in rules_fingerprint (SLA matrix / SLARule edits) makes the next
+    scan recompute every active sample's sla_check_date. Per-sample progress
+    lives in samples.sla_check_date (cleared once evaluated).
+    """
+    __tablename__ = "sla_watermarks"
+
+    name = Column(String, primary_key=True)
+    rules_fingerprint = Column(String, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+# Background scheduler (app.services.scheduler)
+class SchedulerLease(Base):
+    """One row per scheduled job: who holds it now and when it is next due.
+
+    A worker runs a job only after claiming the row with a conditional UPDATE
+    (free or expired lease, next_run_at reached), so each run happens on a
+    single replica and the cadence is shared by all of them.
+    """
+    __tablename__ = "scheduler_leases"
+
+    job_name = Column(String, primary_key=True)
+    holder = Column(String, nullable=True)  # "<host>:<pid>:<nonce>" while running
+    expires_at = Column(DateTime, nullable=True)
+    next_run_at = Column(DateTime, nullable=True)
+
+class JobRun(Base):
+    """History of scheduler job runs (duration, outcome, last error)."""
+    __tablename__ = "job_runs"
+    __table_args__ = (Index("ix_job_runs_job_started", "job_name", "started_at"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_name = Column(String)
+    holder = Column(String)
+    trigger = Column(String, default="schedule")  # schedule / manual
+    started_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+    duration_ms = Column(Float, nullable=True)
+    status = Column(String, default="running")  # running / success / error
+    result = Column(Text, nullable=True)  # JSON summary returned by the job
+    error = Column(Text, nullable=True)
+
 # M4 - Onshore Maintenance Kanban
 class MaintenanceColumn(Base):
     __tablename__ = "maintenance_columns"
@@ -0,0 +1,183 @@
+"""
+Fast JSON Responses — orjson rendering and a direct ORM → JSON path.
+
+FastAPI already serializes `response_model` results through pydantic-core,
+which is the right default. For the large list endpoints there is an opt-in
+path (FAST_ORM_SERIALIZATION) that skips model validation: ORM rows are read
+attribute by attribute following the response model's fields and rendered
+with orjson. Only "trusted" models qualify — plain fields, no validators,
+serializers or aliases — so the output can stay byte-for-byte identical.
+
+    FAST_ORM_SERIALIZATION=off     default FastAPI path
+    FAST_ORM_SERIALIZATION=on      direct ORM → orjson
+    FAST_ORM_SERIALIZATION=verify  render both, log any difference, serve the default
+"""
+
+import logging
+import os
+import sys
+import types
+from datetime import date, datetime
+from typing import ForwardRef, List, Optional, Union, get_args, get_origin
+
+import orjson
+from fastapi.responses import Response
+from pydantic import BaseModel, TypeAdapter
+
+logger = logging.getLogger(__name__)
+
+FAST_ORM_SERIALIZATION = os.getenv("FAST_ORM_SERIALIZATION", "off").strip().lower()
+
+ORJSON_OPTIONS = orjson.OPT_UTC_Z
+
+
+class ORJSONResponse(Response):
+    """JSON response rendered with orjson."""
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+
+# --- Field plans ---
+# A plan is a list of (field name, default, converter); converters turn the ORM
+# attribute into what pydantic would have emitted for that annotation.
+
+_plans = {}
+_building = set()
+
+
+class UntrustedModel(Exception):
+    """The response model needs pydantic (validators, aliases, unknown types)."""
+
+
+def _as_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _as_datetime(value):
+    if isinstance(value, datetime) or not isinstance(value, date):
+        return value
+    return datetime(value.year, value.month, value.day)
+
+
+_SCALARS = {
+    str: None,
+    int: int,
+    float: float,
+    bool: bool,
+    date: _as_date,
+    datetime: _as_datetime,
+}
+
+
+def _converter(annotation, namespace):
+    if isinstance(annotation, (str, ForwardRef)):
+        # Unresolved forward reference (e.g. List["EquipmentTagInstallation"])
+        name = annotation if isinstance(annotation, str) else annotation.__forward_arg__
+        if name not in namespace:
+            raise UntrustedModel(f"unresolved reference {name!r}")
+        annotation = namespace[name]
+    origin = get_origin(annotation)
+    if origin in (Union, types.UnionType):
+        args = [a for a in get_args(annotation) if a is not type(None)]
+        if len(args) != 1:
+            raise UntrustedModel(f"union {annotation}")
+        inner = _converter(args[0], namespace)
+        if inner is None:
+            return None
+        return lambda value: None if value is None else inner(value)
+    if origin in (list, List):
+        (item,) = get_args(annotation) or (None,)
+        if item is None:
+            raise UntrustedModel("bare list")
+        inner = _converter(item, namespace)
+        if inner is None:
+            return lambda value: list(value)
+        return lambda value: [inner(v) for v in value]
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        plan = _plan(annotation)
+        return lambda value: _serialize_row(value, plan)
+    if annotation in _SCALARS:
+        return _SCALARS[annotation]
+    raise UntrustedModel(f"annotation {annotation!r}")
+
+
+def _plan(model):
+    if model in _plans:
+        return _plans[model]
+    if model in _building:
+        raise UntrustedModel(f"{model.__name__} is self-referencing")
+    decorators = model.__pydantic_decorators__
+    if (decorators.validators or decorators.field_validators or decorators.root_validators
+            or decorators.field_serializers or decorators.model_serializers
+            or decorators.model_validators or decorators.computed_fields):
+        raise UntrustedModel(f"{model.__name__} has validators/serializers")
+    if model.model_config.get("alias_generator"):
+        raise UntrustedModel(f"{model.__name__} has an alias generator")
+    plan = []
+    namespace = vars(sys.modules[model.__module__])
+    _building.add(model)
+    try:
+        for name, field in model.model_fields.items():
+            if field.alias or field.serialization_alias or field.exclude:
+                raise UntrustedModel(f"{model.__name__}.{name} is aliased/excluded")
+            default = None if field.is_required() else field.get_default(call_default_factory=True)
+            plan.append((name, default, _converter(field.annotation, namespace)))
+    finally:
+        _building.discard(model)
+    _plans[model] = plan
+    return plan
+
+
+def _serialize_row(obj, plan):
+    out = {}
+    for name, default, convert in plan:
+        value = getattr(obj, name, default)
+        if value is not None and convert is not None:
+            value = convert(value)
+        out[name] = value
+    return out
+
+
+def is_trusted(model) -> bool:
+    try:
+        _plan(model)
+        return True
+    except UntrustedModel:
+        return False
+
+
+def fast_rows(rows, model) -> list:
+    """ORM rows as plain JSON-ready dicts following `model`'s fields."""
+    plan = _plan(model)
+    return [_serialize_row(row, plan) for row in rows]
+
+
+def fast_dump(rows, model) -> bytes:
+    return orjson.dumps(fast_rows(rows, model), option=ORJSON_OPTIONS)
+
+
+def standard_dump(rows, model) -> bytes:
+    """What the default response_model path produces for List[model]."""
+    adapter = TypeAdapter(List[model])
+    return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+
+def orm_list_response(rows, model, mode: Optional[str] = None):
+    """Return value for a `response_model=List[model]` endpoint.
+
+    With the fast path off (or an untrusted model) the rows are returned as-is
+    and FastAPI serializes them as usual.
+    """
+    mode = mode or FAST_ORM_SERIALIZATION
+    if mode not in ("on", "verify") or not is_trusted(model):
+        return rows
+
+    if mode == "verify":
+        fast, standard = fast_dump(rows, model), standard_dump(rows, model)
+        if fast != standard:
+            logger.warning("Fast serialization mismatch for %s (%d vs %d bytes)", model.__name__, len(fast), len(standard))
+        return Response(content=standard, media_type="application/json")
+    return ORJSONResponse(content=fast_rows(rows, model))
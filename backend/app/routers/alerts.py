@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from ..database import get_db
+from ..database import get_db, get_async_read_db
 from ..models import Alert, AlertSeverity, AlertConfiguration, AlertRecipient
 from ..schemas.phase3 import (
     AlertCreate, 
@@ -17,7 +19,7 @@ from ..services.alerts_service import AlertsService
 router = APIRouter(prefix="/api/alerts", tags=["alerts"])
 
 @router.get("", response_model=List[AlertSchema])
-def get_alerts(
+async def get_alerts(
     skip: int = 0,
     limit: int = 100,
     severity: Optional[str] = None,
@@ -25,29 +27,30 @@ def get_alerts(
     fpso_name: Optional[str] = None,
     tag_number: Optional[str] = None,
     alert_type: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user_data = Depends(get_current_user_fpso)
 ):
     """Get all alerts with extensive filters"""
-    query = db.query(Alert)
+    stmt = select(Alert)
     
     if severity:
-        query = query.filter(Alert.severity == severity)
+        stmt = stmt.where(Alert.severity == severity)
     
     if acknowledged is not None:
-        query = query.filter(Alert.acknowledged == (1 if acknowledged else 0))
+        stmt = stmt.where(Alert.acknowledged == (1 if acknowledged else 0))
 
     filter_fpso = current_user_data["fpso_name"] if current_user_data["fpso_name"] else fpso_name
     if filter_fpso:
-        query = query.filter(Alert.fpso_name == filter_fpso)
+        stmt = stmt.where(Alert.fpso_name == filter_fpso)
 
     if tag_number:
-        query = query.filter(Alert.tag_number == tag_number)
+        stmt = stmt.where(Alert.tag_number == tag_number)
 
     if alert_type:
-        query = query.filter(Alert.type == alert_type)
+        stmt = stmt.where(Alert.type == alert_type)
     
-    return query.order_by(Alert.created_at.desc()).offset(skip).limit(limit).all()
+    stmt = stmt.order_by(Alert.created_at.desc()).offset(skip).limit(limit)
+    return (await db.execute(stmt)).scalars().all()
 
 @router.post("", response_model=AlertSchema)
 def create_alert(alert: AlertCreate, db: Session = Depends(get_db), current_user_data = Depends(get_current_user_fpso)):
@@ -0,0 +1,39 @@
+"""
+Auth Router — Session cache management (logout, revocation, cache stats).
+
+Supabase owns the session itself (the frontend signs out through the
+Supabase client); these endpoints keep the API's principal cache in step
+so a logged-out or revoked token stops being served from memory. Revocation
+and cache stats are admin-only.
+"""
+
+from fastapi import APIRouter, Depends
+from fastapi.security import HTTPAuthorizationCredentials
+
+from ..dependencies import principal_cache, require_admin, security, session_denylist
+
+router = APIRouter(prefix="/api/auth", tags=["auth"])
+
+
+@router.post("/logout")
+def logout(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Evict the caller's token from the principal cache."""
+    evicted = principal_cache.invalidate(credentials.credentials)
+    return {"status": "logged_out", "evicted": evicted}
+
+
+@router.post("/revoke/{user_id}")
+def revoke_user_sessions(user_id: str, current_user=Depends(require_admin)):
+    """Reject every token the user holds now (e.g. after a Supabase ban or password reset).
+
+    Their cached principals are evicted and tokens issued before this call
+    fail verification until they expire; a new login is accepted.
+    """
+    session_denylist.revoke(user_id)
+    return {"status": "revoked", "user_id": user_id, "evicted": principal_cache.invalidate_user(user_id)}
+
+
+@router.get("/cache-stats")
+def get_cache_stats(current_user=Depends(require_admin)):
+    """Hit/miss counters and occupancy of the principal cache."""
+    return principal_cache.stats()
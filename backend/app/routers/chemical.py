@@ -1,15 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
 import os
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, desc, or_, and_, exists
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, desc, or_, and_, exists, select
 from typing import List, Optional
 from datetime import datetime, date, timedelta
 from .. import models, database
 from ..schemas import chemical as schemas
-from ..dependencies import get_current_user
+from ..dependencies import get_current_user, require_admin
 from ..services.sla_matrix import get_sla_config
-from ..services.pdf_parser import parse_pdf_bytes
+from ..services.report_cache import REPORTS_DIR, parse_pdf_bytes
+from ..services.parse_pool import ParserBusyError
+from ..services import business_calendar, report_ingestion, sla_scan
+from ..services.report_ingestion import store_validation
 from ..services.validation_engine import validate_report
+from ..services.revalidation import revalidate_history
+from ..services.sbm_validation import SBM_BATCH_LIMIT, validate_samples
+from ..responses import orm_list_response
 
 router = APIRouter(
     prefix="/api/chemical",
@@ -34,7 +41,7 @@ def list_meters(fpso_name: Optional[str] = None, db: Session = Depends(database.
     query = db.query(models.InstrumentTag).options(joinedload(models.InstrumentTag.sample_points))
     # Note: InstrumentTag fpso_name filtering could be complex if it depends on install,
     # but for now we just return all tags that act as metering points for M3
-    return query.all()
+    return orm_list_response(query.all(), MeterWithSamplePoints)
 
 @router.post("/sample-points", response_model=schemas.SamplePoint)
 def create_sample_point(sp: schemas.SamplePointCreate, db: Session = Depends(database.get_db), current_user = Depends(get_current_user)):
@@ -91,40 +98,21 @@ STEP_GROUPS = {
     "fc_update": ["Flow computer update"],
 }
 
-@router.get("/dashboard-stats")
-def get_dashboard_stats(fpso_name: Optional[str] = None, db: Session = Depends(database.get_db)):
-    """Returns grouped step counts with urgency classification for the 5 dashboard cards.
-    Card urgency (overdue/today/tomorrow) is driven by a specific trigger step's expected
-    date field, checked against ALL samples in the card group — not just samples at that step."""
-    today = date.today()
+# Which expected date field drives each card's urgency color.
+# All samples in the group are checked against this field.
+CARD_TRIGGER_FIELD = {
+    "sampling": "planned_date",              # Sample trigger
+    "disembark": "disembark_expected_date",   # Disembark logistics trigger
+    "logistics": "lab_expected_date",          # Deliver at vendor trigger
+    "report": "report_expected_date",          # Report issue trigger
+    "fc_update": "fc_expected_date",           # Flow computer update trigger
+}
+
+
+def _build_dashboard_stats(all_samples, today: date) -> dict:
+    """Group samples into the 5 dashboard cards with per-step and card-level urgency."""
     tomorrow = today + timedelta(days=1)
-    
-    # Which expected date field drives each card's urgency color.
-    # All samples in the group are checked against this field.
-    CARD_TRIGGER_FIELD = {
-        "sampling": "planned_date",              # Sample trigger
-        "disembark": "disembark_expected_date",   # Disembark logistics trigger
-        "logistics": "lab_expected_date",          # Deliver at vendor trigger
-        "report": "report_expected_date",          # Report issue trigger
-        "fc_update": "fc_expected_date",           # Flow computer update trigger
-    }
-    
-    query = db.query(models.Sample).outerjoin(models.SamplePoint)
-    if fpso_name:
-        query = query.filter(models.SamplePoint.fpso_name == fpso_name)
-    
-    # Exclude completed samples from active dashboard
-    active_samples = query.filter(
-        models.Sample.status != models.SampleStatus.FLOW_COMPUTER_UPDATE.value
-    ).all()
-    
-    # Also get completed for FC Update card
-    completed_samples = query.filter(
-        models.Sample.status == models.SampleStatus.FLOW_COMPUTER_UPDATE.value
-    ).all()
-    
-    all_samples = active_samples + completed_samples
-    
+
     result = {}
     for group_key, statuses in STEP_GROUPS.items():
         group_samples = [s for s in all_samples if s.status in statuses]
@@ -175,6 +163,20 @@ def get_dashboard_stats(fpso_name: Optional[str] = None, db: Session = Depends(d
     
     return result
 
+
+@router.get("/dashboard-stats")
+async def get_dashboard_stats(fpso_name: Optional[str] = None, db: AsyncSession = Depends(database.get_async_db)):
+    """Returns grouped step counts with urgency classification for the 5 dashboard cards.
+    Card urgency (overdue/today/tomorrow) is driven by a specific trigger step's expected
+    date field, checked against ALL samples in the card group — not just samples at that step."""
+    tracked_statuses = [status_name for statuses in STEP_GROUPS.values() for status_name in statuses]
+    stmt = select(models.Sample).outerjoin(models.SamplePoint).where(models.Sample.status.in_(tracked_statuses))
+    if fpso_name:
+        stmt = stmt.where(models.SamplePoint.fpso_name == fpso_name)
+
+    all_samples = (await db.execute(stmt)).scalars().all()
+    return _build_dashboard_stats(all_samples, date.today())
+
 # --- Samples & Lifecycle (M3 Core) ---
 
 @router.post("/samples", response_model=schemas.Sample)
@@ -214,32 +216,31 @@ def create_sample(sample: schemas.SampleCreate, db: Session = Depends(database.g
     
     return db_sample
 
-@router.get("/samples", response_model=List[schemas.Sample])
-def list_samples(
+def _list_samples_stmt(
     fpso_name: Optional[str] = None,
     status: Optional[str] = None,
     sample_type: Optional[str] = None,
     equipment_id: Optional[int] = None,
-    db: Session = Depends(database.get_db)
 ):
-    query = db.query(models.Sample).outerjoin(models.SamplePoint).options(
+    stmt = select(models.Sample).outerjoin(models.SamplePoint).options(
         joinedload(models.Sample.sample_point),
         joinedload(models.Sample.meter),
-        joinedload(models.Sample.well)
+        joinedload(models.Sample.well),
+        selectinload(models.Sample.history),
     )
     
     if fpso_name:
-        query = query.filter(models.SamplePoint.fpso_name == fpso_name)
+        stmt = stmt.where(models.SamplePoint.fpso_name == fpso_name)
     if status:
-        query = query.filter(models.Sample.status == status)
+        stmt = stmt.where(models.Sample.status == status)
     if sample_type:
-        query = query.filter(models.Sample.type == sample_type)
+        stmt = stmt.where(models.Sample.type == sample_type)
         
     if equipment_id:
         # --- Skill (backend-dev-guidelines): Unified Historical Traceability ---
         # M1 -> M3 Integration: Find samples linked to the equipment via its 
         # installation history. Handles both direct (meter_id) and indirect (SP) links.
-        query = query.join(
+        stmt = stmt.join(
             models.EquipmentTagInstallation,
             and_(
                 models.EquipmentTagInstallation.equipment_id == equipment_id,
@@ -250,7 +251,7 @@ def list_samples(
                 )
             )
         )
-        query = query.filter(
+        stmt = stmt.where(
             or_(
                 # Path A: Direct meter_id match
                 models.Sample.meter_id == models.EquipmentTagInstallation.tag_id,
@@ -266,8 +267,19 @@ def list_samples(
                 )
             )
         )
-            
-    return query.all()
+    return stmt
+
+
+@router.get("/samples", response_model=List[schemas.Sample])
+async def list_samples(
+    fpso_name: Optional[str] = None,
+    status: Optional[str] = None,
+    sample_type: Optional[str] = None,
+    equipment_id: Optional[int] = None,
+    db: AsyncSession = Depends(database.get_async_read_db)
+):
+    stmt = _list_samples_stmt(fpso_name, status, sample_type, equipment_id)
+    return orm_list_response((await db.execute(stmt)).unique().scalars().all(), schemas.Sample)
 
 @router.get("/samples/{sample_id}", response_model=schemas.Sample)
 def get_sample(sample_id: int, db: Session = Depends(database.get_db)):
@@ -277,70 +289,14 @@ def get_sample(sample_id: int, db: Session = Depends(database.get_db)):
     return sample
 
 @router.post("/check-slas")
-def check_sampling_slas(db: Session = Depends(database.get_db)):
-    """Scans active samples and creates alerts for SLA violations dynamically using the 22-combination SLA matrix."""
-    from datetime import date, timedelta
-    from ..models import Alert, AlertSeverity, SampleStatus
-    from ..services.sla_matrix import get_sla_config
-    
-    today = date.today()
-    alerts_created = 0
-    
-    # 1. Fetch samples in statuses that have SLAs
-    active_samples = db.query(models.Sample).filter(
-        models.Sample.status.in_([SampleStatus.SAMPLE.value, SampleStatus.REPORT_ISSUE.value])
-    ).all()
-    
-    for s in active_samples:
-        classification = "Fiscal"
-        if s.meter and hasattr(s.meter, 'classification') and s.meter.classification:
-            classification = s.meter.classification
-            
-        cfg = get_sla_config(db, classification, s.type, s.local)
-        if not cfg:
-            continue
-            
-        if s.status == SampleStatus.SAMPLE.value and s.sampling_date:
-            report_days = cfg.get("report_days")
-            if report_days is not None:
-                s_date = s.sampling_date.date() if hasattr(s.sampling_date, 'date') else s.sampling_date
-                if s_date <= today - timedelta(days=report_days):
-                    existing = db.query(Alert).filter(Alert.tag_number == s.sample_id, Alert.type == "Lab Report Overdue").first()
-                    if not existing:
-                        alert = Alert(
-                            tag_number=s.sample_id,
-                            fpso_name=s.sample_point.fpso_name if s.sample_point else "Unknown",
-                            severity=AlertSeverity.HIGH.value,
-                            type="Lab Report Overdue",
-                            title="Lab Report Overdue",
-                            message=f"Sample {s.sample_id} was taken on {s_date} but lab report is missing (>{report_days} days).",
-                            acknowledged=0,
-                            created_at=datetime.utcnow()
-                        )
-                        db.add(alert)
-                        alerts_created += 1
-
-        elif s.status == SampleStatus.REPORT_ISSUE.value and s.report_issue_date:
-            fc_days = cfg.get("fc_days")
-            if fc_days is not None:
-                r_date = s.report_issue_date.date() if hasattr(s.report_issue_date, 'date') else s.report_issue_date
-                if r_date <= today - timedelta(days=fc_days):
-                    existing = db.query(Alert).filter(Alert.tag_number == s.sample_id, Alert.type == "Validation Pending").first()
-                    if not existing:
-                        alert = Alert(
-                            tag_number=s.sample_id,
-                            fpso_name=s.sample_point.fpso_name if s.sample_point else "Unknown",
-                            severity=AlertSeverity.MEDIUM.value,
-                            type="Validation Pending",
-                            title="Validation Pending",
-                            message=f"Lab report for {s.sample_id} was issued on {r_date} but remains unvalidated (>{fc_days} days).",
-                            acknowledged=0,
-                            created_at=datetime.utcnow()
-                        )
-                        db.add(alert)
-                        alerts_created += 1
-                        
-    db.commit()
+def check_sampling_slas(full: bool = True, db: Session = Depends(database.get_db)):
+    """Creates alerts for samples whose SLA deadline came due (22-combination SLA matrix).
+
+    A manual check recomputes every active sample's deadline first (also catching
+    samples edited outside the API); `full=false` runs the incremental scan the
+    scheduler uses.
+    """
+    alerts_created = sla_scan.check_sampling_slas(db, full=full)
     return {"message": "SLA check completed", "alerts_created": alerts_created}
 
 
@@ -360,6 +316,7 @@ def override_due_date(
         sample.due_date = date.fromisoformat(new_date)
     else:
         sample.due_date = None
+    sla_scan.refresh_sla_check(db, sample)
     db.commit()
     db.refresh(sample)
     return sample
@@ -423,6 +380,7 @@ def update_sample_status(sample_id: int, update: schemas.SampleStatusUpdate, db:
         sample.local = update.local
 
     meter_class = sample.meter.classification if sample.meter else "Fiscal"
+    fpso_name = sample.sample_point.fpso_name if sample.sample_point else None
     sla_config = get_sla_config(db, meter_class, sample.type, sample.local)
     
     def schedule_emergency_re_sampling(s: models.Sample, db: Session, cfg: Optional[dict]):
@@ -434,16 +392,9 @@ def update_sample_status(sample_id: int, update: schemas.SampleStatusUpdate, db:
         elif cfg and cfg.get("reproval_reschedule_days"):
             reschedule_days = cfg["reproval_reschedule_days"]
         
-        # Schedule emergency sample N business days after emission/reproval
+        # Schedule emergency sample N business days (FPSO holidays skipped) after emission/reproval
         base_date = s.report_issue_date or date.today()
-        
-        # Calculate N business days
-        days_to_add = reschedule_days
-        emergency_date = base_date
-        while days_to_add > 0:
-            emergency_date += timedelta(days=1)
-            if emergency_date.weekday() < 5:  # 0-4 are Monday-Friday
-                days_to_add -= 1
+        emergency_date = business_calendar.add_business_days(db, base_date, reschedule_days, fpso_name)
 
         # Per spec: "a data de coleta prevista mantém se menor"
         # Use the earlier of: emergency date OR next periodic planned date
@@ -534,13 +485,9 @@ def update_sample_status(sample_id: int, update: schemas.SampleStatusUpdate, db:
         # Calculate FC expected date based on report emission
         if sla_config and sla_config["fc_days"]:
             if sla_config["fc_is_business_days"]:
-                days_to_add = sla_config["fc_days"]
-                curr_date = sample.report_issue_date
-                while days_to_add > 0:
-                    curr_date += timedelta(days=1)
-                    if curr_date.weekday() < 5:
-                        days_to_add -= 1
-                sample.fc_expected_date = curr_date
+                sample.fc_expected_date = business_calendar.add_business_days(
+                    db, sample.report_issue_date, sla_config["fc_days"], fpso_name
+                )
             else:
                 sample.fc_expected_date = sample.report_issue_date + timedelta(days=sla_config["fc_days"])
     
@@ -591,6 +538,9 @@ def update_sample_status(sample_id: int, update: schemas.SampleStatusUpdate, db:
         sample.due_date = getattr(sample, phase_field, None)
     else:
         sample.due_date = None
+
+    # Next day the incremental SLA scan has to look at this sample
+    sla_scan.refresh_sla_check(db, sample)
     
     db.commit()
     db.refresh(sample)
@@ -601,51 +551,42 @@ def update_sample_status(sample_id: int, update: schemas.SampleStatusUpdate, db:
 @router.get("/samples/{sample_id}/validate")
 def perform_sbm_validation(sample_id: int, db: Session = Depends(database.get_db)):
     """Implements SBM algorithm: Avg + Std Dev of previous samples."""
-    sample = db.query(models.Sample).filter(models.Sample.id == sample_id).first()
+    sample = db.query(models.Sample).options(selectinload(models.Sample.results)).filter(
+        models.Sample.id == sample_id
+    ).first()
     if not sample or not sample.results:
         raise HTTPException(status_code=400, detail="No results found for validation")
-    
-    results_summary = []
-    
-    for res in sample.results:
-        # Get historical data for this parameter and sample point
-        history = db.query(models.SampleResult.value).join(models.Sample).filter(
-            models.Sample.sample_point_id == sample.sample_point_id,
-            models.SampleResult.parameter == res.parameter,
-            models.Sample.status == models.SampleStatus.FLOW_COMPUTER_UPDATE,
-            models.Sample.id != sample.id
-        ).order_by(models.Sample.sampling_date.desc()).limit(10).all()
-        
-        history_values = [h[0] for h in history]
-        
-        if len(history_values) < 3:
-            results_summary.append({
-                "parameter": res.parameter,
-                "status": "Inconclusive (Need 3+ samples)",
-                "avg": sum(history_values)/len(history_values) if history_values else 0,
-                "std": 0
-            })
-            continue
-            
-        avg = sum(history_values) / len(history_values)
-        std = (sum((v - avg)**2 for v in history_values) / len(history_values))**0.5
-        
-        # Check if current value is within 2 STDs
-        is_valid = (avg - 2*std) <= res.value <= (avg + 2*std)
-        
-        results_summary.append({
-            "parameter": res.parameter,
-            "status": "Pass" if is_valid else "Fail",
-            "current": res.value,
-            "avg": avg,
-            "std": std,
-            "range": [avg - 2*std, avg + 2*std]
-        })
-        
+    return validate_samples(db, [sample])[sample.id]
+
+
+@router.post("/samples/validate")
+def perform_sbm_validation_batch(payload: schemas.SbmValidationRequest, db: Session = Depends(database.get_db)):
+    """SBM validation of several samples (explicit IDs and/or a whole campaign) in one pass."""
+    filters = []
+    if payload.sample_ids:
+        filters.append(models.Sample.id.in_(payload.sample_ids))
+    if payload.campaign_id is not None:
+        filters.append(models.Sample.campaign_id == payload.campaign_id)
+    if not filters:
+        raise HTTPException(status_code=400, detail="Provide sample_ids or campaign_id")
+
+    query = db.query(models.Sample).filter(or_(*filters))
+    # Count first: an oversized campaign is refused before its samples and results are loaded
+    if query.count() > SBM_BATCH_LIMIT:
+        raise HTTPException(status_code=400, detail=f"At most {SBM_BATCH_LIMIT} samples per request")
+    samples = query.options(selectinload(models.Sample.results)).order_by(models.Sample.id).all()
+
+    with_results = [s for s in samples if s.results]
+    summaries = validate_samples(db, with_results)
+    found = {s.id for s in samples}
     return {
-        "sample_id": sample.sample_id,
-        "overall_status": "Approved" if all(r["status"] != "Fail" for r in results_summary) else "Reproved",
-        "parameters": results_summary
+        "samples": [summaries[s.id] for s in with_results],
+        "skipped": (
+            [{"id": s.id, "sample_id": s.sample_id, "detail": "No results found for validation"}
+             for s in samples if not s.results]
+            + [{"id": sid, "sample_id": None, "detail": "Sample not found"}
+               for sid in dict.fromkeys(payload.sample_ids) if sid not in found]
+        ),
     }
 
 # --- Results ---
@@ -661,58 +602,51 @@ def add_sample_result(sample_id: int, result: schemas.SampleResultBase, db: Sess
 
 # --- Report Validation (PDF Extraction + 2σ Analysis) ---
 
+def _write_file(path: str, data: bytes) -> None:
+    with open(path, "wb") as f:
+        f.write(data)
+
+
 @router.post("/samples/{sample_id}/validate-report", response_model=schemas.ValidationResponse)
-async def validate_report_endpoint(
+def validate_report_endpoint(
     sample_id: int,
     file: UploadFile = File(...),
     db: Session = Depends(database.get_db),
     current_user = Depends(get_current_user),
 ):
-    """Upload a lab report PDF, extract values, store them, and run validation."""
+    """Upload a lab report PDF, extract values, store them, and run validation.
+
+    Plain def: FastAPI runs it in the threadpool, so the Session work, the
+    wait on the parse pool and the file write stay off the event loop.
+    """
 
     sample = db.query(models.Sample).filter(models.Sample.id == sample_id).first()
     if not sample:
         raise HTTPException(status_code=404, detail="Sample not found")
 
-    # Read and parse PDF
-    pdf_bytes = await file.read()
+    # Read and parse PDF (CPU-bound: runs in the parse pool)
+    pdf_bytes = file.file.read()
     try:
         extracted = parse_pdf_bytes(pdf_bytes, filename=file.filename or "")
+    except ParserBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
     # Run validation against historical data
     validation = validate_report(extracted, sample, db)
 
-    # Store extracted values as SampleResult rows
-    # First, remove any previous results from this sample (re-validation)
-    db.query(models.SampleResult).filter(models.SampleResult.sample_id == sample_id).delete()
-
-    for check in validation.checks:
-        db_result = models.SampleResult(
-            sample_id=sample_id,
-            parameter=check.parameter,
-            value=check.value,
-            unit=check.unit,
-            validation_status=check.status,
-            validation_detail=check.detail,
-            history_mean=check.history_mean,
-            history_std=check.history_std,
-            source_pdf=file.filename,
-        )
-        db.add(db_result)
-
-    # Update the sample's validation_status based on overall result
-    sample.validation_status = validation.overall_status
+    # Store extracted values as SampleResult rows (replacing any previous
+    # results of this sample) and the sample's overall validation_status
+    store_validation(db, sample, validation, file.filename)
     # Save the PDF to disk so it can be viewed later
-    uploads_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "uploads", "reports")
+    uploads_dir = REPORTS_DIR
     os.makedirs(uploads_dir, exist_ok=True)
     # Use a unique filename to avoid collisions
     from datetime import datetime as _dt
     safe_name = f"{sample_id}_{int(_dt.now().timestamp())}_{file.filename}"
     pdf_path = os.path.join(uploads_dir, safe_name)
-    with open(pdf_path, "wb") as f:
-        f.write(pdf_bytes)
+    _write_file(pdf_path, pdf_bytes)
     sample.lab_report_url = f"/uploads/reports/{safe_name}"
 
     db.commit()
@@ -743,6 +677,62 @@ async def validate_report_endpoint(
     )
 
 
+@router.post("/reports/validate-batch", response_model=schemas.BatchReportResponse)
+def validate_report_batch(
+    files: List[UploadFile] = File(...),
+    dry_run: bool = False,
+    db: Session = Depends(database.get_db),
+    current_user = Depends(get_current_user),
+):
+    """Upload many lab report PDFs (or ZIPs of them) at once.
+
+    Each report is matched to its sample by boletim (Laudo Nº) or by tag
+    point + sampling date, validated and stored like a single upload.
+    Returns one row per file; dry_run=true validates without storing.
+    """
+    try:
+        uploads = report_ingestion.read_uploads([(f.filename or "report.pdf", f.file) for f in files])
+        outcomes = report_ingestion.ingest(db, uploads, dry_run=dry_run)
+    except report_ingestion.BatchTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    validated = [o for o in outcomes if o.status == "validated"]
+    return schemas.BatchReportResponse(
+        dry_run=dry_run,
+        total=len(outcomes),
+        validated=len(validated),
+        approved=sum(o.overall_status == "Approved" for o in validated),
+        reproved=sum(o.overall_status == "Reproved" for o in validated),
+        files=[schemas.BatchReportFileResult(**vars(o)) for o in outcomes],
+    )
+
+
+@router.post("/revalidate", response_model=schemas.RevalidationReport)
+def revalidate_results(
+    dry_run: bool = True,
+    sample_point_id: Optional[int] = None,
+    fpso: Optional[str] = None,
+    max_diffs: int = Query(500, ge=0, le=10000),
+    db: Session = Depends(database.get_db),
+    current_user = Depends(require_admin),
+):
+    """Re-run the 2σ checks of stored results with the current M11 settings (admin only).
+
+    Defaults to a dry run that only reports what would change; pass
+    dry_run=false to write the new verdicts back.
+    """
+    report = revalidate_history(db, dry_run=dry_run, sample_point_id=sample_point_id, fpso=fpso)
+    return schemas.RevalidationReport(
+        dry_run=report.dry_run,
+        scanned=report.scanned,
+        groups=report.groups,
+        changed=len(report.results),
+        status_changes=report.status_changes,
+        results=[schemas.RevalidationResultDiff(**vars(d)) for d in report.results[:max_diffs]],
+        samples=[schemas.RevalidationSampleDiff(**vars(d)) for d in report.samples[:max_diffs]],
+    )
+
+
 @router.get("/samples/{sample_id}/lab-results", response_model=List[schemas.SampleResult])
 def get_lab_results(
     sample_id: int,
@@ -763,7 +753,7 @@ def get_parameter_history(
     point_id: int,
     parameter: str = Query(..., description="Parameter name: density, rs, fe, o2, relative_density_real"),
     limit: int = Query(10, ge=1, le=50),
-    db: Session = Depends(database.get_db),
+    db: Session = Depends(database.get_read_db),
 ):
     """Get last N values of a parameter for a sample point (for history chart)."""
     results = (
@@ -8,7 +8,9 @@ Skills Applied:
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from datetime import datetime
 from typing import List, Optional
 
@@ -16,6 +18,7 @@ from .. import models, database
 from ..schemas import schemas
 from ..dependencies import get_current_user, get_current_user_fpso
 from ..services.equipment_service import calculate_health
+from ..responses import orm_list_response
 
 router = APIRouter(
     prefix="/api/equipment",
@@ -45,28 +48,32 @@ def create_equipment(
     return db_equipment
 
 @router.get("/", response_model=List[schemas.Equipment])
-def read_equipments(
+async def read_equipments(
     skip: int = 0,
     limit: int = 1000,
     serial_number: Optional[str] = None,
     equipment_type: Optional[str] = None,
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_async_read_db),
     auth_context: dict = Depends(get_current_user_fpso),
 ):
-    query = db.query(models.Equipment)
+    # Relationships serialized by schemas.Equipment are loaded up front (no lazy IO under asyncio)
+    stmt = select(models.Equipment).options(
+        selectinload(models.Equipment.certificates),
+        selectinload(models.Equipment.installations).joinedload(models.EquipmentTagInstallation.tag),
+    )
     
     # Security: FPSO Scoping
     if auth_context.get("fpso_name"):
-        query = query.filter(models.Equipment.fpso_name == auth_context["fpso_name"])
+        stmt = stmt.where(models.Equipment.fpso_name == auth_context["fpso_name"])
         
     if serial_number:
         # Sanitize wildcard chars to prevent DoS via ILIKE abuse
         clean_sn = serial_number.replace("%", "").replace("_", "")
-        query = query.filter(models.Equipment.serial_number.ilike(f"%{clean_sn}%"))
+        stmt = stmt.where(models.Equipment.serial_number.ilike(f"%{clean_sn}%"))
     if equipment_type:
-        query = query.filter(models.Equipment.equipment_type == equipment_type)
+        stmt = stmt.where(models.Equipment.equipment_type == equipment_type)
 
-    equipments = query.offset(skip).limit(limit).all()
+    equipments = (await db.execute(stmt.offset(skip).limit(limit))).scalars().all()
     for eq in equipments:
         eq.health_status = calculate_health(eq)
     return equipments
@@ -96,7 +103,16 @@ def read_tags(
 ):
     """Note: Tag filtering by FPSO requires join with installation if tags themselves don't store FPSO, 
     but for now we enforce any tag access to be scoped if possible, or just require auth."""
-    query = db.query(models.InstrumentTag)
+    # Installations are part of the response model; load them in bulk, not per tag
+    query = db.query(models.InstrumentTag).options(
+        selectinload(models.InstrumentTag.installations)
+        .joinedload(models.EquipmentTagInstallation.equipment)
+        .selectinload(models.Equipment.certificates),
+        selectinload(models.InstrumentTag.installations)
+        .joinedload(models.EquipmentTagInstallation.equipment)
+        .selectinload(models.Equipment.installations)
+        .joinedload(models.EquipmentTagInstallation.tag),
+    )
     
     # Ideally tag should have fpso_name. Assuming it does, or skipping for now if it doesn't.
     # We will enforce RBAC on available tags which does have FPSO filtering.
@@ -104,7 +120,7 @@ def read_tags(
     if tag_number:
         clean_tag = tag_number.replace("%", "").replace("_", "")
         query = query.filter(models.InstrumentTag.tag_number.ilike(f"%{clean_tag}%"))
-    return query.offset(skip).limit(limit).all()
+    return orm_list_response(query.offset(skip).limit(limit).all(), schemas.InstrumentTag)
 
 @router.put("/tags/{tag_id}", response_model=schemas.InstrumentTag)
 def update_tag(
@@ -17,7 +17,7 @@ router = APIRouter(
 )
 
 @router.post("/prepare")
-async def prepare_export(request: ExportRequest, background_tasks: BackgroundTasks, db: Session = Depends(database.get_db), current_user_data = Depends(get_current_user_fpso)):
+async def prepare_export(request: ExportRequest, background_tasks: BackgroundTasks, db: Session = Depends(database.get_read_db), current_user_data = Depends(get_current_user_fpso)):
     if current_user_data["fpso_name"]:
         request.fpso_name = current_user_data["fpso_name"]
     job_id = f"job_{datetime.utcnow().timestamp()}"
@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from ..dependencies import get_current_user, require_admin
+from ..models import JobRun
+from ..schemas.scheduler import JobRun as JobRunSchema
+from ..schemas.scheduler import JobStatus
+from ..services import scheduler
+
+router = APIRouter(prefix="/api/scheduler", tags=["scheduler"])
+
+
+def _job_or_404(name: str):
+    if name not in scheduler.JOBS:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{name}'")
+    return scheduler.JOBS[name]
+
+
+@router.get("/jobs", response_model=list[JobStatus])
+def list_jobs(db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    """Scheduled jobs with their lease, next run and last outcome."""
+    return scheduler.job_status(db)
+
+
+@router.get("/jobs/{name}/runs", response_model=list[JobRunSchema])
+def list_job_runs(
+    name: str,
+    limit: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """Run history of one job, newest first."""
+    _job_or_404(name)
+    return (
+        db.query(JobRun)
+        .filter(JobRun.job_name == name)
+        .order_by(JobRun.id.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+@router.post("/jobs/{name}/run", response_model=JobRunSchema)
+def run_job_now(name: str, db: Session = Depends(get_db), current_user=Depends(require_admin)):
+    """Run a job now, outside its cadence (admin only; 409 while another worker is running it)."""
+    _job_or_404(name)
+    run = scheduler.run_job(db, name, trigger="manual", force=True)
+    if run is None:
+        raise HTTPException(status_code=409, detail=f"Job '{name}' is already running")
+    return run
@@ -199,6 +199,59 @@ class ValidationResponse(BaseModel):
     passed_count: int = 0
     failed_count: int = 0
 
+class SbmValidationRequest(BaseModel):
+    sample_ids: List[int] = []
+    campaign_id: Optional[int] = None
+
+class BatchReportFileResult(BaseModel):
+    filename: str
+    status: str  # validated / unmatched / ambiguous / duplicate / error
+    detail: Optional[str] = None
+    report_type: Optional[str] = None
+    boletim: Optional[str] = None
+    tag_point: Optional[str] = None
+    sampling_date: Optional[str] = None
+    sample_pk: Optional[int] = None
+    sample_id: Optional[str] = None
+    overall_status: Optional[str] = None
+    passed_count: int = 0
+    failed_count: int = 0
+
+class BatchReportResponse(BaseModel):
+    dry_run: bool
+    total: int
+    validated: int
+    approved: int
+    reproved: int
+    files: List[BatchReportFileResult] = []
+
+class RevalidationResultDiff(BaseModel):
+    result_id: int
+    sample_id: str
+    sample_point_id: int
+    parameter: str
+    value: float
+    old_status: Optional[str] = None
+    new_status: str
+    old_mean: Optional[float] = None
+    new_mean: float
+    old_std: Optional[float] = None
+    new_std: float
+
+class RevalidationSampleDiff(BaseModel):
+    sample_id: str
+    old_status: Optional[str] = None
+    new_status: str
+
+class RevalidationReport(BaseModel):
+    dry_run: bool
+    scanned: int
+    groups: int
+    changed: int
+    status_changes: dict = {}
+    results: List[RevalidationResultDiff] = []
+    samples: List[RevalidationSampleDiff] = []
+
 class ParameterHistoryItem(BaseModel):
     value: float
     date: str
@@ -0,0 +1,40 @@
+import json
+from datetime import datetime
+
+from pydantic import BaseModel, field_validator
+
+
+class JobRun(BaseModel):
+    id: int
+    job_name: str
+    holder: str | None = None
+    trigger: str
+    started_at: datetime
+    finished_at: datetime | None = None
+    duration_ms: float | None = None
+    status: str
+    result: dict | None = None
+    error: str | None = None
+
+    @field_validator("result", mode="before")
+    @classmethod
+    def parse_result(cls, value):
+        # Stored as a JSON string in job_runs.result
+        return json.loads(value) if isinstance(value, str) else value
+
+    class Config:
+        from_attributes = True
+
+
+class JobStatus(BaseModel):
+    name: str
+    description: str
+    interval_seconds: float
+    enabled: bool
+    next_run_at: datetime | None = None
+    holder: str | None = None
+    lease_expires_at: datetime | None = None
+    last_run: JobRun | None = None
+    last_success_at: datetime | None = None
+    last_error: str | None = None
+    last_error_at: datetime | None = None
@@ -1,11 +1,10 @@
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 from . import models
-from .database import SessionLocal, engine
+from .database import SessionLocal
 
 def seed_data():
-    # Create tables if they don't exist
-    models.Base.metadata.create_all(bind=engine)
+    # Tables must already exist (python -m app.manage migrate)
     db = SessionLocal()
     try:
         # Check if already seeded
@@ -796,4 +795,5 @@ def seed_data():
         db.close()
 
 if __name__ == "__main__":
-    seed_data()
+    from .manage import main
+    main(["init"])
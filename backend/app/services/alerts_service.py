@@ -1,8 +1,11 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
-from ..models import Alert, AlertConfiguration, AlertRecipient
+from ..models import Alert, AlertConfiguration, AlertRecipient, CalibrationTask, Sample, SampleStatus
 from ..schemas.phase3 import AlertCreate, AlertAcknowledge, AlertConfigurationCreate
+from .calibration_service import CALIBRATION_OVERDUE, OPEN_TASK_STATUSES
+from .sla_scan import LAB_REPORT_OVERDUE, VALIDATION_PENDING
 
 class AlertsService:
     @staticmethod
@@ -51,3 +54,63 @@ class AlertsService:
         db.commit()
         db.refresh(db_config)
         return db_config
+
+    @staticmethod
+    def recheck_alerts(db: Session, min_age: timedelta = timedelta(0), now: datetime = None):
+        """Re-check acknowledged alerts that asked for it (run_recheck = 1).
+
+        Only alerts acknowledged at least `min_age` ago are looked at. If the
+        condition still holds (sample still waiting in the same step, calibration
+        still open past due) the alert is reopened; otherwise re-checking stops.
+        """
+        now = now or datetime.utcnow()
+        alerts = db.execute(
+            select(Alert.id, Alert.type, Alert.tag_number).where(
+                Alert.acknowledged == 1,
+                Alert.run_recheck == 1,
+                Alert.type.in_([LAB_REPORT_OVERDUE, VALIDATION_PENDING, CALIBRATION_OVERDUE]),
+                Alert.acknowledged_at <= now - min_age,
+            )
+        ).all()
+        if not alerts:
+            return {"checked": 0, "reopened": 0, "cleared": 0}
+
+        tags = {alert.tag_number for alert in alerts}
+        waiting = {
+            LAB_REPORT_OVERDUE: SampleStatus.SAMPLE.value,
+            VALIDATION_PENDING: SampleStatus.REPORT_ISSUE.value,
+        }
+        active = {
+            (kind, sample_id)
+            for sample_id, status in db.execute(
+                select(Sample.sample_id, Sample.status).where(
+                    Sample.sample_id.in_(tags), Sample.status.in_(list(waiting.values()))
+                )
+            )
+            for kind, step in waiting.items() if status == step
+        }
+        active.update(
+            (CALIBRATION_OVERDUE, tag)
+            for tag, in db.execute(
+                select(CalibrationTask.tag).distinct().where(
+                    CalibrationTask.tag.in_(tags),
+                    CalibrationTask.status.in_(OPEN_TASK_STATUSES),
+                    CalibrationTask.due_date < now.date(),
+                )
+            )
+        )
+
+        reopened = [alert.id for alert in alerts if (alert.type, alert.tag_number) in active]
+        cleared = [alert.id for alert in alerts if (alert.type, alert.tag_number) not in active]
+        if reopened:
+            db.execute(
+                update(Alert).where(Alert.id.in_(reopened)).values(acknowledged=0)
+                .execution_options(synchronize_session=False)
+            )
+        if cleared:
+            db.execute(
+                update(Alert).where(Alert.id.in_(cleared)).values(run_recheck=0)
+                .execution_options(synchronize_session=False)
+            )
+        db.commit()
+        return {"checked": len(alerts), "reopened": len(reopened), "cleared": len(cleared)}
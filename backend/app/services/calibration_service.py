@@ -1,12 +1,79 @@
 from datetime import date, datetime
 import json
+from sqlalchemy import func, select, update
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from .. import models
 from ..schemas import calibration as schemas
 from .integrations import IntegrationService
 
+CALIBRATION_OVERDUE = "Calibration Overdue"
+# Tasks still waiting to be executed
+OPEN_TASK_STATUSES = (
+    models.CalibrationTaskStatus.PENDING.value,
+    models.CalibrationTaskStatus.SCHEDULED.value,
+    models.CalibrationTaskStatus.OVERDUE.value,
+)
+
 class CalibrationService:
+    @staticmethod
+    def sweep_overdue_tasks(db: Session, today: date = None):
+        """Due-date sweep: Pending tasks past due_date become Overdue, and a tag with
+        an open task past due gets a "Calibration Overdue" alert unless it already
+        got one after that task fell due (so the next cycle's task alerts again)."""
+        today = today or date.today()
+        marked = db.execute(
+            update(models.CalibrationTask)
+            .where(
+                models.CalibrationTask.status == models.CalibrationTaskStatus.PENDING.value,
+                models.CalibrationTask.due_date < today,
+            )
+            .values(status=models.CalibrationTaskStatus.OVERDUE.value)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+        last_alert = dict(db.execute(
+            select(models.Alert.tag_number, func.max(models.Alert.created_at))
+            .where(models.Alert.type == CALIBRATION_OVERDUE)
+            .group_by(models.Alert.tag_number)
+        ).all())
+        tasks = db.execute(
+            select(
+                models.CalibrationTask.id,
+                models.CalibrationTask.tag,
+                models.CalibrationTask.equipment_id,
+                models.CalibrationTask.due_date,
+                func.coalesce(models.CalibrationCampaign.fpso_name, models.Equipment.fpso_name),
+            )
+            .outerjoin(models.CalibrationCampaign, models.CalibrationTask.campaign_id == models.CalibrationCampaign.id)
+            .outerjoin(models.Equipment, models.CalibrationTask.equipment_id == models.Equipment.id)
+            .where(models.CalibrationTask.status.in_(OPEN_TASK_STATUSES), models.CalibrationTask.due_date < today)
+            .order_by(models.CalibrationTask.due_date)
+        ).all()
+
+        now = datetime.utcnow()
+        alerts = []
+        for task_id, tag, equipment_id, due_date, fpso_name in tasks:
+            raised = last_alert.get(tag)
+            if raised is not None and raised.date() > due_date:
+                continue
+            last_alert[tag] = now
+            alerts.append({
+                "tag_number": tag,
+                "equipment_id": equipment_id,
+                "fpso_name": fpso_name or "Unknown",
+                "severity": models.AlertSeverity.HIGH.value,
+                "type": CALIBRATION_OVERDUE,
+                "title": CALIBRATION_OVERDUE,
+                "message": f"Calibration task {task_id} for {tag} was due on {due_date} and has not been executed.",
+                "acknowledged": 0,
+                "created_at": now,
+            })
+        if alerts:
+            db.execute(models.Alert.__table__.insert(), alerts)
+        db.commit()
+        return {"tasks_marked_overdue": marked, "alerts_created": len(alerts)}
+
     @staticmethod
     def plan_calibration(db: Session, task_id: int, plan_data: schemas.CalibrationPlanData):
         task = db.query(models.CalibrationTask).filter(models.CalibrationTask.id == task_id).first()
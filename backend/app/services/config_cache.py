@@ -0,0 +1,61 @@
+"""
+Config Cache — Versioned in-process snapshot of M11 ConfigParameter rows.
+
+The validation engine reads a handful of keys (HISTORY_SIZE, SIGMA_MULTIPLIER,
+VALIDATION_LIMIT_*) several times per report. All parameters are loaded in
+one query per database and served from memory until:
+  - a ConfigParameter row is inserted/updated/deleted through the ORM
+    (session commit hook bumps the version, see snapshot_cache), or
+  - CONFIG_CACHE_TTL_SECONDS elapses (covers writes made by other workers
+    or raw SQL).
+
+Lookup precedence for (key, fpso):
+  1. row for that FPSO ("FPSO Sepetiba" and "SEPETIBA" are the same FPSO)
+  2. row with fpso = "GLOBAL" (or empty)
+Another FPSO's override never applies.
+"""
+
+import os
+import time
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services.snapshot_cache import SnapshotCache
+
+CONFIG_CACHE_TTL_SECONDS = float(os.getenv("CONFIG_CACHE_TTL_SECONDS", "60"))
+GLOBAL_SCOPE = "GLOBAL"
+
+
+def normalize_fpso(fpso: Optional[str]) -> str:
+    """'FPSO Sepetiba' / 'SEPETIBA' / ' sepetiba ' → 'SEPETIBA'; empty → GLOBAL."""
+    if not fpso or not isinstance(fpso, str):
+        return GLOBAL_SCOPE
+    name = fpso.strip().upper()
+    if name.startswith("FPSO "):
+        name = name[5:].strip()
+    return name or GLOBAL_SCOPE
+
+
+def _load_parameters(db: Session) -> dict:
+    """{(key, fpso): value}; the lowest id wins within a scope."""
+    by_scope = {}
+    for row in db.query(models.ConfigParameter).order_by(models.ConfigParameter.id).all():
+        by_scope.setdefault((row.key, normalize_fpso(row.fpso)), row.value)
+    return by_scope
+
+
+class ConfigCache(SnapshotCache):
+    def __init__(self, ttl_seconds: float = CONFIG_CACHE_TTL_SECONDS, clock=time.monotonic):
+        super().__init__(models.ConfigParameter, _load_parameters, ttl_seconds, clock)
+
+    def get(self, db: Session, key: str, fpso: Optional[str] = None) -> Optional[str]:
+        by_scope = self.snapshot(db)
+        scope = normalize_fpso(fpso)
+        if (key, scope) in by_scope:
+            return by_scope[(key, scope)]
+        return by_scope.get((key, GLOBAL_SCOPE))
+
+
+config_cache = ConfigCache()
@@ -1,4 +1,4 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from fastapi import HTTPException
 from .. import models
 from ..schemas.export import ExportRequest
@@ -47,7 +47,9 @@ class ExportService:
                 ).all()
 
                 for tag in tags:
-                    results = db.query(models.CalibrationResult).join(models.CalibrationTask).filter(
+                    results = db.query(models.CalibrationResult).join(models.CalibrationTask).options(
+                        joinedload(models.CalibrationResult.task).joinedload(models.CalibrationTask.equipment)
+                    ).filter(
                         models.CalibrationTask.tag == tag.tag_number,
                         models.CalibrationResult.created_at >= request.start_date,
                         models.CalibrationResult.created_at <= request.end_date
@@ -66,7 +68,9 @@ class ExportService:
                             zip_file.writestr(f"{folder_path}/FC_Evidence_{res.id}.png", b"Mock FC Evidence Content")
 
                     if "CHANGES" in request.file_types:
-                        histories = db.query(models.InstallationHistory).filter(
+                        histories = db.query(models.InstallationHistory).options(
+                            joinedload(models.InstallationHistory.equipment)
+                        ).filter(
                             models.InstallationHistory.location == tag.tag_number,
                             models.InstallationHistory.installation_date >= request.start_date,
                             models.InstallationHistory.installation_date <= request.end_date
@@ -83,7 +87,9 @@ class ExportService:
                             zip_file.writestr(f"{fpso_trigram}/Metrological Confirmation/{tag.tag_number}/Equipment_Change_Report.csv", content.encode())
 
                 if "SAMPLING" in request.file_types:
-                    samples_query = db.query(models.Sample).filter(
+                    samples_query = db.query(models.Sample).options(
+                        joinedload(models.Sample.sample_point)
+                    ).filter(
                         models.Sample.sampling_date >= request.start_date,
                         models.Sample.sampling_date <= request.end_date
                     ).all()
@@ -0,0 +1,109 @@
+"""
+Parse Pool — Bounded process pool for CPU-bound lab report parsing.
+
+PyMuPDF text extraction plus the regex pass holds the GIL for the whole
+report, so running it on the request path stalls every other request served
+by the worker. Parses are dispatched to a ProcessPoolExecutor instead
+(PDF_PARSE_WORKERS processes, spawned lazily on first use).
+
+At most PDF_PARSE_MAX_PENDING parses may be running or queued at once; past
+that, ParserBusyError is raised immediately (the API answers 503 with
+Retry-After) instead of letting an upload burst pile up unbounded work.
+
+PDF_PARSE_WORKERS=0 parses inline in the calling thread (debugging, tests).
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from prometheus_client import Counter, Gauge
+
+from app.metrics import registry
+
+logger = logging.getLogger("mmt.parse_pool")
+
+PDF_PARSE_WORKERS = int(os.getenv("PDF_PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_PARSE_MAX_PENDING = int(os.getenv("PDF_PARSE_MAX_PENDING", str(max(PDF_PARSE_WORKERS, 1) * 4)))
+
+PENDING = Gauge(
+    "mmt_pdf_parse_pending", "PDF parses running or waiting for a pool worker",
+    registry=registry,
+)
+QUEUE_DEPTH = Gauge(
+    "mmt_pdf_parse_queue_depth", "PDF parses waiting for a free pool worker",
+    registry=registry,
+)
+REJECTED = Counter(
+    "mmt_pdf_parse_rejected_total", "PDF parses rejected because the pool queue was full",
+    registry=registry,
+)
+
+
+class ParserBusyError(RuntimeError):
+    """Raised when PDF_PARSE_MAX_PENDING parses are already in flight."""
+
+
+_lock = threading.Lock()
+_executor = None
+_pending = 0
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            # spawn: workers only need pdf_parser, never the parent's DB pools or threads
+            _executor = ProcessPoolExecutor(
+                max_workers=PDF_PARSE_WORKERS, mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def _set_pending(delta: int) -> None:
+    global _pending
+    _pending += delta
+    PENDING.set(_pending)
+    QUEUE_DEPTH.set(max(0, _pending - max(PDF_PARSE_WORKERS, 1)))
+
+
+def run(fn, *args):
+    """Run fn(*args) in the pool and wait for the result (call from a thread, not the event loop).
+
+    Exceptions raised by fn are re-raised here unchanged.
+    """
+    global _executor
+    with _lock:
+        if _pending >= PDF_PARSE_MAX_PENDING:
+            REJECTED.inc()
+            raise ParserBusyError(f"{_pending} PDF parses already in progress, try again shortly")
+        _set_pending(+1)
+    try:
+        if PDF_PARSE_WORKERS <= 0:
+            return fn(*args)
+        executor = _get_executor()
+        try:
+            return executor.submit(fn, *args).result()
+        except BrokenProcessPool:
+            # A worker died (segfault in a malformed PDF, OOM kill): start fresh next time
+            logger.error("PDF parse worker crashed; recycling the pool")
+            with _lock:
+                if _executor is executor:
+                    _executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise ValueError("PDF could not be parsed")
+    finally:
+        with _lock:
+            _set_pending(-1)
+
+
+def shutdown() -> None:
+    """Stop the worker processes (app shutdown)."""
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -9,12 +9,18 @@ Security hardening (Phase 2):
   - Magic bytes validation
   - File size limits (10MB max)
   - Safe filename handling
+
+Pages are read one at a time and reading stops as soon as every field of
+the detected type is found (the values sit on the first page or two; the
+attached chromatograms only add pages), or after PDF_MAX_PAGES pages.
+raw_text is only kept on the result when PDF_KEEP_RAW_TEXT is set.
 """
 
-import re
 import logging
-from dataclasses import dataclass, field
-from typing import Optional
+import os
+import re
+from dataclasses import dataclass
+
 import fitz  # pymupdf
 
 logger = logging.getLogger("mmt.pdf_parser")
@@ -23,39 +29,48 @@ logger = logging.getLogger("mmt.pdf_parser")
 MAX_PDF_SIZE_BYTES = 10 * 1024 * 1024  # 10 MB
 PDF_MAGIC_BYTES = b"%PDF"
 
+# Bump whenever extraction rules change: cached extractions
+# (services/report_cache.py) from other versions are ignored.
+PARSER_VERSION = "2"
+
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "5"))  # 0 = read every page
+PDF_KEEP_RAW_TEXT = os.getenv("PDF_KEEP_RAW_TEXT", "false").strip().lower() in ("1", "true", "yes")
+
 
 @dataclass
 class PVTResult:
     """Extracted values from a PVT lab report."""
     report_type: str = "PVT"
-    boletim: Optional[str] = None
-    tag_point: Optional[str] = None
-    sampling_date: Optional[str] = None
-    density: Optional[float] = None         # Massa específica (kg/m³)
+    boletim: str | None = None
+    tag_point: str | None = None
+    sampling_date: str | None = None
+    density: float | None = None            # Massa específica (kg/m³)
     density_unit: str = "kg/m³"
-    rs: Optional[float] = None              # RGO ou RS
+    rs: float | None = None                 # RGO ou RS
     rs_unit: str = "m³ STD gás/STD óleo morto"
-    fe: Optional[float] = None              # Fator de Encolhimento
+    fe: float | None = None                 # Fator de Encolhimento
     fe_unit: str = "-"
-    bsw: Optional[float] = None             # Teor de água e sedimentos (%)
+    bsw: float | None = None                # Teor de água e sedimentos (%)
     bsw_unit: str = "%"
     raw_text: str = ""
+    type_source: str = "content"            # "filename" when only the filename told the type
 
 
 @dataclass
 class CROResult:
     """Extracted values from a Chromatography lab report."""
     report_type: str = "CRO"
-    boletim: Optional[str] = None
-    tag_point: Optional[str] = None
-    sampling_date: Optional[str] = None
-    o2: Optional[float] = None                              # Oxigênio (%)
+    boletim: str | None = None
+    tag_point: str | None = None
+    sampling_date: str | None = None
+    o2: float | None = None                                 # Oxigênio (%)
     o2_unit: str = "%"
-    relative_density_real: Optional[float] = None            # Densidade Relativa do Gás Real (dimensionless)
+    relative_density_real: float | None = None               # Densidade Relativa do Gás Real (dimensionless)
     relative_density_real_unit: str = "-"
-    h2s: Optional[float] = None                             # Sulfeto de Hidrogênio (ppm)
+    h2s: float | None = None                                # Sulfeto de Hidrogênio (ppm)
     h2s_unit: str = "ppm"
     raw_text: str = ""
+    type_source: str = "content"            # "filename" when only the filename told the type
 
 
 def _validate_pdf_bytes(pdf_bytes: bytes, filename: str = "") -> None:
@@ -80,7 +95,7 @@ def _validate_pdf_bytes(pdf_bytes: bytes, filename: str = "") -> None:
         raise ValueError("File does not appear to be a valid PDF")
 
 
-def _parse_br_float(value_str: str) -> Optional[float]:
+def _parse_br_float(value_str: str) -> float | None:
     """Parse a Brazilian-format float (comma as decimal separator)."""
     if not value_str:
         return None
@@ -92,90 +107,246 @@ def _parse_br_float(value_str: str) -> Optional[float]:
         return None
 
 
-def _extract_tag_point(text: str) -> Optional[str]:
+@dataclass(frozen=True)
+class _Rule:
+    """One field of the pattern table.
+
+    `triggers` are literals, at least one of which appears on the line where
+    any match of `pattern` starts (lowercase when `ignore_case`).
+    """
+    name: str
+    pattern: re.Pattern
+    triggers: tuple
+    ignore_case: bool = False
+
+
+_RULES = {rule.name: rule for rule in (
+    # Report type markers (detect_report_type)
+    _Rule("pvt_marker", re.compile(r"RGO ou RS|Fator de Encolhimento|FE\n|Massa específica"),
+          ("RGO ou RS", "Fator de Encolhimento", "FE\n", "Massa específica")),
+    _Rule("cro_marker", re.compile(r"Cromatografia|cromatografia|Composição.*Gás|Concentração\s+Molar", re.IGNORECASE),
+          ("cromatografia", "composição", "concentração"), ignore_case=True),
+    _Rule("pvt_word", re.compile(r"PVT\s"), ("PVT",)),
+    _Rule("cro_word", re.compile(r"CRO\s"), ("CRO",)),
+    # Common fields
+    _Rule("tag_point", re.compile(r"(\d{3}-AP-\d{4}\s*/\s*P-\d+(?:\s*\([^)]+\))?)"), ("-AP-",)),
+    _Rule("boletim_header", re.compile(r"Boletim de Resultado de Análise N°\n(.+)"),
+          ("Boletim de Resultado de Análise N°\n",)),
+    _Rule("boletim_number", re.compile(r"((PVT|CRO)\s+\S+/\d{2}-\d+)"), ("PVT", "CRO")),
+    _Rule("date_fpso", re.compile(r"FPSO\s+.*?\n(\d{2}/\d{2}/\d{4})"), ("FPSO",)),
+    _Rule("date_received", re.compile(r"Data de Receb.*?\n.*?(\d{2}/\d{2}/\d{4})"), ("Data de Receb",)),
+    # PVT values
+    _Rule("density", re.compile(r"Massa específica absoluta.*?\n([\d,]+)"), ("Massa específica absoluta",)),
+    _Rule("rs", re.compile(r"RGO ou RS\n([\d,]+)"), ("RGO ou RS\n",)),
+    _Rule("fe", re.compile(r"\bFE\n([\d,]+)"), ("FE\n",)),
+    # CRO values
+    _Rule("o2", re.compile(r"O2\nOxigênio\n\w+\n([\d,]+)"), ("O2\nOxigênio\n",)),
+    _Rule("relative_density_real", re.compile(r"Densidade Relativa do G[aá]s Real\n\w+\n([\d,]+)"),
+          ("Densidade Relativa do G",)),
+)}
+_BOLETIM_PREFIX = re.compile(r"(PVT|CRO)\s")
+
+
+class _Scan:
+    """The pattern table applied to one text, each rule run at most once, on demand.
+
+    scan[name] is the match `rule.pattern.search(text)` would return (or
+    None), but the pattern starts at the first line holding one of its
+    triggers (plain substring search), so slow patterns never walk the text
+    before it and rules without any trigger never run.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self._lowered = None
+        self._matches = {}
+
+    def __getitem__(self, name: str):
+        if name not in self._matches:
+            self._matches[name] = self._search(_RULES[name])
+        return self._matches[name]
+
+    def _search(self, rule: _Rule):
+        text = haystack = self.text
+        if rule.ignore_case:
+            if self._lowered is None:
+                self._lowered = text.lower()
+            # Case folding may change lengths (e.g. "İ"): offsets would no longer line up
+            if len(self._lowered) != len(text):
+                return rule.pattern.search(text)
+            haystack = self._lowered
+        positions = [p for p in (haystack.find(t) for t in rule.triggers) if p >= 0]
+        if not positions:
+            return None
+        # No line before the first trigger can start a match
+        return rule.pattern.search(text, text.rfind("\n", 0, min(positions)) + 1)
+
+
+def scan_text(text: str) -> _Scan:
+    """Lazily evaluated pattern table over `text` (see _Scan)."""
+    return _Scan(text)
+
+
+def _report_type(matches: _Scan) -> str:
+    if matches["pvt_marker"]:
+        return "PVT"
+    if matches["cro_marker"]:
+        return "CRO"
+    if matches["pvt_word"]:
+        return "PVT"
+    if matches["cro_word"]:
+        return "CRO"
+    return "UNKNOWN"
+
+
+def _group(matches: _Scan, name: str) -> str | None:
+    m = matches[name]
+    return m.group(1) if m else None
+
+
+def _tag_point(matches: _Scan) -> str | None:
+    value = _group(matches, "tag_point")
+    return value.strip() if value else None
+
+
+def _boletim(matches: _Scan) -> str | None:
+    header = _group(matches, "boletim_header")
+    if header is not None:
+        value = header.strip()
+        if _BOLETIM_PREFIX.match(value):
+            return value
+    number = _group(matches, "boletim_number")
+    return number.strip() if number else None
+
+
+def _sampling_date(matches: _Scan) -> str | None:
+    return _group(matches, "date_fpso") or _group(matches, "date_received")
+
+
+def _extract_tag_point(text: str) -> str | None:
     """Extract the sampling tag/point (e.g. '662-AP-2233 / P-02')."""
-    m = re.search(r"(\d{3}-AP-\d{4}\s*/\s*P-\d+(?:\s*\([^)]+\))?)", text)
-    return m.group(1).strip() if m else None
+    return _tag_point(scan_text(text))
 
 
-def _extract_boletim(text: str) -> Optional[str]:
+def _extract_boletim(text: str) -> str | None:
     """Extract the Boletim number (e.g. 'PVT Sepetiba/26-16901')."""
-    m = re.search(r"Boletim de Resultado de Análise N°\n(.+)", text)
-    if m:
-        value = m.group(1).strip()
-        if re.match(r"(PVT|CRO)\s", value):
-            return value
-    m2 = re.search(r"((PVT|CRO)\s+\S+/\d{2}-\d+)", text)
-    return m2.group(1).strip() if m2 else None
+    return _boletim(scan_text(text))
 
 
-def _extract_sampling_date(text: str) -> Optional[str]:
+def _extract_sampling_date(text: str) -> str | None:
     """Extract the collection date (Data da Coleta)."""
-    m = re.search(r"FPSO\s+.*?\n(\d{2}/\d{2}/\d{4})", text)
-    if m:
-        return m.group(1)
-    m = re.search(r"Data de Receb.*?\n.*?(\d{2}/\d{2}/\d{4})", text)
-    return m.group(1) if m else None
+    return _sampling_date(scan_text(text))
 
 
 def detect_report_type(text: str) -> str:
     """Detect whether the report is PVT or CRO based on content."""
-    if re.search(r"RGO ou RS|Fator de Encolhimento|FE\n|Massa específica", text):
-        return "PVT"
-    if re.search(r"Cromatografia|cromatografia|Composição.*Gás|Concentração\s+Molar", text, re.IGNORECASE):
-        return "CRO"
-    if re.search(r"PVT\s", text):
-        return "PVT"
-    if re.search(r"CRO\s", text):
-        return "CRO"
-    return "UNKNOWN"
+    return _report_type(scan_text(text))
 
 
-def extract_pvt(text: str) -> PVTResult:
-    """Extract PVT values from PDF text."""
+def _build_pvt(text: str, matches: _Scan) -> PVTResult:
     result = PVTResult(raw_text=text)
-    result.boletim = _extract_boletim(text)
-    result.tag_point = _extract_tag_point(text)
-    result.sampling_date = _extract_sampling_date(text)
+    result.boletim = _boletim(matches)
+    result.tag_point = _tag_point(matches)
+    result.sampling_date = _sampling_date(matches)
+    for name in ("density", "rs", "fe"):
+        value = _group(matches, name)
+        if value is not None:
+            setattr(result, name, _parse_br_float(value))
+    return result
 
-    m = re.search(r"Massa específica absoluta.*?\n([\d,]+)", text)
-    if m:
-        result.density = _parse_br_float(m.group(1))
 
-    m = re.search(r"RGO ou RS\n([\d,]+)", text)
-    if m:
-        result.rs = _parse_br_float(m.group(1))
+def _build_cro(text: str, matches: _Scan) -> CROResult:
+    result = CROResult(raw_text=text)
+    result.boletim = _boletim(matches)
+    result.tag_point = _tag_point(matches)
+    result.sampling_date = _sampling_date(matches)
+    for name in ("o2", "relative_density_real"):
+        value = _group(matches, name)
+        if value is not None:
+            setattr(result, name, _parse_br_float(value))
+    return result
 
-    m = re.search(r"\bFE\n([\d,]+)", text)
-    if m:
-        result.fe = _parse_br_float(m.group(1))
 
-    return result
+def extract_pvt(text: str) -> PVTResult:
+    """Extract PVT values from PDF text."""
+    return _build_pvt(text, scan_text(text))
 
 
 def extract_cro(text: str) -> CROResult:
     """Extract Chromatography values from PDF text."""
-    result = CROResult(raw_text=text)
-    result.boletim = _extract_boletim(text)
-    result.tag_point = _extract_tag_point(text)
-    result.sampling_date = _extract_sampling_date(text)
+    return _build_cro(text, scan_text(text))
+
+
+_REQUIRED_FIELDS = {
+    "PVT": ("density", "rs", "fe"),
+    "CRO": ("o2", "relative_density_real"),
+}
+
+
+def _complete(matches: _Scan) -> bool:
+    """Every field of the detected report type has been found."""
+    report_type = _report_type(matches)
+    if report_type not in _REQUIRED_FIELDS:
+        return False
+    if not (_boletim(matches) and _tag_point(matches) and _sampling_date(matches)):
+        return False
+    return all(matches[name] for name in _REQUIRED_FIELDS[report_type])
 
-    m = re.search(r"O2\nOxigênio\n\w+\n([\d,]+)", text)
-    if m:
-        result.o2 = _parse_br_float(m.group(1))
 
-    m = re.search(r"Densidade Relativa do G[aá]s Real\n\w+\n([\d,]+)", text)
-    if m:
-        result.relative_density_real = _parse_br_float(m.group(1))
+def _read_pages(doc, max_pages: int | None = None) -> tuple[str, _Scan]:
+    """Text of the first pages of `doc`, stopping once the report is complete.
 
+    Returns the text read and its scan.
+    """
+    max_pages = PDF_MAX_PAGES if max_pages is None else max_pages
+    text = ""
+    matches = scan_text(text)
+    try:
+        for number, page in enumerate(doc, start=1):
+            text += page.get_text()
+            matches = scan_text(text)
+            if _complete(matches) or (max_pages and number >= max_pages):
+                break
+    finally:
+        doc.close()
+    return text, matches
+
+
+def _extract(text: str, filename: str = "", matches: _Scan | None = None,
+             keep_raw_text: bool | None = None) -> PVTResult | CROResult:
+    """Detect the type and extract all values from one scan of the text."""
+    matches = matches or scan_text(text)
+    report_type = _report_type(matches)
+    type_source = "content"
+
+    # Fallback: detect from filename
+    if report_type == "UNKNOWN" and filename:
+        type_source = "filename"
+        if "PVT" in filename.upper():
+            report_type = "PVT"
+        elif "CRO" in filename.upper():
+            report_type = "CRO"
+
+    if report_type == "PVT":
+        result = _build_pvt(text, matches)
+    elif report_type == "CRO":
+        result = _build_cro(text, matches)
+    else:
+        raise ValueError("Unknown report type. Could not detect PVT or CRO.")
+    result.type_source = type_source
+    if not (PDF_KEEP_RAW_TEXT if keep_raw_text is None else keep_raw_text):
+        result.raw_text = ""
     return result
 
 
-def parse_pdf(pdf_path: str) -> PVTResult | CROResult:
+def parse_pdf(pdf_path: str, max_pages: int | None = None,
+              keep_raw_text: bool | None = None) -> PVTResult | CROResult:
     """Parse a lab report PDF and return extracted values.
 
     Args:
         pdf_path: Path to the PDF file.
+        max_pages: Page cap (default PDF_MAX_PAGES, 0 = no cap).
+        keep_raw_text: Keep the extracted text on the result (default PDF_KEEP_RAW_TEXT).
 
     Returns:
         PVTResult or CROResult with extracted values.
@@ -188,28 +359,21 @@ def parse_pdf(pdf_path: str) -> PVTResult | CROResult:
         raw = f.read()
     _validate_pdf_bytes(raw, pdf_path)
 
-    doc = fitz.open(pdf_path)
-    text = ""
-    for page in doc:
-        text += page.get_text()
-    doc.close()
-
-    report_type = detect_report_type(text)
-
-    if report_type == "PVT":
-        return extract_pvt(text)
-    elif report_type == "CRO":
-        return extract_cro(text)
-    else:
+    text, matches = _read_pages(fitz.open(pdf_path), max_pages)
+    if _report_type(matches) == "UNKNOWN":
         raise ValueError("Unknown report type. Could not detect PVT or CRO from PDF content.")
+    return _extract(text, matches=matches, keep_raw_text=keep_raw_text)
 
 
-def parse_pdf_bytes(pdf_bytes: bytes, filename: str = "") -> PVTResult | CROResult:
+def parse_pdf_bytes(pdf_bytes: bytes, filename: str = "", max_pages: int | None = None,
+                    keep_raw_text: bool | None = None) -> PVTResult | CROResult:
     """Parse a lab report from in-memory bytes (for file upload handling).
 
     Args:
         pdf_bytes: Raw PDF bytes.
         filename: Original filename (used as fallback for type detection).
+        max_pages: Page cap (default PDF_MAX_PAGES, 0 = no cap).
+        keep_raw_text: Keep the extracted text on the result (default PDF_KEEP_RAW_TEXT).
 
     Returns:
         PVTResult or CROResult with extracted values.
@@ -219,24 +383,5 @@ def parse_pdf_bytes(pdf_bytes: bytes, filename: str = "") -> PVTResult | CROResu
     """
     _validate_pdf_bytes(pdf_bytes, filename)
 
-    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-    text = ""
-    for page in doc:
-        text += page.get_text()
-    doc.close()
-
-    report_type = detect_report_type(text)
-
-    # Fallback: detect from filename
-    if report_type == "UNKNOWN" and filename:
-        if "PVT" in filename.upper():
-            report_type = "PVT"
-        elif "CRO" in filename.upper():
-            report_type = "CRO"
-
-    if report_type == "PVT":
-        return extract_pvt(text)
-    elif report_type == "CRO":
-        return extract_cro(text)
-    else:
-        raise ValueError("Unknown report type. Could not detect PVT or CRO.")
+    text, matches = _read_pages(fitz.open(stream=pdf_bytes, filetype="pdf"), max_pages)
+    return _extract(text, filename, matches, keep_raw_text)
@@ -0,0 +1,149 @@
+"""
+Principal Cache — Bounded LRU+TTL cache of verified auth principals.
+
+Keyed by the SHA-256 of the bearer token (raw tokens are never stored).
+Each entry holds the resolved user and FPSO scope and expires at the token's
+`exp` claim, capped by a maximum TTL so revocations made directly in Supabase
+propagate within a bounded window.
+
+SessionDenylist records revoked users so their older tokens are refused
+even when they are verified again (until those tokens expire).
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+
+class PrincipalCache:
+    """Thread-safe LRU cache with per-entry expiry and hit/miss counters."""
+
+    def __init__(self, max_size: int = 1024, max_ttl_seconds: int = 300, clock: Callable[[], float] = time.time):
+        self.max_size = max_size
+        self.max_ttl_seconds = max_ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        # token_hash -> (expires_at, user_id, context)
+        self._entries: "OrderedDict[str, tuple[float, Optional[str], dict]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def token_key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def get(self, token: str) -> Optional[dict]:
+        """Return the cached context for a token, or None on miss/expiry."""
+        if not self.enabled:
+            return None
+        key = self.token_key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, _, context = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return context
+
+    def put(self, token: str, context: dict, expires_at: Optional[float] = None, user_id: Optional[str] = None) -> None:
+        """Store a verified context until min(token exp, now + max TTL)."""
+        if not self.enabled:
+            return
+        now = self._clock()
+        deadline = now + self.max_ttl_seconds
+        if expires_at is not None:
+            deadline = min(deadline, expires_at)
+        if deadline <= now:
+            return
+        key = self.token_key(token)
+        with self._lock:
+            self._entries[key] = (deadline, user_id, context)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, token: str) -> bool:
+        """Evict a single token (logout). Returns True if it was cached."""
+        with self._lock:
+            return self._entries.pop(self.token_key(token), None) is not None
+
+    def invalidate_user(self, user_id: str) -> int:
+        """Evict every cached token of a user (revocation). Returns the count."""
+        with self._lock:
+            keys = [k for k, (_, uid, _) in self._entries.items() if uid == user_id]
+            for k in keys:
+                del self._entries[k]
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "max_ttl_seconds": self.max_ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class SessionDenylist:
+    """Users whose tokens issued before a revocation are rejected until they expire.
+
+    Each revocation is kept for `window_seconds` (the longest token lifetime):
+    after that every token issued before it has expired on its own. The list
+    is per process, like the principal cache.
+    """
+
+    def __init__(self, window_seconds: int = 3600, clock: Callable[[], float] = time.time):
+        self.window_seconds = window_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        # user_id -> (revoked_at, keep_until)
+        self._revoked: dict[str, tuple[float, float]] = {}
+
+    def revoke(self, user_id: str) -> None:
+        now = self._clock()
+        with self._lock:
+            for uid in [uid for uid, (_, keep_until) in self._revoked.items() if keep_until <= now]:
+                del self._revoked[uid]
+            self._revoked[user_id] = (now, now + self.window_seconds)
+
+    def is_revoked(self, user_id: str | None, issued_at: float | None) -> bool:
+        """True when the user was revoked after the token's `iat` (or the token has none)."""
+        if user_id is None:
+            return False
+        with self._lock:
+            entry = self._revoked.get(user_id)
+            if entry is None:
+                return False
+            revoked_at, keep_until = entry
+            if keep_until <= self._clock():
+                del self._revoked[user_id]
+                return False
+        return issued_at is None or issued_at < revoked_at
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._revoked)
@@ -0,0 +1,122 @@
+"""
+Report Cache — Content-addressed cache of lab report PDF extractions.
+
+Re-uploading the same PDF (re-validation, a retried request, the same report
+attached to several samples) used to run PyMuPDF and the regex extraction
+again. The extracted PVTResult/CROResult is now stored as JSON next to the
+saved uploads, keyed by the SHA-256 of the PDF bytes:
+
+    uploads/reports/.extractions/<sha256>.json
+
+An entry is used only when its parser_version matches
+pdf_parser.PARSER_VERSION, so bumping the version after changing the
+extraction rules invalidates every cached result (stale files are
+overwritten on the next upload of those bytes).
+
+Reports whose type was only detectable from the filename are not cached —
+the same bytes under another name could yield a different result.
+"""
+
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+from typing import Optional
+
+from prometheus_client import Counter
+
+from app.metrics import registry
+from app.services import parse_pool, pdf_parser
+from app.services.pdf_parser import CROResult, PVTResult
+
+logger = logging.getLogger("mmt.report_cache")
+
+REPORTS_DIR = os.getenv(
+    "REPORTS_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "uploads", "reports"),
+)
+CACHE_SUBDIR = ".extractions"
+
+_RESULT_TYPES = {"PVT": PVTResult, "CRO": CROResult}
+
+LOOKUPS = Counter(
+    "mmt_report_parse_cache_total", "Lab report extraction cache lookups",
+    ["result"], registry=registry,
+)
+
+
+def content_hash(pdf_bytes: bytes) -> str:
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+
+def _entry_path(digest: str, reports_dir: Optional[str] = None) -> str:
+    return os.path.join(reports_dir or REPORTS_DIR, CACHE_SUBDIR, f"{digest}.json")
+
+
+def load(digest: str, reports_dir: Optional[str] = None) -> Optional[PVTResult | CROResult]:
+    """Cached extraction for `digest`, or None if missing, unreadable or stale."""
+    path = _entry_path(digest, reports_dir)
+    try:
+        with open(path, encoding="utf-8") as f:
+            entry = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError):
+        logger.warning("Ignoring unreadable extraction cache entry %s", path)
+        return None
+
+    if entry.get("parser_version") != pdf_parser.PARSER_VERSION:
+        return None
+    result_type = _RESULT_TYPES.get(entry.get("report_type"))
+    if result_type is None:
+        return None
+    names = {f.name for f in dataclasses.fields(result_type)}
+    return result_type(**{k: v for k, v in entry.get("result", {}).items() if k in names})
+
+
+def store(digest: str, result: PVTResult | CROResult, reports_dir: Optional[str] = None) -> None:
+    """Persist an extraction (atomic rename, so readers never see half a file)."""
+    path = _entry_path(digest, reports_dir)
+    entry = {
+        "parser_version": pdf_parser.PARSER_VERSION,
+        "sha256": digest,
+        "report_type": result.report_type,
+        "result": dataclasses.asdict(result),
+    }
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except OSError:
+        # The cache is an optimization; an unwritable disk must not fail the upload
+        logger.warning("Could not write extraction cache entry %s", path, exc_info=True)
+
+
+def parse_pdf_bytes(
+    pdf_bytes: bytes, filename: str = "", reports_dir: Optional[str] = None
+) -> PVTResult | CROResult:
+    """Drop-in for pdf_parser.parse_pdf_bytes, served from the cache when possible.
+
+    Misses are parsed in the process pool (services/parse_pool.py); call this
+    from a worker thread, not the event loop.
+
+    Raises:
+        ValueError: If validation fails or report type is unknown (never cached).
+        ParserBusyError: If the parse pool queue is full.
+    """
+    pdf_parser._validate_pdf_bytes(pdf_bytes, filename)
+
+    digest = content_hash(pdf_bytes)
+    cached = load(digest, reports_dir)
+    if cached is not None:
+        LOOKUPS.labels(result="hit").inc()
+        return cached
+
+    LOOKUPS.labels(result="miss").inc()
+    result = parse_pool.run(pdf_parser.parse_pdf_bytes, pdf_bytes, filename)
+    if result.type_source == "content":
+        store(digest, result, reports_dir)
+    return result
@@ -0,0 +1,273 @@
+"""
+Report Ingestion — Batch upload of lab report PDFs (ZIPs or many files).
+
+Labs deliver dozens of PVT/CRO boletins at once. A batch is:
+  1. unpacked (ZIP members or plain PDFs, size-capped before reading),
+  2. parsed in parallel (content-hash cache + parse pool),
+  3. matched to its Sample — Laudo Nº equal to the extracted boletim, else
+     the sample point tag plus the sampling date (exactly one candidate),
+  4. validated in sampling-date order with one shared HistoryCache, so each
+     sample point's history is read once and every report sees the ones
+     stored before it, exactly as sequential uploads would.
+
+Every file gets a row in the result table; one bad file never fails the batch.
+"""
+
+import io
+import os
+import re
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services import parse_pool, report_cache, rolling_stats
+from app.services.pdf_parser import MAX_PDF_SIZE_BYTES, CROResult, PVTResult
+from app.services.validation_engine import HistoryCache, ValidationResult, _sample_fpso, validate_report
+
+REPORT_BATCH_MAX_FILES = int(os.getenv("REPORT_BATCH_MAX_FILES", "200"))
+REPORT_BATCH_MAX_BYTES = int(os.getenv("REPORT_BATCH_MAX_BYTES", str(200 * 1024 * 1024)))
+
+# "T71-AP-0602", "771-AP-0602 / P-02 (MRO-16)" → ("71", "AP", "0602"): the lab's
+# OCR often reads the leading T as 7, so only the last two area digits count
+_TAG_RE = re.compile(r"([A-Z0-9]{2,3})-([A-Z]{2})-(\d{3,4})")
+
+
+class BatchTooLargeError(ValueError):
+    """The batch exceeds REPORT_BATCH_MAX_FILES or REPORT_BATCH_MAX_BYTES."""
+
+
+@dataclass
+class FileOutcome:
+    filename: str
+    status: str = "pending"  # validated / unmatched / ambiguous / duplicate / error
+    detail: Optional[str] = None
+    report_type: Optional[str] = None
+    boletim: Optional[str] = None
+    tag_point: Optional[str] = None
+    sampling_date: Optional[str] = None
+    sample_pk: Optional[int] = None
+    sample_id: Optional[str] = None
+    overall_status: Optional[str] = None
+    passed_count: int = 0
+    failed_count: int = 0
+
+
+def read_uploads(files: List[Tuple[str, BinaryIO]], chunk_size: int = 1024 * 1024) -> List[Tuple[str, bytes]]:
+    """Read uploaded files into (name, bytes), stopping as soon as the batch passes REPORT_BATCH_MAX_BYTES.
+
+    Raises:
+        BatchTooLargeError: If the uploads add up to more than REPORT_BATCH_MAX_BYTES.
+    """
+    uploads, total = [], 0
+    for name, stream in files:
+        chunks = []
+        while chunk := stream.read(chunk_size):
+            total += len(chunk)
+            if total > REPORT_BATCH_MAX_BYTES:
+                raise BatchTooLargeError(f"Batch exceeds {REPORT_BATCH_MAX_BYTES // (1024 * 1024)}MB")
+            chunks.append(chunk)
+        uploads.append((name, b"".join(chunks)))
+    return uploads
+
+
+def unpack(uploads: List[Tuple[str, bytes]]) -> Tuple[List[Tuple[str, bytes]], List[FileOutcome]]:
+    """Expand ZIPs into (name, bytes) PDFs; entries that can't be used become error rows."""
+    pdfs, rejected = [], []
+    total = 0
+
+    def _add(name, data):
+        nonlocal total
+        total += len(data)
+        if len(pdfs) >= REPORT_BATCH_MAX_FILES:
+            raise BatchTooLargeError(f"Batch exceeds {REPORT_BATCH_MAX_FILES} files")
+        if total > REPORT_BATCH_MAX_BYTES:
+            raise BatchTooLargeError(f"Batch exceeds {REPORT_BATCH_MAX_BYTES // (1024 * 1024)}MB")
+        pdfs.append((name, data))
+
+    for name, data in uploads:
+        if not name.lower().endswith(".zip"):
+            _add(name, data)
+            continue
+        try:
+            archive = zipfile.ZipFile(io.BytesIO(data))
+        except zipfile.BadZipFile:
+            rejected.append(FileOutcome(name, "error", "Invalid ZIP file"))
+            continue
+        with archive:
+            for info in archive.infolist():
+                base = os.path.basename(info.filename)
+                if info.is_dir() or info.filename.startswith("__MACOSX/") or base.startswith("."):
+                    continue
+                member = f"{name}/{info.filename}"
+                if not base.lower().endswith(".pdf"):
+                    rejected.append(FileOutcome(member, "error", "Not a PDF"))
+                elif info.file_size > MAX_PDF_SIZE_BYTES:
+                    # Checked against the header before inflating anything
+                    rejected.append(FileOutcome(
+                        member, "error", f"PDF exceeds maximum allowed size of {MAX_PDF_SIZE_BYTES // (1024*1024)}MB"))
+                else:
+                    _add(member, archive.read(info))
+    return pdfs, rejected
+
+
+def parse_all(pdfs: List[Tuple[str, bytes]]) -> List[PVTResult | CROResult | Exception]:
+    """Parse every PDF, at most PDF_PARSE_WORKERS at a time (order preserved)."""
+
+    def _parse(item):
+        name, data = item
+        try:
+            return report_cache.parse_pdf_bytes(data, os.path.basename(name))
+        except Exception as e:
+            # Not a PDF, parser busy, or a PDF PyMuPDF can't read (FileDataError
+            # on truncated files): that file becomes an error row
+            return e
+
+    with ThreadPoolExecutor(max_workers=max(parse_pool.PDF_PARSE_WORKERS, 1)) as threads:
+        return list(threads.map(_parse, pdfs))
+
+
+def tag_key(tag: Optional[str]) -> Optional[tuple]:
+    m = _TAG_RE.search(tag.upper()) if tag else None
+    return (m.group(1)[-2:], m.group(2), m.group(3)) if m else None
+
+
+def _parse_br_date(value: Optional[str]) -> Optional[date]:
+    try:
+        return datetime.strptime(value, "%d/%m/%Y").date() if value else None
+    except ValueError:
+        return None
+
+
+def _normalize_boletim(value: Optional[str]) -> Optional[str]:
+    return " ".join(value.split()).upper() if value else None
+
+
+def match_samples(db: Session, extracted: List[PVTResult | CROResult]) -> List[Tuple[str, List[models.Sample]]]:
+    """(how, candidate samples) per report: matched by boletim, else tag + sampling date."""
+    boletins = {_normalize_boletim(e.boletim) for e in extracted if e.boletim}
+    by_boletim: Dict[str, List[models.Sample]] = {}
+    if boletins:
+        for sample in db.query(models.Sample).filter(
+            func.upper(func.trim(models.Sample.laudo_number)).in_(boletins)
+        ):
+            by_boletim.setdefault(_normalize_boletim(sample.laudo_number), []).append(sample)
+
+    points: Dict[tuple, List[int]] = {}
+    for point_id, tag in db.query(models.SamplePoint.id, models.SamplePoint.tag_number):
+        key = tag_key(tag)
+        if key:
+            points.setdefault(key, []).append(point_id)
+    wanted = [(tag_key(e.tag_point), _parse_br_date(e.sampling_date)) for e in extracted]
+    point_ids = {pid for key, day in wanted if key and day for pid in points.get(key, [])}
+    days = {day for key, day in wanted if key and day}
+    by_point_day: Dict[tuple, List[models.Sample]] = {}
+    if point_ids:
+        for sample in db.query(models.Sample).filter(
+            models.Sample.sample_point_id.in_(point_ids), models.Sample.sampling_date.in_(days)
+        ):
+            by_point_day.setdefault((sample.sample_point_id, sample.sampling_date), []).append(sample)
+
+    matches = []
+    for e, (key, day) in zip(extracted, wanted, strict=True):
+        candidates = by_boletim.get(_normalize_boletim(e.boletim)) if e.boletim else None
+        if candidates:
+            matches.append(("boletim", candidates))
+            continue
+        candidates = [s for pid in points.get(key, []) for s in by_point_day.get((pid, day), [])] if key and day else []
+        matches.append(("tag_point + sampling_date", candidates))
+    return matches
+
+
+def store_validation(db: Session, sample: models.Sample, validation: ValidationResult, source_pdf: str) -> None:
+    """Replace the sample's stored results with the validated checks (re-upload safe)."""
+    db.query(models.SampleResult).filter(models.SampleResult.sample_id == sample.id).delete()
+    rolling_stats.discard_sample(db, sample)  # bulk delete bypasses the ORM hooks
+
+    for check in validation.checks:
+        db.add(models.SampleResult(
+            sample_id=sample.id,
+            parameter=check.parameter,
+            value=check.value,
+            unit=check.unit,
+            validation_status=check.status,
+            validation_detail=check.detail,
+            history_mean=check.history_mean,
+            history_std=check.history_std,
+            source_pdf=source_pdf,
+        ))
+    sample.validation_status = validation.overall_status
+
+
+def _save_pdf(sample: models.Sample, filename: str, data: bytes) -> str:
+    os.makedirs(report_cache.REPORTS_DIR, exist_ok=True)
+    safe_name = f"{sample.id}_{int(datetime.now().timestamp())}_{filename}"
+    with open(os.path.join(report_cache.REPORTS_DIR, safe_name), "wb") as f:
+        f.write(data)
+    return f"/uploads/reports/{safe_name}"
+
+
+def ingest(db: Session, uploads: List[Tuple[str, bytes]], dry_run: bool = False) -> List[FileOutcome]:
+    """Unpack, parse, match, validate and (unless dry_run) store a batch of reports.
+
+    Raises:
+        BatchTooLargeError: If the batch exceeds the configured limits.
+    """
+    pdfs, outcomes = unpack(uploads)
+    parsed = parse_all(pdfs)
+
+    rows, reports = [], []
+    for (name, data), result in zip(pdfs, parsed, strict=True):
+        row = FileOutcome(name)
+        rows.append(row)
+        if isinstance(result, Exception):
+            row.status, row.detail = "error", str(result)
+            continue
+        row.report_type, row.boletim = result.report_type, result.boletim
+        row.tag_point, row.sampling_date = result.tag_point, result.sampling_date
+        reports.append((row, name, data, result))
+
+    claimed: Dict[int, str] = {}
+    to_validate = []
+    matches = match_samples(db, [r[3] for r in reports])
+    for (row, name, data, result), (how, candidates) in zip(reports, matches, strict=True):
+        if not candidates:
+            row.status, row.detail = "unmatched", "No sample matches the boletim or tag point + sampling date"
+        elif len(candidates) > 1:
+            codes = ", ".join(sorted(s.sample_id for s in candidates))
+            row.status, row.detail = "ambiguous", f"Several samples match by {how}: {codes}"
+        elif candidates[0].id in claimed:
+            row.status, row.detail = "duplicate", f"Sample already matched by {claimed[candidates[0].id]}"
+        else:
+            sample = candidates[0]
+            claimed[sample.id] = name
+            row.sample_pk, row.sample_id, row.detail = sample.id, sample.sample_id, f"Matched by {how}"
+            to_validate.append((row, name, data, result, sample))
+
+    # Oldest first, so each report's history holds the batch reports sampled before it
+    to_validate.sort(key=lambda item: (item[4].sampling_date or date.max, item[4].id))
+    per_point: Dict[int, int] = {}
+    for *_, sample in to_validate:
+        per_point[sample.sample_point_id] = per_point.get(sample.sample_point_id, 0) + 1
+    cache = HistoryCache(db, per_point)
+
+    for row, name, data, result, sample in to_validate:
+        validation = validate_report(result, sample, db, history_cache=cache)
+        row.status, row.overall_status = "validated", validation.overall_status
+        row.passed_count, row.failed_count = validation.passed_count, validation.failed_count
+        if not dry_run:
+            filename = os.path.basename(name)
+            store_validation(db, sample, validation, filename)
+            sample.lab_report_url = _save_pdf(sample, filename, data)
+        cache.record(sample, validation.checks, _sample_fpso(sample))
+
+    if dry_run:
+        db.rollback()
+    else:
+        db.commit()
+    return outcomes + rows
@@ -0,0 +1,247 @@
+"""
+Bulk Re-validation — Re-run the 2σ checks over stored results after an M11 change.
+
+When SIGMA_MULTIPLIER or HISTORY_SIZE changes, past SampleResult rows keep the
+band they were validated against. This job reloads every 2σ parameter per
+(sample point, parameter) into NumPy arrays and recomputes, for all results
+in one pass, the band each one would get today:
+
+  - history = the HISTORY_SIZE results recorded before it at the same point
+    (created_at, id order), as the validation engine saw them;
+  - fewer than HISTORY_SIZE → padded with the history mean, or with the value
+    itself when there is no history (same bootstrap as _check_2sigma);
+  - mean / sample std (n - 1) of the padded window, band = mean ± k·σ.
+
+Only rows that were validated before (validation_status set) are rewritten;
+every row counts as history. With dry_run the diff is reported and nothing is
+written; otherwise results and the samples' overall status are updated in
+batches of REVALIDATION_BATCH_SIZE.
+"""
+
+import os
+from dataclasses import dataclass, field
+from itertools import pairwise
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services.config_cache import normalize_fpso
+from app.services.validation_engine import SIGMA_PARAMETERS, _get_config_limit, _sigma_detail
+
+REVALIDATION_BATCH_SIZE = int(os.getenv("REVALIDATION_BATCH_SIZE", "500"))
+
+
+@dataclass
+class ResultDiff:
+    result_id: int
+    sample_id: str
+    sample_point_id: int
+    parameter: str
+    value: float
+    old_status: str | None
+    new_status: str
+    old_mean: float | None
+    new_mean: float
+    old_std: float | None
+    new_std: float
+
+
+@dataclass
+class SampleDiff:
+    sample_id: str
+    old_status: str | None
+    new_status: str
+
+
+@dataclass
+class RevalidationReport:
+    dry_run: bool
+    scanned: int = 0           # validated results re-evaluated
+    groups: int = 0            # (sample point, parameter) series
+    results: list[ResultDiff] = field(default_factory=list)
+    samples: list[SampleDiff] = field(default_factory=list)
+
+    @property
+    def status_changes(self) -> dict[str, int]:
+        """Counts per transition, e.g. {"pass → fail": 3}."""
+        counts = {}
+        for diff in self.results:
+            if diff.old_status != diff.new_status:
+                key = f"{diff.old_status} → {diff.new_status}"
+                counts[key] = counts.get(key, 0) + 1
+        return counts
+
+
+def running_sum(columns: np.ndarray) -> np.ndarray:
+    """Row sums added left to right, like Python's sum() (NumPy's pairwise sum rounds differently)."""
+    total = np.zeros(columns.shape[0])
+    for j in range(columns.shape[1]):
+        total = total + columns[:, j]
+    return total
+
+
+def sigma_bands(values: np.ndarray, history_size: int, sigma_multiplier: float):
+    """Mean, std and band for every value of one chronological series.
+
+    Row i is checked against values[i - history_size:i], bootstrapped like
+    _check_2sigma and summed in the same order (newest first, padding last),
+    so results are bit-for-bit what the engine computes.
+    Returns (mean, std, lower, upper, bootstrapped) arrays.
+    """
+    m = len(values)
+    padded = np.concatenate([np.full(history_size, np.nan), values])
+    # Row i = the values recorded before i, newest first; missing history is NaN at the end
+    windows = sliding_window_view(padded, history_size)[:m, ::-1]
+    present = ~np.isnan(windows)
+    n = present.sum(axis=1)
+    pad_value = np.where(n > 0, running_sum(np.where(present, windows, 0.0)) / np.maximum(n, 1), values)
+    filled = np.where(present, windows, pad_value[:, None])
+
+    mean = running_sum(filled) / history_size
+    ddof = 1 if history_size > 1 else 0
+    std = np.sqrt(running_sum((filled - mean[:, None]) ** 2) / (history_size - ddof))
+    return mean, std, mean - sigma_multiplier * std, mean + sigma_multiplier * std, n < history_size
+
+
+def _differs(old: float | None, new: float) -> bool:
+    return old is None or not np.isclose(old, new, rtol=1e-9, atol=1e-12)
+
+
+def _load(db: Session, sample_point_ids: list[int] | None):
+    query = (
+        db.query(
+            models.SampleResult.id,
+            models.SampleResult.sample_id,
+            models.SampleResult.parameter,
+            models.SampleResult.value,
+            models.SampleResult.validation_status,
+            models.SampleResult.history_mean,
+            models.SampleResult.history_std,
+            models.Sample.sample_id.label("sample_code"),
+            models.Sample.sample_point_id,
+        )
+        .join(models.Sample, models.SampleResult.sample_id == models.Sample.id)
+        .filter(
+            models.SampleResult.parameter.in_(SIGMA_PARAMETERS),
+            models.SampleResult.value.isnot(None),
+            models.Sample.sample_point_id.isnot(None),
+        )
+    )
+    if sample_point_ids is not None:
+        query = query.filter(models.Sample.sample_point_id.in_(sample_point_ids))
+    return query.order_by(
+        models.Sample.sample_point_id, models.SampleResult.parameter,
+        models.SampleResult.created_at, models.SampleResult.id,
+    ).all()
+
+
+def revalidate_history(
+    db: Session,
+    dry_run: bool = True,
+    sample_point_id: int | None = None,
+    fpso: str | None = None,
+) -> RevalidationReport:
+    """Recompute the 2σ verdict of stored results with the current M11 settings."""
+    points = db.query(models.SamplePoint.id, models.SamplePoint.fpso_name)
+    if sample_point_id is not None:
+        points = points.filter(models.SamplePoint.id == sample_point_id)
+    fpso_by_point = dict(points.all())
+    if fpso:
+        scope = normalize_fpso(fpso)
+        fpso_by_point = {sp: name for sp, name in fpso_by_point.items() if normalize_fpso(name) == scope}
+
+    report = RevalidationReport(dry_run=dry_run)
+    scoped = None if sample_point_id is None and not fpso else list(fpso_by_point)
+    rows = _load(db, scoped)
+    if not rows:
+        return report
+
+    updates = []
+    # Series boundaries: rows are sorted by (sample point, parameter, time)
+    keys = [(r.sample_point_id, r.parameter) for r in rows]
+    starts = [0] + [i for i in range(1, len(rows)) if keys[i] != keys[i - 1]] + [len(rows)]
+    settings = {}
+    for start, end in pairwise(starts):
+        series = rows[start:end]
+        point_id = series[0].sample_point_id
+        if point_id not in settings:
+            point_fpso = fpso_by_point.get(point_id)
+            settings[point_id] = (
+                int(_get_config_limit(db, "HISTORY_SIZE", 10, point_fpso)),
+                _get_config_limit(db, "SIGMA_MULTIPLIER", 2.0, point_fpso),
+            )
+        history_size, sigma_multiplier = settings[point_id]
+        history_size = max(history_size, 1)
+        values = np.fromiter((r.value for r in series), dtype=float, count=len(series))
+        mean, std, lower, upper, bootstrapped = sigma_bands(values, history_size, sigma_multiplier)
+        within = (lower <= values) & (values <= upper)
+        report.groups += 1
+
+        for i, row in enumerate(series):
+            if row.validation_status is None:
+                continue
+            report.scanned += 1
+            status = "pass" if within[i] else "fail"
+            new_mean, new_std = float(mean[i]), float(std[i])
+            if row.validation_status == status and not _differs(row.history_mean, new_mean) \
+                    and not _differs(row.history_std, new_std):
+                continue
+            report.results.append(ResultDiff(
+                result_id=row.id, sample_id=row.sample_code, sample_point_id=point_id,
+                parameter=row.parameter, value=row.value,
+                old_status=row.validation_status, new_status=status,
+                old_mean=row.history_mean, new_mean=new_mean,
+                old_std=row.history_std, new_std=new_std,
+            ))
+            updates.append({
+                "id": row.id,
+                "validation_status": status,
+                "validation_detail": _sigma_detail(
+                    bool(within[i]), float(lower[i]), float(upper[i]), new_mean, new_std, bool(bootstrapped[i])
+                ),
+                "history_mean": new_mean,
+                "history_std": new_std,
+                "_sample_pk": row.sample_id,
+            })
+
+    sample_updates = _sample_status_changes(db, updates, report)
+    if dry_run or not updates:
+        return report
+
+    result_rows = [{k: v for k, v in u.items() if not k.startswith("_")} for u in updates]
+    for i in range(0, len(result_rows), REVALIDATION_BATCH_SIZE):
+        db.execute(update(models.SampleResult), result_rows[i:i + REVALIDATION_BATCH_SIZE])
+    for i in range(0, len(sample_updates), REVALIDATION_BATCH_SIZE):
+        db.execute(update(models.Sample), sample_updates[i:i + REVALIDATION_BATCH_SIZE])
+    db.commit()
+    return report
+
+
+def _sample_status_changes(db: Session, updates: list[dict], report: RevalidationReport) -> list[dict]:
+    """Overall Approved/Reproved of the touched samples once the new verdicts apply."""
+    new_status = {u["id"]: u["validation_status"] for u in updates}
+    sample_pks = {u["_sample_pk"] for u in updates}
+    if not sample_pks:
+        return []
+    samples = {
+        s.id: s for s in db.query(models.Sample.id, models.Sample.sample_id, models.Sample.validation_status)
+        .filter(models.Sample.id.in_(sample_pks), models.Sample.validation_status.isnot(None))
+    }
+    failed = dict.fromkeys(samples, False)
+    for result_id, sample_pk, status in (
+        db.query(models.SampleResult.id, models.SampleResult.sample_id, models.SampleResult.validation_status)
+        .filter(models.SampleResult.sample_id.in_(list(samples)))
+    ):
+        if new_status.get(result_id, status) == "fail":
+            failed[sample_pk] = True
+
+    changes = []
+    for pk, sample in samples.items():
+        overall = "Reproved" if failed[pk] else "Approved"
+        if overall != sample.validation_status:
+            report.samples.append(SampleDiff(sample.sample_id, sample.validation_status, overall))
+            changes.append({"id": pk, "validation_status": overall})
+    return changes
@@ -0,0 +1,352 @@
+"""
+Rolling Statistics — Maintained 2σ baselines per (sample point, parameter).
+
+Each ParameterRollingWindow row keeps the last HISTORY_SIZE results of one
+parameter at one sample point (value, date, sample), with their mean and
+sample standard deviation. The validation engine reads the window with one
+indexed lookup instead of scanning sample_results for every check.
+
+Windows are kept in step with sample_results inside the same transaction:
+  - SampleResult rows inserted, updated or deleted through the ORM are
+    collected on flush and applied just before the session commits;
+  - bulk deletes (query(...).delete()) bypass the ORM, so callers register
+    them with discard_sample();
+  - a new result newer than the window is merged in O(HISTORY_SIZE); any
+    other change (delete, re-upload, backdated row, HISTORY_SIZE change)
+    reloads that window from sample_results.
+
+Writes that bypass the ORM entirely (raw SQL, other tools) are repaired with
+`python -m app.manage rebuild-stats`.
+"""
+
+import json
+import math
+from collections import defaultdict
+from collections.abc import Iterable
+from datetime import datetime
+
+from sqlalchemy import desc, event, func, inspect, select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services.config_cache import config_cache
+
+DEFAULT_HISTORY_SIZE = 10
+
+_INSERTED = "rolling_stats_inserted"
+_CHANGED = "rolling_stats_changed"
+
+
+def window_capacity(db: Session, fpso: str | None = None) -> int:
+    """HISTORY_SIZE for an FPSO (M11 override → GLOBAL → default)."""
+    value = config_cache.get(db, "HISTORY_SIZE", fpso)
+    try:
+        return int(float(value)) if value is not None else DEFAULT_HISTORY_SIZE
+    except ValueError:
+        return DEFAULT_HISTORY_SIZE
+
+
+def summarize(values: list[float]):
+    """(mean, std) with the same arithmetic as the 2σ check; None when undefined."""
+    if len(values) < 2 or any(v is None for v in values):
+        return None, None
+    mean = sum(values) / len(values)
+    variance = sum((v - mean) ** 2 for v in values) / (len(values) - 1)
+    return mean, math.sqrt(variance)
+
+
+def _entry(result_id, value, created_at, sampling_date, sample_pk, sample_code) -> dict:
+    return {
+        "value": value,
+        "date": sampling_date.isoformat() if sampling_date else str(created_at),
+        "sample_id": sample_code,
+        "sample_pk": sample_pk,
+        "result_id": result_id,
+        "created_at": created_at.isoformat(),
+    }
+
+
+def _order_key(entry: dict):
+    return entry["created_at"], entry["result_id"]
+
+
+def _apply(window: models.ParameterRollingWindow, entries: list[dict]):
+    window.entries = json.dumps(entries)
+    window.count = len(entries)
+    window.mean, window.std = summarize([e["value"] for e in entries])
+
+
+def history_entries(window: models.ParameterRollingWindow) -> list[dict]:
+    """Stored entries, newest first."""
+    return json.loads(window.entries or "[]")
+
+
+# --- Reading ---
+
+def is_current(db: Session) -> bool:
+    """False while this session holds result changes the windows don't reflect yet."""
+    return not (db.new or db.dirty or db.deleted or db.info.get(_INSERTED) or db.info.get(_CHANGED))
+
+
+def load_windows(db: Session, sample_point_id: int, parameters: Iterable[str]) -> dict[str, models.ParameterRollingWindow]:
+    parameters = list(parameters)
+    if not parameters:
+        return {}
+    rows = db.query(models.ParameterRollingWindow).filter(
+        models.ParameterRollingWindow.sample_point_id == sample_point_id,
+        models.ParameterRollingWindow.parameter.in_(parameters),
+    ).all()
+    return {w.parameter: w for w in rows}
+
+
+# --- Rebuilding from sample_results ---
+
+def _recent_results(db: Session, sample_point_id: int, parameters: list[str], limit: int) -> dict[str, list[dict]]:
+    """Last `limit` results per parameter, newest first (same order as the history query)."""
+    row_number = func.row_number().over(
+        partition_by=models.SampleResult.parameter,
+        order_by=(desc(models.SampleResult.created_at), desc(models.SampleResult.id)),
+    ).label("rn")
+    ranked = (
+        select(
+            models.SampleResult.id,
+            models.SampleResult.parameter,
+            models.SampleResult.value,
+            models.SampleResult.created_at,
+            models.Sample.id.label("sample_pk"),
+            models.Sample.sample_id,
+            models.Sample.sampling_date,
+            row_number,
+        )
+        .join(models.Sample, models.SampleResult.sample_id == models.Sample.id)
+        .where(
+            models.Sample.sample_point_id == sample_point_id,
+            models.SampleResult.parameter.in_(parameters),
+        )
+        .subquery()
+    )
+    rows = db.execute(
+        select(ranked).where(ranked.c.rn <= limit).order_by(ranked.c.parameter, ranked.c.rn)
+    ).all()
+    recent = {p: [] for p in parameters}
+    for row in rows:
+        recent[row.parameter].append(
+            _entry(row.id, row.value, row.created_at, row.sampling_date, row.sample_pk, row.sample_id)
+        )
+    return recent
+
+
+def refresh_windows(db: Session, sample_point_id: int, parameters: Iterable[str],
+                    capacity: int | None = None, existing: dict | None = None) -> dict[str, models.ParameterRollingWindow]:
+    """Reload the windows of a sample point from sample_results (one query)."""
+    parameters = sorted(set(parameters))
+    if not parameters:
+        return {}
+    if capacity is None:
+        point = db.get(models.SamplePoint, sample_point_id)
+        capacity = window_capacity(db, point.fpso_name if point else None)
+    if existing is None:
+        existing = load_windows(db, sample_point_id, parameters)
+
+    recent = _recent_results(db, sample_point_id, parameters, capacity)
+    windows = {}
+    for parameter in parameters:
+        window = existing.get(parameter)
+        if not recent[parameter]:
+            if window is not None:
+                db.delete(window)
+            continue
+        if window is None:
+            window = models.ParameterRollingWindow(sample_point_id=sample_point_id, parameter=parameter)
+            db.add(window)
+        window.capacity = capacity
+        _apply(window, recent[parameter])
+        window.updated_at = datetime.utcnow()
+        windows[parameter] = window
+    return windows
+
+
+def rebuild_all(db: Session) -> dict:
+    """Regenerate every window from sample_results.
+
+    Returns counts of windows written and of windows whose content differed
+    from what was stored (drift caused by writes that bypassed the ORM).
+    """
+    before = {
+        (w.sample_point_id, w.parameter): (w.capacity, w.entries)
+        for w in db.query(models.ParameterRollingWindow).all()
+    }
+    pairs = (
+        db.query(models.Sample.sample_point_id, models.SampleResult.parameter)
+        .join(models.SampleResult, models.SampleResult.sample_id == models.Sample.id)
+        .filter(models.Sample.sample_point_id.isnot(None), models.SampleResult.parameter.isnot(None))
+        .distinct()
+        .all()
+    )
+    by_point = defaultdict(set)
+    for sample_point_id, parameter in pairs:
+        by_point[sample_point_id].add(parameter)
+    fpsos = dict(
+        db.query(models.SamplePoint.id, models.SamplePoint.fpso_name)
+        .filter(models.SamplePoint.id.in_(list(by_point)))
+        .all()
+    ) if by_point else {}
+
+    written, changed = 0, 0
+    seen = set()
+    for sample_point_id, parameters in by_point.items():
+        windows = refresh_windows(db, sample_point_id, parameters, window_capacity(db, fpsos.get(sample_point_id)))
+        for parameter, window in windows.items():
+            key = (sample_point_id, parameter)
+            seen.add(key)
+            written += 1
+            if before.get(key) != (window.capacity, window.entries):
+                changed += 1
+
+    orphans = [key for key in before if key not in seen]
+    for sample_point_id, parameter in orphans:
+        db.query(models.ParameterRollingWindow).filter(
+            models.ParameterRollingWindow.sample_point_id == sample_point_id,
+            models.ParameterRollingWindow.parameter == parameter,
+        ).delete(synchronize_session=False)
+    db.commit()
+    return {"windows": written, "changed": changed, "removed": len(orphans)}
+
+
+# --- Incremental maintenance ---
+
+def discard_sample(db: Session, sample: models.Sample):
+    """Register a bulk delete of this sample's results; its windows reload at commit."""
+    db.info.setdefault(_CHANGED, set()).add((sample.sample_point_id, sample.id))
+
+
+def _merge(window: models.ParameterRollingWindow, new_entries: list[dict]) -> bool:
+    """Fold newer results into a window; False when a full reload is needed instead."""
+    entries = history_entries(window)
+    if entries and min(map(_order_key, new_entries)) < _order_key(entries[0]):
+        return False  # backdated row — may belong in the middle of (or beyond) the window
+    entries = sorted(new_entries, key=_order_key, reverse=True) + entries
+    _apply(window, entries[: window.capacity])
+    window.updated_at = datetime.utcnow()
+    return True
+
+
+def apply_pending(db: Session):
+    """Bring windows in line with the results flushed in this transaction."""
+    inserted = db.info.pop(_INSERTED, [])
+    changed = db.info.pop(_CHANGED, set())
+    if not inserted and not changed:
+        return
+
+    samples = {}
+    if inserted:
+        sample_ids = {r.sample_id for r in inserted if r.sample_id is not None}
+        samples = {
+            s.id: s for s in db.query(models.Sample).filter(models.Sample.id.in_(sample_ids)).all()
+        } if sample_ids else {}
+
+    # {sample_point_id: {parameter: [entry, ...]}}
+    additions = defaultdict(lambda: defaultdict(list))
+    touched = defaultdict(set)      # sample points → sample pks whose windows must reload
+    for result in inserted:
+        sample = samples.get(result.sample_id)
+        if sample is None or sample.sample_point_id is None or result.parameter is None:
+            continue
+        if result.created_at is None:
+            touched[sample.sample_point_id].add(sample.id)
+            continue
+        additions[sample.sample_point_id][result.parameter].append(_entry(
+            result.id, result.value, result.created_at, sample.sampling_date, sample.id, sample.sample_id,
+        ))
+    for sample_point_id, sample_pk in changed:
+        if sample_point_id is not None:
+            touched[sample_point_id].add(sample_pk)
+
+    points = set(additions) | set(touched)
+    fpsos = dict(
+        db.query(models.SamplePoint.id, models.SamplePoint.fpso_name)
+        .filter(models.SamplePoint.id.in_(points))
+        .all()
+    )
+    all_windows = defaultdict(dict)
+    for window in db.query(models.ParameterRollingWindow).filter(
+        models.ParameterRollingWindow.sample_point_id.in_(points)
+    ).all():
+        all_windows[window.sample_point_id][window.parameter] = window
+
+    for sample_point_id in points:
+        capacity = window_capacity(db, fpsos.get(sample_point_id))
+        windows = all_windows[sample_point_id]
+        reload = set()
+        stale_pks = touched.get(sample_point_id, set())
+        if stale_pks:
+            for parameter, window in windows.items():
+                if any(e["sample_pk"] in stale_pks for e in history_entries(window)):
+                    reload.add(parameter)
+        for parameter, new_entries in additions[sample_point_id].items():
+            window = windows.get(parameter)
+            new_pks = {e["sample_pk"] for e in new_entries}
+            if (window is None or window.capacity != capacity or parameter in reload
+                    or new_pks & stale_pks
+                    # Re-upload of a sample that is already in the window
+                    or any(e["sample_pk"] in new_pks for e in history_entries(window))
+                    or not _merge(window, new_entries)):
+                reload.add(parameter)
+        if reload:
+            refresh_windows(db, sample_point_id, reload, capacity,
+                            existing={p: windows[p] for p in reload if p in windows})
+
+
+# --- Session hooks ---
+
+_WINDOW_FIELDS = ("sample_id", "parameter", "value", "created_at")
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_result_changes(session, flush_context):
+    for obj in session.new:
+        if isinstance(obj, models.SampleResult):
+            session.info.setdefault(_INSERTED, []).append(obj)
+    for obj in session.dirty:
+        if isinstance(obj, models.SampleResult):
+            state = inspect(obj)
+            if not any(state.attrs[name].history.has_changes() for name in _WINDOW_FIELDS):
+                continue  # approval/validation columns only
+            for sample_id in {obj.sample_id, *state.attrs.sample_id.history.deleted}:
+                _mark_sample(session, sample_id)
+            session.info.setdefault(_INSERTED, []).append(obj)
+        elif isinstance(obj, models.Sample):
+            state = inspect(obj)
+            moved = state.attrs.sample_point_id.history
+            if moved.has_changes() or state.attrs.sampling_date.history.has_changes():
+                changed = session.info.setdefault(_CHANGED, set())
+                for sample_point_id in {obj.sample_point_id, *moved.deleted}:
+                    changed.add((sample_point_id, obj.id))
+    for obj in session.deleted:
+        if isinstance(obj, models.SampleResult):
+            _mark_sample(session, obj.sample_id)
+
+
+def _mark_sample(session, sample_id):
+    if sample_id is None:
+        return
+    with session.no_autoflush:
+        sample = session.get(models.Sample, sample_id)
+    if sample is not None:
+        session.info.setdefault(_CHANGED, set()).add((sample.sample_point_id, sample.id))
+
+
+@event.listens_for(Session, "before_commit")
+def _update_windows_before_commit(session):
+    if not (session.info.get(_INSERTED) or session.info.get(_CHANGED) or session.new or session.dirty or session.deleted):
+        return
+    session.flush()
+    if session.info.get(_INSERTED) or session.info.get(_CHANGED):
+        with session.no_autoflush:
+            apply_pending(session)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session):
+    session.info.pop(_INSERTED, None)
+    session.info.pop(_CHANGED, None)
@@ -0,0 +1,124 @@
+"""
+SBM Validation — Avg ± 2·Std of previous samples (M3.1.1.1).
+
+For each result of a sample, the reference population is the last
+SBM_HISTORY_SIZE results of the same parameter at the same sample point,
+taken from samples already in Flow Computer Update (newest sampling_date
+first, the sample itself excluded). Fewer than SBM_MIN_HISTORY values →
+"Inconclusive". Std is the population deviation.
+
+Any number of samples is validated with one grouped history query
+(ROW_NUMBER per sample point/parameter) and one NumPy pass over all checks.
+"""
+
+from collections import defaultdict
+
+import numpy as np
+from sqlalchemy import desc, func, select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services.revalidation import running_sum
+
+SBM_HISTORY_SIZE = 10
+SBM_MIN_HISTORY = 3
+SBM_BATCH_LIMIT = 500  # samples per batch request
+INCONCLUSIVE = f"Inconclusive (Need {SBM_MIN_HISTORY}+ samples)"
+
+
+def _reference_values(db: Session, samples: list[models.Sample]) -> dict[tuple, list[tuple]]:
+    """{(sample_point_id, parameter): [(sample pk, value), ...]} newest first.
+
+    Each point keeps SBM_HISTORY_SIZE rows plus one per requested sample there,
+    so excluding the sample being validated still leaves a full window.
+    """
+    wanted = defaultdict(set)
+    requested = defaultdict(int)
+    for sample in samples:
+        requested[sample.sample_point_id] += 1
+        wanted[sample.sample_point_id].update(r.parameter for r in sample.results)
+    parameters = set().union(*wanted.values()) if wanted else set()
+    if not parameters:
+        return {}
+
+    row_number = func.row_number().over(
+        partition_by=(models.Sample.sample_point_id, models.SampleResult.parameter),
+        order_by=(desc(models.Sample.sampling_date), desc(models.SampleResult.id)),
+    ).label("rn")
+    ranked = (
+        select(
+            models.Sample.sample_point_id,
+            models.SampleResult.parameter,
+            models.SampleResult.value,
+            models.Sample.id.label("sample_pk"),
+            row_number,
+        )
+        .join(models.Sample, models.SampleResult.sample_id == models.Sample.id)
+        .where(
+            models.Sample.sample_point_id.in_(list(wanted)),
+            models.SampleResult.parameter.in_(parameters),
+            models.Sample.status == models.SampleStatus.FLOW_COMPUTER_UPDATE.value,
+        )
+        .subquery()
+    )
+    rows = db.execute(
+        select(ranked)
+        .where(ranked.c.rn <= SBM_HISTORY_SIZE + max(requested.values()))
+        .order_by(ranked.c.sample_point_id, ranked.c.parameter, ranked.c.rn)
+    ).all()
+
+    reference = defaultdict(list)
+    for row in rows:
+        if row.rn <= SBM_HISTORY_SIZE + requested[row.sample_point_id]:
+            reference[(row.sample_point_id, row.parameter)].append((row.sample_pk, row.value))
+    return reference
+
+
+def validate_samples(db: Session, samples: list[models.Sample]) -> dict[int, dict]:
+    """SBM verdict per sample: {sample.id: {sample_id, overall_status, parameters}}."""
+    reference = _reference_values(db, samples)
+
+    checks = [(sample, result) for sample in samples for result in sample.results]
+    windows = np.full((len(checks), SBM_HISTORY_SIZE), np.nan)
+    for i, (sample, result) in enumerate(checks):
+        values = [
+            value for sample_pk, value in reference.get((sample.sample_point_id, result.parameter), [])
+            if sample_pk != sample.id
+        ][:SBM_HISTORY_SIZE]
+        windows[i, :len(values)] = values
+
+    # Sums run left to right (newest first), matching the per-sample Python loop
+    present = ~np.isnan(windows)
+    n = present.sum(axis=1)
+    avg = running_sum(np.where(present, windows, 0.0)) / np.maximum(n, 1)
+    deviations = np.where(present, windows - avg[:, None], 0.0)
+    std = np.sqrt(running_sum(deviations ** 2) / np.maximum(n, 1))
+    current = np.array([result.value for _, result in checks], dtype=float)
+    within = (avg - 2 * std <= current) & (current <= avg + 2 * std)
+
+    summaries = {s.id: {"sample_id": s.sample_id, "overall_status": None, "parameters": []} for s in samples}
+    for i, (sample, result) in enumerate(checks):
+        if n[i] < SBM_MIN_HISTORY:
+            entry = {
+                "parameter": result.parameter,
+                "status": INCONCLUSIVE,
+                "avg": float(avg[i]) if n[i] else 0,
+                "std": 0,
+            }
+        else:
+            mean, sigma = float(avg[i]), float(std[i])
+            entry = {
+                "parameter": result.parameter,
+                "status": "Pass" if within[i] else "Fail",
+                "current": result.value,
+                "avg": mean,
+                "std": sigma,
+                "range": [mean - 2 * sigma, mean + 2 * sigma],
+            }
+        summaries[sample.id]["parameters"].append(entry)
+
+    for summary in summaries.values():
+        summary["overall_status"] = (
+            "Approved" if all(p["status"] != "Fail" for p in summary["parameters"]) else "Reproved"
+        )
+    return summaries
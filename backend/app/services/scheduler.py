@@ -0,0 +1,330 @@
+"""
+Scheduler — In-process background jobs with a DB lease per job.
+
+Every worker runs a small loop (one daemon thread, SCHEDULER_TICK_SECONDS)
+that tries to run each due job. A run starts only after the worker claims
+the job's scheduler_leases row with a conditional UPDATE — lease free or
+expired, next_run_at reached — so across any number of replicas each job
+runs on one worker at a time, and the cadence is shared: the winner sets
+next_run_at = finish + interval for everyone (finish + SCHEDULER_RETRY_SECONDS,
+300 by default, after a failed run).
+
+Jobs (interval env var in seconds, 0 disables the job):
+  sla_scan            SCHEDULER_SLA_SCAN_SECONDS (3600)          check-slas scan
+  alert_recheck       SCHEDULER_ALERT_RECHECK_SECONDS (86400)    Alert.run_recheck
+  calibration_sweep   SCHEDULER_CALIBRATION_SWEEP_SECONDS (86400) due-date sweep
+
+Each run is recorded in job_runs (duration, result summary, error); the
+newest SCHEDULER_HISTORY_SIZE runs per job are kept. While a job runs, a side
+thread renews its lease every SCHEDULER_LEASE_RENEW_SECONDS (a third of
+SCHEDULER_LEASE_SECONDS by default), so long runs keep it; a worker that dies
+mid-run stops renewing and frees the job when its lease expires. A run whose
+lease was lost anyway (e.g. a stalled worker) is stopped at its next commit.
+SCHEDULER_ENABLED=false keeps the loop off (the API can still trigger runs).
+"""
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from collections.abc import Callable
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from prometheus_client import Counter, Histogram
+from sqlalchemy import event, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..database import SessionLocal
+from ..metrics import LATENCY_BUCKETS, registry
+from . import sla_scan
+from .alerts_service import AlertsService
+from .calibration_service import CalibrationService
+
+logger = logging.getLogger("mmt.scheduler")
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").strip().lower() in ("1", "true", "yes")
+SCHEDULER_TICK_SECONDS = float(os.getenv("SCHEDULER_TICK_SECONDS", "30"))
+SCHEDULER_LEASE_SECONDS = float(os.getenv("SCHEDULER_LEASE_SECONDS", "600"))
+SCHEDULER_LEASE_RENEW_SECONDS = float(os.getenv("SCHEDULER_LEASE_RENEW_SECONDS", str(SCHEDULER_LEASE_SECONDS / 3)))
+SCHEDULER_HISTORY_SIZE = int(os.getenv("SCHEDULER_HISTORY_SIZE", "200"))
+# A failed run is retried after this delay (capped at the job's interval)
+SCHEDULER_RETRY_SECONDS = float(os.getenv("SCHEDULER_RETRY_SECONDS", "300"))
+
+# Identifies this worker in scheduler_leases / job_runs
+HOLDER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+RUNS = Counter(
+    "mmt_scheduler_job_runs_total", "Scheduler job runs by outcome",
+    ["job", "status"], registry=registry,
+)
+DURATION = Histogram(
+    "mmt_scheduler_job_duration_seconds", "Scheduler job run time",
+    ["job"], buckets=(*LATENCY_BUCKETS, 60.0, 300.0), registry=registry,
+)
+
+
+@dataclass(frozen=True)
+class Job:
+    name: str
+    run: Callable[[Session, "Job"], dict]
+    interval_seconds: float
+    description: str = ""
+
+
+def _interval(env: str, default: int) -> float:
+    return float(os.getenv(env, str(default)))
+
+
+JOBS = {job.name: job for job in (
+    Job(
+        "sla_scan",
+        lambda db, job: {"alerts_created": sla_scan.check_sampling_slas(db)},
+        _interval("SCHEDULER_SLA_SCAN_SECONDS", 3600),
+        "Lab Report Overdue / Validation Pending alerts for active samples",
+    ),
+    Job(
+        "alert_recheck",
+        # Alerts acknowledged less than one cycle ago wait for the next run
+        lambda db, job: AlertsService.recheck_alerts(db, min_age=timedelta(seconds=job.interval_seconds)),
+        _interval("SCHEDULER_ALERT_RECHECK_SECONDS", 86400),
+        "Reopen acknowledged alerts (run_recheck) whose condition still holds",
+    ),
+    Job(
+        "calibration_sweep",
+        lambda db, job: CalibrationService.sweep_overdue_tasks(db),
+        _interval("SCHEDULER_CALIBRATION_SWEEP_SECONDS", 86400),
+        "Mark calibration tasks past due_date Overdue and alert",
+    ),
+)}
+
+
+# --- Lease ---
+
+def _ensure_lease(db: Session, name: str) -> None:
+    if db.get(models.SchedulerLease, name) is None:
+        try:
+            db.add(models.SchedulerLease(job_name=name))
+            db.commit()
+        except IntegrityError:
+            db.rollback()  # another worker created it first
+
+
+def acquire(db: Session, job: Job, now: datetime, force: bool = False) -> bool:
+    """Claim the job's lease; `force` ignores next_run_at (manual runs)."""
+    _ensure_lease(db, job.name)
+    lease = models.SchedulerLease
+    stmt = (
+        update(lease)
+        .where(lease.job_name == job.name, or_(lease.holder.is_(None), lease.expires_at < now))
+        .values(holder=HOLDER, expires_at=now + timedelta(seconds=SCHEDULER_LEASE_SECONDS))
+        .execution_options(synchronize_session=False)
+    )
+    if not force:
+        stmt = stmt.where(or_(lease.next_run_at.is_(None), lease.next_run_at <= now))
+    claimed = db.execute(stmt).rowcount == 1
+    db.commit()
+    return claimed
+
+
+def renew(db: Session, job: Job, now: datetime) -> bool:
+    """Extend this worker's lease by SCHEDULER_LEASE_SECONDS; False if it no longer holds it."""
+    lease = models.SchedulerLease
+    renewed = db.execute(
+        update(lease)
+        .where(lease.job_name == job.name, lease.holder == HOLDER)
+        .values(expires_at=now + timedelta(seconds=SCHEDULER_LEASE_SECONDS))
+        .execution_options(synchronize_session=False)
+    ).rowcount == 1
+    db.commit()
+    return renewed
+
+
+class LeaseLostError(RuntimeError):
+    """The job's lease expired or was taken over by another worker mid-run."""
+
+
+@contextmanager
+def _keep_lease(db: Session, job: Job):
+    """Renew the lease from a side thread, on its own session, until the block exits.
+
+    Once a renewal finds the lease gone, every further commit on `db` raises
+    LeaseLostError (so the job's remaining work is rolled back), as does
+    leaving the block, so nothing else is committed for a run that another
+    worker may now be repeating.
+    """
+    done = threading.Event()
+    lost = threading.Event()
+
+    def _beat():
+        while not done.wait(SCHEDULER_LEASE_RENEW_SECONDS):
+            renew_db = Session(bind=db.get_bind())
+            try:
+                if not renew(renew_db, job, datetime.utcnow()):
+                    logger.warning("Scheduler job %s lost its lease mid-run; stopping it", job.name)
+                    lost.set()
+                    return
+            except Exception:
+                logger.exception("Scheduler lease renewal failed for %s", job.name)
+            finally:
+                renew_db.close()
+
+    def _refuse_commit(session):
+        if lost.is_set():
+            raise LeaseLostError(f"Scheduler job {job.name} lost its lease")
+
+    event.listen(db, "before_commit", _refuse_commit)
+    beat = threading.Thread(target=_beat, name=f"mmt-scheduler-lease-{job.name}", daemon=True)
+    beat.start()
+    try:
+        yield
+        _refuse_commit(db)
+    finally:
+        done.set()
+        beat.join()
+        event.remove(db, "before_commit", _refuse_commit)
+
+
+def release(db: Session, job: Job, finished: datetime, failed: bool = False) -> None:
+    """Free the lease; the next run is one interval away, or SCHEDULER_RETRY_SECONDS after a failure."""
+    delay = min(SCHEDULER_RETRY_SECONDS, job.interval_seconds) if failed else job.interval_seconds
+    lease = models.SchedulerLease
+    db.execute(
+        update(lease)
+        .where(lease.job_name == job.name, lease.holder == HOLDER)
+        .values(holder=None, expires_at=None, next_run_at=finished + timedelta(seconds=delay))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def _prune_history(db: Session, name: str) -> None:
+    cutoff = (
+        db.query(models.JobRun.id)
+        .filter(models.JobRun.job_name == name)
+        .order_by(models.JobRun.id.desc())
+        .offset(SCHEDULER_HISTORY_SIZE - 1)
+        .limit(1)
+        .scalar()
+    )
+    if cutoff is not None:
+        db.query(models.JobRun).filter(
+            models.JobRun.job_name == name, models.JobRun.id < cutoff
+        ).delete(synchronize_session=False)
+        db.commit()
+
+
+# --- Runs ---
+
+def run_job(db: Session, name: str, trigger: str = "schedule", force: bool = False) -> models.JobRun | None:
+    """Run one job if its lease can be claimed; returns the JobRun, or None when not due / busy.
+
+    Raises:
+        KeyError: If the job name is unknown.
+    """
+    job = JOBS[name]
+    if not acquire(db, job, datetime.utcnow(), force=force):
+        return None
+
+    run = models.JobRun(job_name=name, holder=HOLDER, trigger=trigger, started_at=datetime.utcnow())
+    db.add(run)
+    db.commit()
+
+    started = time.perf_counter()
+    try:
+        with _keep_lease(db, job):
+            result = job.run(db, job)
+        run.status, run.result = "success", json.dumps(result, default=str)
+    except Exception as e:
+        db.rollback()
+        logger.exception("Scheduler job %s failed", name)
+        run.status, run.error = "error", f"{type(e).__name__}: {e}"
+    elapsed = time.perf_counter() - started
+
+    run.finished_at = datetime.utcnow()
+    run.duration_ms = round(elapsed * 1000, 3)
+    db.commit()
+    release(db, job, run.finished_at, failed=run.status == "error")
+    _prune_history(db, name)
+    RUNS.labels(job=name, status=run.status).inc()
+    DURATION.labels(job=name).observe(elapsed)
+    return run
+
+
+def run_due_jobs(session_factory=SessionLocal) -> None:
+    """One scheduler tick: run every enabled job whose lease this worker can claim."""
+    for job in JOBS.values():
+        if job.interval_seconds <= 0:
+            continue
+        db = session_factory()
+        try:
+            run_job(db, job.name)
+        except Exception:
+            # Lease/history bookkeeping failed (DB down): try again next tick
+            logger.exception("Scheduler tick failed for %s", job.name)
+        finally:
+            db.close()
+
+
+def job_status(db: Session) -> list:
+    """Lease state, last run, last success and last error for every job."""
+    leases = {lease.job_name: lease for lease in db.query(models.SchedulerLease)}
+    statuses = []
+    for job in JOBS.values():
+        runs = db.query(models.JobRun).filter(models.JobRun.job_name == job.name)
+        last = runs.order_by(models.JobRun.id.desc()).first()
+        last_success = runs.filter(models.JobRun.status == "success").order_by(models.JobRun.id.desc()).first()
+        last_error = runs.filter(models.JobRun.status == "error").order_by(models.JobRun.id.desc()).first()
+        lease = leases.get(job.name)
+        statuses.append({
+            "name": job.name,
+            "description": job.description,
+            "interval_seconds": job.interval_seconds,
+            "enabled": job.interval_seconds > 0,
+            "next_run_at": lease.next_run_at if lease else None,
+            "holder": lease.holder if lease else None,
+            "lease_expires_at": lease.expires_at if lease else None,
+            "last_run": last,
+            "last_success_at": last_success.finished_at if last_success else None,
+            "last_error": last_error.error if last_error else None,
+            "last_error_at": last_error.finished_at if last_error else None,
+        })
+    return statuses
+
+
+# --- Background loop ---
+
+_stop = threading.Event()
+_thread: threading.Thread | None = None
+
+
+def _loop() -> None:
+    while not _stop.is_set():
+        run_due_jobs()
+        _stop.wait(SCHEDULER_TICK_SECONDS)
+
+
+def start() -> None:
+    """Start the scheduler thread (app startup); no-op when disabled or running."""
+    global _thread
+    if not SCHEDULER_ENABLED or (_thread is not None and _thread.is_alive()):
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_loop, name="mmt-scheduler", daemon=True)
+    _thread.start()
+    logger.info("Scheduler started as %s", HOLDER)
+
+
+def stop(timeout: float = 10.0) -> None:
+    """Stop the loop (app shutdown); a run in progress finishes first, up to `timeout`."""
+    global _thread
+    _stop.set()
+    if _thread is not None:
+        _thread.join(timeout)
+        _thread = None
@@ -165,8 +165,88 @@ SLA_MATRIX: Dict[Tuple[str, str, str], dict] = {
     }
 }
 
+import hashlib
+import os
+import time
+
 from sqlalchemy.orm import Session
 from app import models
+from app.services.snapshot_cache import SnapshotCache
+
+SLA_CACHE_TTL_SECONDS = float(os.getenv("SLA_CACHE_TTL_SECONDS", "60"))
+
+_TYPE_ALIASES = {"Cro": "Chromatography", "Pvt": "PVT"}
+
+
+def normalize_key(classification: str, analysis_type: str, local: str, status_variation: str = "Any") -> tuple:
+    """(classification, type, local, status_variation) as stored in the matrix: title case, CRO/PVT aliased."""
+    c = classification.strip().title() if classification else "Fiscal"
+    t = analysis_type.strip().title() if analysis_type else "Chromatography"
+    l = local.strip().title() if local else "Onshore"
+    sv = status_variation.strip().title() if status_variation else "Any"
+    return c, _TYPE_ALIASES.get(t, t), l, sv
+
+
+def _rule_to_dict(rule) -> dict:
+    return {
+        "interval_days": rule.interval_days,
+        "disembark_days": rule.disembark_days,
+        "lab_days": rule.lab_days,
+        "report_days": rule.report_days,
+        "fc_days": rule.fc_days,
+        "fc_is_business_days": bool(rule.fc_is_business_days),
+        "reproval_reschedule_days": rule.reproval_reschedule_days,
+        "needs_validation": bool(rule.needs_validation),
+        "status_variation": rule.status_variation or "Any",
+    }
+
+
+def _matrix_to_dict(cfg: dict) -> dict:
+    cfg = dict(cfg)
+    cfg.setdefault("reproval_reschedule_days", None)
+    cfg.setdefault("status_variation", "Any")
+    return cfg
+
+
+def _load_rules(db: Session) -> dict:
+    """{(classification, type, local, status_variation): config}, DB rules over SLA_MATRIX."""
+    index = {}
+    # Lowest id wins, like the .first() lookups this replaces
+    for rule in db.query(models.SLARule).order_by(models.SLARule.id).all():
+        key = (rule.classification, rule.analysis_type, rule.local, rule.status_variation)
+        index.setdefault(key, _rule_to_dict(rule))
+    for (c, t, l), cfg in SLA_MATRIX.items():
+        index.setdefault((c, t, l, "Any"), _matrix_to_dict(cfg))
+    return index
+
+
+class SLARuleIndex(SnapshotCache):
+    """Versioned in-process index of SLARule rows merged over SLA_MATRIX.
+
+    One dict per database, built with a single query. SLA_MATRIX rows are
+    filed under status_variation "Any" unless a DB rule already owns that
+    key, so a lookup is at most two dict probes. Rebuilt when an SLARule is
+    written through the ORM (this covers the /api/config/sla-rules
+    endpoints) or after SLA_CACHE_TTL_SECONDS.
+    """
+
+    def __init__(self, ttl_seconds: float = SLA_CACHE_TTL_SECONDS, clock=time.monotonic):
+        super().__init__(models.SLARule, _load_rules, ttl_seconds, clock)
+
+    def get(self, db: Session, key: tuple) -> Optional[dict]:
+        index = self.snapshot(db)
+        cfg = index.get(key) or index.get(key[:3] + ("Any",))
+        return dict(cfg) if cfg else None
+
+    def fingerprint(self, db: Session) -> str:
+        """Digest of the merged rules; changes whenever any SLA deadline does."""
+        index = self.snapshot(db)
+        entries = sorted((repr(key), repr(sorted(cfg.items()))) for key, cfg in index.items())
+        return hashlib.sha1(repr(entries).encode()).hexdigest()
+
+
+sla_rules = SLARuleIndex()
+
 
 def get_sla_config(db: Session, classification: str, analysis_type: str, local: str, status_variation: str = "Any") -> Optional[dict]:
     """Returns the SLA configuration from DB (SLARule) or fallback matrix if not found.
@@ -175,61 +255,8 @@ def get_sla_config(db: Session, classification: str, analysis_type: str, local:
       1. Exact match: (classification, type, local, status_variation) in DB
       2. Generic match: (classification, type, local, 'Any') in DB
       3. Legacy fallback: hardcoded SLA_MATRIX dict
+
+    Served from the in-memory SLARuleIndex; returns None for unknown combinations.
     """
-    # Standardize inputs
-    c = classification.strip().title() if classification else "Fiscal"
-    t = analysis_type.strip().title() if analysis_type else "Chromatography"
-    l = local.strip().title() if local else "Onshore"
-    sv = status_variation.strip().title() if status_variation else "Any"
-    
-    # Aliases
-    if t == "Cro":
-        t = "Chromatography"
-    elif t == "Pvt":
-        t = "PVT"
-
-    def _rule_to_dict(rule):
-        return {
-            "interval_days": rule.interval_days,
-            "disembark_days": rule.disembark_days,
-            "lab_days": rule.lab_days,
-            "report_days": rule.report_days,
-            "fc_days": rule.fc_days,
-            "fc_is_business_days": bool(rule.fc_is_business_days),
-            "reproval_reschedule_days": rule.reproval_reschedule_days,
-            "needs_validation": bool(rule.needs_validation),
-            "status_variation": rule.status_variation or "Any",
-        }
-
-    # 1. Exact match in Database (with status_variation)
-    rule = db.query(models.SLARule).filter(
-        models.SLARule.classification == c,
-        models.SLARule.analysis_type == t,
-        models.SLARule.local == l,
-        models.SLARule.status_variation == sv
-    ).first()
-    if rule:
-        return _rule_to_dict(rule)
-
-    # 2. Generic fallback: status_variation == 'Any'
-    if sv != "Any":
-        rule = db.query(models.SLARule).filter(
-            models.SLARule.classification == c,
-            models.SLARule.analysis_type == t,
-            models.SLARule.local == l,
-            models.SLARule.status_variation == "Any"
-        ).first()
-        if rule:
-            return _rule_to_dict(rule)
-
-    # 3. Fallback to Hardcoded Matrix
-    key = (c, t, l)
-    if key in SLA_MATRIX:
-        cfg = dict(SLA_MATRIX[key])
-        cfg.setdefault("reproval_reschedule_days", None)
-        cfg.setdefault("status_variation", "Any")
-        return cfg
-        
-    # Provide None for unknown combinations
-    return None
+    return sla_rules.get(db, normalize_key(classification, analysis_type, local, status_variation))
 
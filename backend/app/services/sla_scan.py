@@ -0,0 +1,181 @@
+"""
+SLA Scan — Incremental lab report / validation overdue alerts (M3).
+
+A sample's SLA state only changes when its step or dates change, or when
+the calendar crosses the step's deadline:
+
+  - "Sample" status, sampling_date + report_days → Lab Report Overdue
+  - "Report issue" status, report_issue_date + fc_days → Validation Pending
+
+That deadline is kept on the sample as sla_check_date, recomputed by
+update_sample_status / override_due_date (refresh_sla_check). Each cycle
+reads only the samples with sla_check_date <= today (indexed range scan),
+creates the missing alerts with one executemany INSERT and clears their
+check date. The cleared date is the per-sample watermark: a sample is read
+again only once its step or dates change. There is deliberately no global
+"evaluated through" lower bound, since override_due_date can move a
+deadline into the past and such a sample must still be picked up.
+
+The sla_watermarks row keeps a fingerprint of the SLA rules: on the first
+run, when the rules change, or with full=True every active sample's check
+date is recomputed first (set-based, one config lookup per
+(meter classification, type, local)).
+
+An alert is never duplicated for the same (sample_id, type), acknowledged
+or not.
+"""
+
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import and_, bindparam, case, select, update
+from sqlalchemy.orm import Session
+
+from app import models
+from app.models import AlertSeverity, SampleStatus
+from app.services.sla_matrix import get_sla_config, sla_rules
+
+LAB_REPORT_OVERDUE = "Lab Report Overdue"
+VALIDATION_PENDING = "Validation Pending"
+WATERMARK = "sla_scan"
+
+# status → (date column the SLA runs from, SLA config key, alert type)
+_STEPS = {
+    SampleStatus.SAMPLE.value: (models.Sample.sampling_date, "report_days", LAB_REPORT_OVERDUE),
+    SampleStatus.REPORT_ISSUE.value: (models.Sample.report_issue_date, "fc_days", VALIDATION_PENDING),
+}
+
+
+def _check_date(cfg: dict | None, status: str, day: date | None) -> date | None:
+    step = _STEPS.get(status)
+    if step is None or day is None or not cfg or cfg.get(step[1]) is None:
+        return None
+    return day + timedelta(days=cfg[step[1]])
+
+
+def refresh_sla_check(db: Session, sample: models.Sample) -> None:
+    """Recompute sample.sla_check_date after its status, dates or SLA inputs changed (no commit)."""
+    step = _STEPS.get(sample.status)
+    day = getattr(sample, step[0].key) if step else None
+    cfg = None
+    if day is not None:
+        classification = sample.meter.classification if sample.meter and sample.meter.classification else "Fiscal"
+        cfg = get_sla_config(db, classification, sample.type, sample.local)
+    sample.sla_check_date = _check_date(cfg, sample.status, day)
+
+
+def _step_case(pick):
+    return case(*((models.Sample.status == status, pick(step)) for status, step in _STEPS.items()))
+
+
+def _rebuild_check_dates(db: Session) -> None:
+    """Recompute sla_check_date for every active sample from the current rules.
+
+    Samples that already have their step's alert need no check; only rows
+    whose value changes are written.
+    """
+    rows = db.execute(
+        select(
+            models.Sample.id,
+            models.Sample.status,
+            _step_case(lambda step: step[0]),
+            models.Sample.sla_check_date,
+            models.Alert.id,
+            models.InstrumentTag.classification,
+            models.Sample.type,
+            models.Sample.local,
+        )
+        .outerjoin(models.InstrumentTag, models.Sample.meter_id == models.InstrumentTag.id)
+        .outerjoin(models.Alert, and_(
+            models.Alert.tag_number == models.Sample.sample_id,
+            models.Alert.type == _step_case(lambda step: step[2]),
+        ))
+        .where(models.Sample.status.in_(list(_STEPS)))
+    ).all()
+
+    configs = {}
+    params = []
+    for sample_id, status, day, current, alert_id, *combo in rows:
+        combo = tuple(combo)
+        if combo not in configs:
+            configs[combo] = get_sla_config(db, combo[0] or "Fiscal", combo[1], combo[2])
+        check = None if alert_id is not None else _check_date(configs[combo], status, day)
+        if check != current:
+            params.append({"_id": sample_id, "_check": check})
+
+    table = models.Sample.__table__
+    # Samples that left the watched steps outside update_sample_status
+    db.execute(
+        update(table)
+        .where(table.c.sla_check_date.isnot(None), table.c.status.notin_(list(_STEPS)))
+        .values(sla_check_date=None)
+    )
+    if params:
+        db.execute(
+            update(table).where(table.c.id == bindparam("_id")).values(sla_check_date=bindparam("_check")),
+            params,
+        )
+
+
+def check_sampling_slas(db: Session, today: date | None = None, full: bool = False) -> int:
+    """Create the missing SLA alerts for samples that came due; returns how many were created (commits)."""
+    today = today or date.today()
+    watermark = db.get(models.SLAWatermark, WATERMARK)
+    if watermark is None:
+        watermark = models.SLAWatermark(name=WATERMARK)
+        db.add(watermark)
+    fingerprint = sla_rules.fingerprint(db)
+    if full or watermark.rules_fingerprint != fingerprint:
+        _rebuild_check_dates(db)
+
+    due = and_(
+        models.Sample.sla_check_date <= today,
+        models.Sample.status.in_(list(_STEPS)),
+    )
+    rows = db.execute(select(
+        models.Sample.sample_id,
+        models.Sample.status,
+        _step_case(lambda step: step[0]),
+        models.Sample.sla_check_date,
+        models.SamplePoint.id,
+        models.SamplePoint.fpso_name,
+    ).outerjoin(
+        models.SamplePoint, models.Sample.sample_point_id == models.SamplePoint.id,
+    ).outerjoin(models.Alert, and_(
+        # Anti-join: samples that already have the alert for their step never leave the DB
+        models.Alert.tag_number == models.Sample.sample_id,
+        models.Alert.type == _step_case(lambda step: step[2]),
+    )).where(due, models.Alert.id.is_(None))).all()
+
+    now = datetime.utcnow()
+    alerts = []
+    for sample_id, status, day, check_date, point_id, fpso_name in rows:
+        kind = _STEPS[status][2]
+        days = (check_date - day).days
+        if kind == LAB_REPORT_OVERDUE:
+            severity = AlertSeverity.HIGH.value
+            message = f"Sample {sample_id} was taken on {day} but lab report is missing (>{days} days)."
+        else:
+            severity = AlertSeverity.MEDIUM.value
+            message = f"Lab report for {sample_id} was issued on {day} but remains unvalidated (>{days} days)."
+        alerts.append({
+            "tag_number": sample_id,
+            "fpso_name": fpso_name if point_id is not None else "Unknown",
+            "severity": severity,
+            "type": kind,
+            "title": kind,
+            "message": message,
+            "acknowledged": 0,
+            "created_at": now,
+        })
+
+    if alerts:
+        # Core executemany: no ORM identity bookkeeping for rows nobody reads back
+        db.execute(models.Alert.__table__.insert(), alerts)
+    # Evaluated: nothing left to check until the sample's step or dates change
+    db.execute(
+        update(models.Sample).where(due).values(sla_check_date=None)
+        .execution_options(synchronize_session=False)
+    )
+    watermark.rules_fingerprint = fingerprint
+    db.commit()
+    return len(alerts)
@@ -0,0 +1,90 @@
+"""
+Snapshot Cache — Versioned in-process snapshots of small configuration tables.
+
+M11 parameters, SLA rules and holidays are read on hot paths but written
+rarely. A SnapshotCache loads everything it needs with one `loader(db)` call
+per database and serves the result from memory until:
+  - a row of the watched model is inserted/updated/deleted through the ORM
+    and the session commits (the session hooks below bump the version), or
+  - `ttl_seconds` elapses (covers writes made by other workers or raw SQL).
+
+A session that has flushed uncommitted changes to the watched model gets a
+fresh load of its own, which is never published to other sessions.
+"""
+
+import threading
+import time
+import weakref
+from collections.abc import Callable
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# session.info key: caches whose model this session flushed changes to
+_CHANGED = "snapshot_caches_changed"
+
+_caches: "weakref.WeakSet[SnapshotCache]" = weakref.WeakSet()
+
+
+class SnapshotCache:
+    """Per-database snapshot of `loader(db)`, invalidated by ORM writes to `model`."""
+
+    def __init__(self, model: type, loader: Callable[[Session], Any], ttl_seconds: float, clock=time.monotonic):
+        self.model = model
+        self.loader = loader
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.version = 0
+        # bind → (version, loaded_at, snapshot)
+        self._snapshots = {}
+        _caches.add(self)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.version += 1
+            self._snapshots.clear()
+
+    def _has_pending_writes(self, db: Session) -> bool:
+        return self in db.info.get(_CHANGED, ())
+
+    def snapshot(self, db: Session) -> Any:
+        if self._has_pending_writes(db):
+            return self.loader(db)
+        bind = db.get_bind()
+        now = self._clock()
+        with self._lock:
+            version = self.version
+            snap = self._snapshots.get(bind)
+            if snap and snap[0] == version and now - snap[1] < self.ttl_seconds:
+                return snap[2]
+
+        value = self.loader(db)
+        with self._lock:
+            # Don't publish a snapshot that an invalidation raced past, nor
+            # one that autoflushed this session's uncommitted writes
+            if self.version == version and not self._has_pending_writes(db):
+                self._snapshots[bind] = (version, now, value)
+        return value
+
+
+# --- Invalidation on ORM writes ---
+
+@event.listens_for(Session, "after_flush")
+def _track_writes(session, flush_context):
+    written = {type(obj) for obj in (*session.new, *session.dirty, *session.deleted)}
+    changed = [cache for cache in list(_caches) if cache.model in written]
+    if changed:
+        session.info.setdefault(_CHANGED, set()).update(changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    for cache in session.info.pop(_CHANGED, ()):
+        cache.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session):
+    session.info.pop(_CHANGED, None)
@@ -8,12 +8,15 @@ Rules:
 
 import math
 from dataclasses import dataclass, field
-from typing import List, Optional
+from datetime import datetime
+from typing import Dict, List, Optional
 
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, func, select
 
 from app import models
+from app.services import rolling_stats
+from app.services.config_cache import config_cache
 from app.services.pdf_parser import PVTResult, CROResult
 
 # Default Hard Limits for Safety/Process Compliance (If not found in M11)
@@ -56,45 +59,181 @@ class ValidationResult:
         return sum(1 for c in self.checks if c.status == "fail")
 
 
-def _get_parameter_history(
+def _get_parameter_histories(
     db: Session,
     sample_point_id: int,
-    parameter: str,
+    parameters: List[str],
     exclude_sample_id: Optional[int] = None,
     limit: Optional[int] = None,
-) -> List[dict]:
-    """Query last N values of a parameter for a sample point.
-    
-    Returns list of dicts with keys: value, date, sample_id
+    fpso: Optional[str] = None,
+) -> Dict[str, List[dict]]:
+    """Last N values of several parameters for a sample point, in one query.
+
+    ROW_NUMBER() OVER (PARTITION BY parameter ORDER BY created_at DESC) keeps
+    the N most recent rows per parameter (SQLite ≥ 3.25 and Postgres).
+    Returns {parameter: [{value, date, sample_id}, ...]} newest first.
     """
     if limit is None:
-        limit = int(_get_config_limit(db, "HISTORY_SIZE", 10))
-    query = (
-        db.query(models.SampleResult, models.Sample)
+        limit = int(_get_config_limit(db, "HISTORY_SIZE", 10, fpso))
+    histories = {p: [] for p in parameters}
+    if not parameters:
+        return histories
+
+    row_number = func.row_number().over(
+        partition_by=models.SampleResult.parameter,
+        order_by=(desc(models.SampleResult.created_at), desc(models.SampleResult.id)),
+    ).label("rn")
+    ranked = (
+        select(
+            models.SampleResult.parameter,
+            models.SampleResult.value,
+            models.SampleResult.created_at,
+            models.Sample.sampling_date,
+            models.Sample.sample_id,
+            row_number,
+        )
         .join(models.Sample, models.SampleResult.sample_id == models.Sample.id)
-        .filter(
+        .where(
             models.Sample.sample_point_id == sample_point_id,
-            models.SampleResult.parameter == parameter,
+            models.SampleResult.parameter.in_(parameters),
         )
     )
     if exclude_sample_id:
-        query = query.filter(models.Sample.id != exclude_sample_id)
-    
-    results = (
-        query
-        .order_by(desc(models.SampleResult.created_at))
-        .limit(limit)
-        .all()
-    )
-    
-    return [
-        {
-            "value": sr.value,
-            "date": s.sampling_date.isoformat() if s.sampling_date else str(sr.created_at),
-            "sample_id": s.sample_id,
+        ranked = ranked.where(models.Sample.id != exclude_sample_id)
+    ranked = ranked.subquery()
+
+    rows = db.execute(
+        select(ranked).where(ranked.c.rn <= limit).order_by(ranked.c.parameter, ranked.c.rn)
+    ).all()
+    for row in rows:
+        histories[row.parameter].append({
+            "value": row.value,
+            "date": row.sampling_date.isoformat() if row.sampling_date else str(row.created_at),
+            "sample_id": row.sample_id,
+        })
+    return histories
+
+
+SIGMA_PARAMETERS = ("density", "rs", "fe", "relative_density_real")
+
+
+class HistoryCache:
+    """Histories shared by several reports validated together (batch ingestion).
+
+    Each sample point is read once, for all 2σ parameters, keeping
+    HISTORY_SIZE rows plus one per report of the batch at that point so that
+    excluding the sample being validated still leaves a full window.
+    Calling record() after storing each report's results makes the next
+    report see them first — the same verdicts as uploading the reports one
+    by one in that order.
+    """
+
+    def __init__(self, db: Session, reports_per_point: Dict[int, int]):
+        self.db = db
+        self.reports_per_point = reports_per_point
+        self._points = {}
+
+    def _point(self, sample_point_id: int, fpso: Optional[str]) -> Dict[str, List[dict]]:
+        if sample_point_id not in self._points:
+            size = int(_get_config_limit(self.db, "HISTORY_SIZE", 10, fpso))
+            self._points[sample_point_id] = _get_parameter_histories(
+                self.db, sample_point_id, list(SIGMA_PARAMETERS),
+                limit=size + self.reports_per_point.get(sample_point_id, 1), fpso=fpso,
+            )
+        return self._points[sample_point_id]
+
+    def get(self, sample_point_id: int, parameters: List[str], exclude_sample_id: Optional[int],
+            fpso: Optional[str] = None) -> Dict[str, List[dict]]:
+        size = int(_get_config_limit(self.db, "HISTORY_SIZE", 10, fpso))
+        excluded = self.db.get(models.Sample, exclude_sample_id) if exclude_sample_id else None
+        code = excluded.sample_id if excluded is not None else None
+        point = self._point(sample_point_id, fpso)
+        return {
+            p: [h for h in point.get(p, []) if code is None or h["sample_id"] != code][:size]
+            for p in parameters
         }
-        for sr, s in results
-    ]
+
+    def record(self, sample: models.Sample, checks: List["CheckResult"], fpso: Optional[str] = None) -> None:
+        """Make a just-stored report the newest history entry of its point."""
+        point = self._point(sample.sample_point_id, fpso)
+        date = sample.sampling_date.isoformat() if sample.sampling_date else str(datetime.utcnow())
+        for history in point.values():
+            history[:] = [h for h in history if h["sample_id"] != sample.sample_id]
+        for check in checks:
+            if check.parameter in point:
+                point[check.parameter].insert(0, {"value": check.value, "date": date, "sample_id": sample.sample_id})
+
+
+class _HistoryBatch:
+    """Histories for every parameter of one report, fetched together on first use.
+
+    Maintained rolling windows (see rolling_stats) are used when they match
+    the current HISTORY_SIZE and don't contain the sample being validated;
+    the remaining parameters fall back to one windowed history query.
+    A HistoryCache, when given, serves every parameter instead.
+    """
+
+    def __init__(self, db: Session, sample_point_id: int, parameters: List[str],
+                 exclude_sample_id: Optional[int] = None, fpso: Optional[str] = None,
+                 cache: Optional[HistoryCache] = None):
+        self.db = db
+        self.sample_point_id = sample_point_id
+        self.parameters = parameters
+        self.exclude_sample_id = exclude_sample_id
+        self.fpso = fpso
+        self.cache = cache
+        self._histories = None
+        self._stats = {}
+
+    def _load(self):
+        if self.cache is not None:
+            self._histories = self.cache.get(self.sample_point_id, self.parameters, self.exclude_sample_id, self.fpso)
+            return
+        histories, pending = {}, list(self.parameters)
+        if pending and rolling_stats.is_current(self.db):
+            history_size = int(_get_config_limit(self.db, "HISTORY_SIZE", 10, self.fpso))
+            windows = rolling_stats.load_windows(self.db, self.sample_point_id, pending)
+            for parameter, window in windows.items():
+                entries = rolling_stats.history_entries(window)
+                if window.capacity != history_size or any(e["sample_pk"] == self.exclude_sample_id for e in entries):
+                    continue
+                histories[parameter] = [
+                    {"value": e["value"], "date": e["date"], "sample_id": e["sample_id"]} for e in entries
+                ]
+                self._stats[parameter] = (window.mean, window.std)
+            pending = [p for p in pending if p not in histories]
+        if pending:
+            histories.update(_get_parameter_histories(
+                self.db, self.sample_point_id, pending, self.exclude_sample_id, fpso=self.fpso
+            ))
+        self._histories = histories
+
+    def get(self, parameter: str) -> List[dict]:
+        if self._histories is None:
+            self._load()
+        return self._histories.get(parameter, [])
+
+    def stats(self, parameter: str):
+        """(mean, std) stored with the window served for `parameter`, if any."""
+        return self._stats.get(parameter)
+
+
+def _get_parameter_history(
+    db: Session,
+    sample_point_id: int,
+    parameter: str,
+    exclude_sample_id: Optional[int] = None,
+    limit: Optional[int] = None,
+    fpso: Optional[str] = None,
+    batch: Optional[_HistoryBatch] = None,
+) -> List[dict]:
+    """Query last N values of a parameter for a sample point.
+    
+    Returns list of dicts with keys: value, date, sample_id
+    """
+    if batch is not None and limit is None and parameter in batch.parameters:
+        return batch.get(parameter)
+    return _get_parameter_histories(db, sample_point_id, [parameter], exclude_sample_id, limit, fpso)[parameter]
 
 
 def _check_2sigma(
@@ -103,6 +242,8 @@ def _check_2sigma(
     value: float,
     unit: str,
     history: List[dict],
+    fpso: Optional[str] = None,
+    stats: Optional[tuple] = None,
 ) -> CheckResult:
     """Check if a value falls within 2σ of the historical mean.
     
@@ -110,9 +251,12 @@ def _check_2sigma(
     is replicated to fill the gap.  This bootstraps an initial baseline so
     the first sample always passes (σ = 0) and subsequent samples gradually
     build real variance.
+
+    `stats` is the (mean, std) maintained for a full history window; it is
+    used as-is instead of being recomputed.
     """
-    sigma_multiplier = _get_config_limit(db, "SIGMA_MULTIPLIER", 2.0)
-    history_size = int(_get_config_limit(db, "HISTORY_SIZE", 10))
+    sigma_multiplier = _get_config_limit(db, "SIGMA_MULTIPLIER", 2.0, fpso)
+    history_size = int(_get_config_limit(db, "HISTORY_SIZE", 10, fpso))
 
     hist_values = [h["value"] for h in history]
     hist_dates  = [h["date"]  for h in history]
@@ -130,27 +274,24 @@ def _check_2sigma(
         hist_values.append(mean_for_padding)
         hist_dates.append("bootstrap")
 
-    mean = sum(hist_values) / len(hist_values)
-    variance = sum((v - mean) ** 2 for v in hist_values) / (len(hist_values) - 1)
-    std = math.sqrt(variance)
+    if stats is not None and not bootstrapped and len(history) == history_size and stats[1] is not None:
+        mean, std = stats
+    else:
+        mean = sum(hist_values) / len(hist_values)
+        variance = sum((v - mean) ** 2 for v in hist_values) / (len(hist_values) - 1)
+        std = math.sqrt(variance)
 
     lower = mean - sigma_multiplier * std
     upper = mean + sigma_multiplier * std
 
     within = lower <= value <= upper
 
-    detail_suffix = " (bootstrapped baseline)" if bootstrapped else ""
-
     return CheckResult(
         parameter=parameter,
         value=value,
         unit=unit,
         status="pass" if within else "fail",
-        detail=(
-            f"Within 2σ range [{lower:.4f} – {upper:.4f}] (μ={mean:.4f}, σ={std:.4f}){detail_suffix}"
-            if within
-            else f"Outside 2σ range [{lower:.4f} – {upper:.4f}] (μ={mean:.4f}, σ={std:.4f}){detail_suffix}"
-        ),
+        detail=_sigma_detail(within, lower, upper, mean, std, bootstrapped),
         history_mean=mean,
         history_std=std,
         lower_bound=lower,
@@ -160,14 +301,21 @@ def _check_2sigma(
     )
 
 
-def _get_config_limit(db: Session, key: str, default: float) -> float:
-    """Fetch configuration limit from M11 or use default."""
-    param = db.query(models.ConfigParameter).filter(
-        models.ConfigParameter.key == key
-    ).first()
-    if param:
+def _sigma_detail(within: bool, lower: float, upper: float, mean: float, std: float, bootstrapped: bool) -> str:
+    detail_suffix = " (bootstrapped baseline)" if bootstrapped else ""
+    return (
+        f"Within 2σ range [{lower:.4f} – {upper:.4f}] (μ={mean:.4f}, σ={std:.4f}){detail_suffix}"
+        if within
+        else f"Outside 2σ range [{lower:.4f} – {upper:.4f}] (μ={mean:.4f}, σ={std:.4f}){detail_suffix}"
+    )
+
+
+def _get_config_limit(db: Session, key: str, default: float, fpso: Optional[str] = None) -> float:
+    """Fetch configuration limit from M11 (FPSO override → GLOBAL) or use default."""
+    value = config_cache.get(db, key, fpso)
+    if value is not None:
         try:
-            return float(param.value)
+            return float(value)
         except ValueError:
             pass
     return default
@@ -193,26 +341,34 @@ def _check_hard_limit(parameter: str, value: float, unit: str, limit: float, inf
         detail=f"{parameter} = {value}{unit} is within {limit}{unit} limit",
     )
 
-def _check_o2_limit(o2_value: float, db: Session) -> CheckResult:
+def _check_o2_limit(o2_value: float, db: Session, fpso: Optional[str] = None) -> CheckResult:
     # O2 is a hard reproval limit (< 0.5%)
-    limit = _get_config_limit(db, "VALIDATION_LIMIT_O2", DEFAULT_O2_LIMIT)
+    limit = _get_config_limit(db, "VALIDATION_LIMIT_O2", DEFAULT_O2_LIMIT, fpso)
     return _check_hard_limit("o2", o2_value, "%", limit, informative=False)
 
-def _check_h2s_limit(h2s_value: float, db: Session) -> CheckResult:
+def _check_h2s_limit(h2s_value: float, db: Session, fpso: Optional[str] = None) -> CheckResult:
     # H2S is informative only
-    limit = _get_config_limit(db, "VALIDATION_LIMIT_H2S", DEFAULT_H2S_LIMIT)
+    limit = _get_config_limit(db, "VALIDATION_LIMIT_H2S", DEFAULT_H2S_LIMIT, fpso)
     return _check_hard_limit("h2s", h2s_value, "ppm", limit, informative=True)
 
-def _check_bsw_limit(bsw_value: float, db: Session) -> CheckResult:
+def _check_bsw_limit(bsw_value: float, db: Session, fpso: Optional[str] = None) -> CheckResult:
     # BSW is informative only
-    limit = _get_config_limit(db, "VALIDATION_LIMIT_BSW", DEFAULT_BSW_LIMIT)
+    limit = _get_config_limit(db, "VALIDATION_LIMIT_BSW", DEFAULT_BSW_LIMIT, fpso)
     return _check_hard_limit("bsw", bsw_value, "%", limit, informative=True)
 
 
+def _sample_fpso(sample: models.Sample) -> Optional[str]:
+    """FPSO of the sample's point, used to pick per-FPSO config overrides."""
+    sample_point = getattr(sample, "sample_point", None)
+    fpso = getattr(sample_point, "fpso_name", None)
+    return fpso if isinstance(fpso, str) else None
+
+
 def validate_pvt(
     extracted: PVTResult,
     sample: models.Sample,
     db: Session,
+    history_cache: Optional[HistoryCache] = None,
 ) -> ValidationResult:
     """Validate a PVT report against historical data.
     
@@ -226,34 +382,40 @@ def validate_pvt(
     )
     
     sample_point_id = sample.sample_point_id
+    fpso = _sample_fpso(sample)
+    batch = _HistoryBatch(
+        db, sample_point_id,
+        [p for p in ("density", "rs", "fe") if getattr(extracted, p) is not None],
+        sample.id, fpso, history_cache,
+    )
     
     # Check density (Massa específica)
     if extracted.density is not None:
-        history = _get_parameter_history(db, sample_point_id, "density", sample.id)
-        check = _check_2sigma(db, "density", extracted.density, extracted.density_unit, history)
+        history = _get_parameter_history(db, sample_point_id, "density", sample.id, fpso=fpso, batch=batch)
+        check = _check_2sigma(db, "density", extracted.density, extracted.density_unit, history, fpso=fpso, stats=batch.stats("density"))
         result.checks.append(check)
         if check.status == "fail":
             result.overall_status = "Reproved"
     
     # Check RS (Razão de Solubilidade)
     if extracted.rs is not None:
-        history = _get_parameter_history(db, sample_point_id, "rs", sample.id)
-        check = _check_2sigma(db, "rs", extracted.rs, extracted.rs_unit, history)
+        history = _get_parameter_history(db, sample_point_id, "rs", sample.id, fpso=fpso, batch=batch)
+        check = _check_2sigma(db, "rs", extracted.rs, extracted.rs_unit, history, fpso=fpso, stats=batch.stats("rs"))
         result.checks.append(check)
         if check.status == "fail":
             result.overall_status = "Reproved"
     
     # Check FE (Fator de Encolhimento)
     if extracted.fe is not None:
-        history = _get_parameter_history(db, sample_point_id, "fe", sample.id)
-        check = _check_2sigma(db, "fe", extracted.fe, extracted.fe_unit, history)
+        history = _get_parameter_history(db, sample_point_id, "fe", sample.id, fpso=fpso, batch=batch)
+        check = _check_2sigma(db, "fe", extracted.fe, extracted.fe_unit, history, fpso=fpso, stats=batch.stats("fe"))
         result.checks.append(check)
         if check.status == "fail":
             result.overall_status = "Reproved"
     
     # Check BS&W
     if extracted.bsw is not None:
-        check = _check_bsw_limit(extracted.bsw, db)
+        check = _check_bsw_limit(extracted.bsw, db, fpso)
         result.checks.append(check)
         # Note: BSW is informative only, does not set overall_status to Reproved
     
@@ -264,6 +426,7 @@ def validate_cro(
     extracted: CROResult,
     sample: models.Sample,
     db: Session,
+    history_cache: Optional[HistoryCache] = None,
 ) -> ValidationResult:
     """Validate a CRO (Chromatography) report.
     
@@ -279,19 +442,22 @@ def validate_cro(
     )
     
     sample_point_id = sample.sample_point_id
+    fpso = _sample_fpso(sample)
+    batch = _HistoryBatch(db, sample_point_id, ["relative_density_real"], sample.id, fpso, history_cache)
     
     # Check O₂ hard limit
     if extracted.o2 is not None:
-        check = _check_o2_limit(extracted.o2, db)
+        check = _check_o2_limit(extracted.o2, db, fpso)
         result.checks.append(check)
         if check.status == "fail":
             result.overall_status = "Reproved"
     
     # Check Densidade Relativa do Gás Real (dimensionless)
     if extracted.relative_density_real is not None:
-        history = _get_parameter_history(db, sample_point_id, "relative_density_real", sample.id)
+        history = _get_parameter_history(db, sample_point_id, "relative_density_real", sample.id, fpso=fpso, batch=batch)
         check = _check_2sigma(
-            db, "relative_density_real", extracted.relative_density_real, extracted.relative_density_real_unit, history
+            db, "relative_density_real", extracted.relative_density_real, extracted.relative_density_real_unit, history,
+            fpso=fpso, stats=batch.stats("relative_density_real"),
         )
         result.checks.append(check)
         if check.status == "fail":
@@ -299,7 +465,7 @@ def validate_cro(
             
     # Check H2S
     if extracted.h2s is not None:
-        check = _check_h2s_limit(extracted.h2s, db)
+        check = _check_h2s_limit(extracted.h2s, db, fpso)
         result.checks.append(check)
         # Note: H2S is informative only, does not set overall_status to Reproved
     
@@ -310,11 +476,12 @@ def validate_report(
     extracted: PVTResult | CROResult,
     sample: models.Sample,
     db: Session,
+    history_cache: Optional[HistoryCache] = None,
 ) -> ValidationResult:
     """Main entry point — validate a parsed report."""
     if isinstance(extracted, PVTResult):
-        return validate_pvt(extracted, sample, db)
+        return validate_pvt(extracted, sample, db, history_cache)
     elif isinstance(extracted, CROResult):
-        return validate_cro(extracted, sample, db)
+        return validate_cro(extracted, sample, db, history_cache)
     else:
         raise ValueError(f"Unknown report type: {type(extracted)}")
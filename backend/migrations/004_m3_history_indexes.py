@@ -0,0 +1,57 @@
+"""
+M3 Migration: Composite indexes for sample history, 2σ validation and SLA scans
+
+    sample_results (parameter, sample_id, created_at)  — last N values per parameter/point
+    sample_results (sample_id)                         — lab results, re-upload delete
+    samples (sample_point_id, sampling_date)           — samples of a sample point
+    samples (status, due_date)                         — SLA / dashboard scans
+
+On Postgres the indexes are built CONCURRENTLY so sample_results stays
+writable while they build. `python -m app.manage migrate` creates the same
+indexes (declared on the models, also CONCURRENTLY on Postgres); this
+script is for manual rollouts and runs ANALYZE afterwards.
+"""
+
+from sqlalchemy import text
+from app.database import engine
+
+INDEXES = [
+    ("ix_sample_results_parameter_sample_created", "sample_results", "parameter, sample_id, created_at"),
+    ("ix_sample_results_sample_id", "sample_results", "sample_id"),
+    ("ix_samples_sample_point_sampling_date", "samples", "sample_point_id, sampling_date"),
+    ("ix_samples_status_due_date", "samples", "status, due_date"),
+]
+
+
+def upgrade():
+    """Create the M3 history indexes (skips those that already exist)."""
+    concurrently = "CONCURRENTLY " if engine.dialect.name == "postgresql" else ""
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for name, table, columns in INDEXES:
+            print(f"Creating {name} on {table}({columns})...")
+            conn.execute(text(f"CREATE INDEX {concurrently}IF NOT EXISTS {name} ON {table} ({columns})"))
+        for table in sorted({table for _, table, _ in INDEXES}):
+            conn.execute(text(f"ANALYZE {table}"))
+
+    print("M3 index migration completed successfully!")
+
+
+def downgrade():
+    """Drop the M3 history indexes."""
+
+    with engine.connect() as conn:
+        for name, _, _ in INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        conn.commit()
+        print("M3 index downgrade completed!")
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "downgrade":
+        downgrade()
+    else:
+        upgrade()
@@ -0,0 +1,142 @@
+"""
+Benchmark: POST /api/chemical/check-slas scan (services/sla_scan.py) on a
+throwaway database with N active samples (default 100,000).
+
+Times the first scan (check dates rebuilt for every active sample, every
+overdue sample gets an alert), an incremental one (nothing came due) and a
+forced full one. With --compare N, the previous per-sample ORM loop is run
+on a fresh N-sample database as well and both must create the same alerts.
+
+    cd backend
+    python scripts/bench_check_slas.py
+    python scripts/bench_check_slas.py --samples 20000 --compare 2000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import joinedload, sessionmaker  # noqa: E402
+
+from app import models  # noqa: E402
+from app.database import Base  # noqa: E402
+from app.models import Alert, AlertSeverity, SampleStatus  # noqa: E402
+from app.services import sla_scan  # noqa: E402
+from app.services.sla_matrix import get_sla_config  # noqa: E402
+
+CLASSIFICATIONS = ("Fiscal", "Apropriation", "Operational", "Custody Transfer", None)
+TYPES = ("Chromatography", "PVT", "Enxofre", "Viscosity", "CRO")
+LOCALS = ("Onshore", "Offshore")
+ACTIVE = (SampleStatus.SAMPLE.value, SampleStatus.REPORT_ISSUE.value)
+
+
+def populate(engine, samples: int):
+    rng = random.Random(42)
+    today = date.today()
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO instrument_tags (id, tag_number, description, classification) VALUES (?, ?, ?, ?)",
+            [(i + 1, f"BENCH-FT-{i}", "bench", c) for i, c in enumerate(CLASSIFICATIONS)],
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO sample_points (id, tag_number, description, fpso_name) VALUES (?, ?, ?, ?)",
+            [(p, f"BENCH-SP-{p}", "bench", f"FPSO Bench {p % 4}") for p in range(1, 201)],
+        )
+        rows = []
+        for i in range(1, samples + 1):
+            status = rng.choice(ACTIVE)
+            day = today - timedelta(days=rng.randint(0, 120))
+            rows.append((
+                i, f"BENCH-S-{i}", rng.randint(1, 200), rng.randint(1, len(CLASSIFICATIONS)),
+                rng.choice(TYPES), rng.choice(LOCALS), status,
+                day if status == SampleStatus.SAMPLE.value else day - timedelta(days=5),
+                day if status == SampleStatus.REPORT_ISSUE.value else None,
+            ))
+        conn.exec_driver_sql(
+            "INSERT INTO samples (id, sample_id, sample_point_id, meter_id, type, local, status, "
+            "sampling_date, report_issue_date) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+
+
+def legacy_check_slas(db):
+    """The per-sample loop check-slas ran before the set-based scan."""
+    today = date.today()
+    created = 0
+    active = db.query(models.Sample).options(
+        joinedload(models.Sample.meter), joinedload(models.Sample.sample_point),
+    ).filter(models.Sample.status.in_(ACTIVE)).all()
+    for s in active:
+        classification = s.meter.classification if s.meter and s.meter.classification else "Fiscal"
+        cfg = get_sla_config(db, classification, s.type, s.local)
+        if not cfg:
+            continue
+        if s.status == SampleStatus.SAMPLE.value and s.sampling_date:
+            days, day, kind, severity = cfg.get("report_days"), s.sampling_date, "Lab Report Overdue", AlertSeverity.HIGH
+        elif s.status == SampleStatus.REPORT_ISSUE.value and s.report_issue_date:
+            days, day, kind, severity = cfg.get("fc_days"), s.report_issue_date, "Validation Pending", AlertSeverity.MEDIUM
+        else:
+            continue
+        if days is None or day > today - timedelta(days=days):
+            continue
+        if not db.query(Alert).filter(Alert.tag_number == s.sample_id, Alert.type == kind).first():
+            db.add(Alert(tag_number=s.sample_id, fpso_name=s.sample_point.fpso_name if s.sample_point else "Unknown",
+                         severity=severity.value, type=kind, title=kind, acknowledged=0,
+                         created_at=datetime.utcnow()))
+            created += 1
+    db.commit()
+    return created
+
+
+def fresh_session(directory: str, name: str, samples: int):
+    engine = create_engine(f"sqlite:///{os.path.join(directory, name)}")
+    Base.metadata.create_all(bind=engine)
+    populate(engine, samples)
+    return sessionmaker(bind=engine)()
+
+
+def alert_keys(db):
+    return sorted(db.query(Alert.tag_number, Alert.type, Alert.fpso_name, Alert.severity).all())
+
+
+def timed(fn, db):
+    started = time.perf_counter()
+    created = fn(db)
+    return created, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--samples", type=int, default=100_000)
+    parser.add_argument("--compare", type=int, default=0, help="also run the legacy loop on this many samples")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        db = fresh_session(directory, "scan.db", args.samples)
+        created, first = timed(sla_scan.check_sampling_slas, db)
+        again, second = timed(sla_scan.check_sampling_slas, db)
+        _, full = timed(lambda session: sla_scan.check_sampling_slas(session, full=True), db)
+        print(f"{args.samples:,d} active samples: first scan {first * 1000:.0f} ms ({created:,d} alerts), "
+              f"incremental scan {second * 1000:.0f} ms ({again} alerts), full rescan {full * 1000:.0f} ms")
+        db.close()
+
+        if args.compare:
+            new_db = fresh_session(directory, "new.db", args.compare)
+            old_db = fresh_session(directory, "old.db", args.compare)
+            created_new, t_new = timed(sla_scan.check_sampling_slas, new_db)
+            created_old, t_old = timed(legacy_check_slas, old_db)
+            same = created_new == created_old and alert_keys(new_db) == alert_keys(old_db)
+            print(f"{args.compare:,d} samples: legacy {t_old * 1000:.0f} ms → set-based {t_new * 1000:.0f} ms "
+                  f"({t_old / max(t_new, 1e-9):.0f}x), alerts {'identical' if same else 'DIFFERENT'}")
+            sys.exit(0 if same else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Benchmark: query plans and timings of the M3 hot queries with/without the
+composite history indexes (migrations/004_m3_history_indexes.py).
+
+Builds a throwaway database with N sample_results (default 1,000,000),
+captures the SQL actually issued by the app code for each query, and prints
+the plan and median time before and after creating the indexes.
+
+    cd backend
+    python scripts/bench_history_indexes.py                 # SQLite temp file, 1M rows
+    python scripts/bench_history_indexes.py --rows 200000
+    python scripts/bench_history_indexes.py --url postgresql://...   # empty scratch DB!
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, desc, event  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app import models  # noqa: E402
+from app.services.validation_engine import _get_parameter_histories  # noqa: E402
+
+NEW_INDEXES = [
+    index
+    for table in (models.SampleResult.__table__, models.Sample.__table__)
+    for index in table.indexes
+    if index.name in (
+        "ix_sample_results_parameter_sample_created",
+        "ix_sample_results_sample_id",
+        "ix_samples_sample_point_sampling_date",
+        "ix_samples_status_due_date",
+    )
+]
+PARAMETERS = ("density", "rs", "fe", "o2")
+STATUSES = [s.value for s in models.SampleStatus]
+
+
+def populate(engine, rows: int, points: int):
+    rng = random.Random(42)
+    samples = rows // len(PARAMETERS)
+    start = datetime(2020, 1, 1)
+    marker = "?" if engine.dialect.name == "sqlite" else "%s"
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            f"INSERT INTO sample_points (id, tag_number, description, fpso_name) VALUES ({', '.join([marker] * 4)})",
+            [(p, f"BENCH-SP-{p}", "bench", "FPSO Bench") for p in range(1, points + 1)],
+        )
+    sample_sql = (f"INSERT INTO samples (id, sample_id, sample_point_id, type, status, sampling_date, due_date) "
+                  f"VALUES ({', '.join([marker] * 7)})")
+    result_sql = (f"INSERT INTO sample_results (id, sample_id, parameter, value, unit, created_at) "
+                  f"VALUES ({', '.join([marker] * 6)})")
+    batch = 50_000
+    result_id = 0
+    for offset in range(0, samples, batch):
+        sample_rows, result_rows = [], []
+        for sid in range(offset + 1, min(offset + batch, samples) + 1):
+            taken = start + timedelta(minutes=sid * 7)
+            sample_rows.append((
+                sid, f"BENCH-{sid}", rng.randint(1, points), "Fiscal", rng.choice(STATUSES),
+                taken.date(), (taken + timedelta(days=rng.randint(1, 30))).date(),
+            ))
+            for parameter in PARAMETERS:
+                result_id += 1
+                result_rows.append((result_id, sid, parameter, rng.gauss(850, 2), "u", taken + timedelta(days=5)))
+        with engine.begin() as conn:
+            conn.exec_driver_sql(sample_sql, sample_rows)
+            conn.exec_driver_sql(result_sql, result_rows)
+    return result_id
+
+
+def workload(session, point_id: int, sample_pk: int):
+    """The hot M3 queries, issued through the same code paths as the API."""
+    today = date.today()
+    return {
+        "2σ history (validate_pvt)": lambda: _get_parameter_histories(
+            session, point_id, ["density", "rs", "fe"], sample_pk, limit=10),
+        "parameter history endpoint": lambda: (
+            session.query(models.SampleResult, models.Sample)
+            .join(models.Sample, models.SampleResult.sample_id == models.Sample.id)
+            .filter(models.Sample.sample_point_id == point_id, models.SampleResult.parameter == "density")
+            .order_by(desc(models.SampleResult.created_at)).limit(30).all()
+        ),
+        "samples of a point by date": lambda: (
+            session.query(models.Sample.id).filter(models.Sample.sample_point_id == point_id)
+            .order_by(desc(models.Sample.sampling_date)).limit(50).all()
+        ),
+        "SLA scan (status, due_date)": lambda: (
+            session.query(models.Sample.id)
+            .filter(models.Sample.status == models.SampleStatus.REPORT_ISSUE.value, models.Sample.due_date < today)
+            .all()
+        ),
+        "lab results of a sample": lambda: (
+            session.query(models.SampleResult).filter(models.SampleResult.sample_id == sample_pk).all()
+        ),
+    }
+
+
+def capture_sql(engine, fn):
+    captured = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", _capture)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", _capture)
+    return captured[-1]
+
+
+def explain(engine, statement, parameters):
+    prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(prefix + statement, parameters).all()
+    if engine.dialect.name == "sqlite":
+        return [row[-1] for row in rows]
+    return [row[0] for row in rows]
+
+
+def run(engine, Session, point_id, sample_pk, repeat):
+    report = {}
+    session = Session()
+    try:
+        for name, fn in workload(session, point_id, sample_pk).items():
+            statement, parameters = capture_sql(engine, fn)
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                fn()
+                timings.append(time.perf_counter() - started)
+                session.expire_all()
+            report[name] = (explain(engine, statement, parameters), statistics.median(timings))
+    finally:
+        session.close()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000, help="sample_results rows")
+    parser.add_argument("--points", type=int, default=500, help="sample points")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--url", help="scratch database URL (default: temporary SQLite file)")
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.url
+    if not url:
+        tmpdir = tempfile.mkdtemp(prefix="mmt-bench-")
+        url = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    engine = create_engine(url)
+    Session = sessionmaker(bind=engine)
+
+    models.Base.metadata.create_all(bind=engine)
+    for index in NEW_INDEXES:
+        index.drop(bind=engine, checkfirst=True)
+
+    started = time.perf_counter()
+    rows = populate(engine, args.rows, args.points)
+    print(f"Loaded {rows:,} sample_results in {time.perf_counter() - started:.1f}s ({url})")
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+
+    point_id, sample_pk = 7, (rows // len(PARAMETERS)) // 2
+    before = run(engine, Session, point_id, sample_pk, args.repeat)
+
+    started = time.perf_counter()
+    for index in NEW_INDEXES:
+        index.create(bind=engine, checkfirst=True)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+    engine.dispose()  # pooled connections may keep statements prepared against the old schema
+    print(f"Created {len(NEW_INDEXES)} indexes in {time.perf_counter() - started:.1f}s\n")
+    after = run(engine, Session, point_id, sample_pk, args.repeat)
+
+    for name in before:
+        (plan_before, t_before), (plan_after, t_after) = before[name], after[name]
+        print(f"== {name}: {t_before * 1000:.1f} ms → {t_after * 1000:.1f} ms "
+              f"({t_before / max(t_after, 1e-9):.0f}x)")
+        print("   before: " + "\n           ".join(plan_before))
+        print("   after:  " + "\n           ".join(plan_after))
+        print()
+
+    engine.dispose()
+    if tmpdir:
+        for name in os.listdir(tmpdir):
+            os.remove(os.path.join(tmpdir, name))
+        os.rmdir(tmpdir)
+
+
+if __name__ == "__main__":
+    main()
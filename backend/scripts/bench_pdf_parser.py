@@ -0,0 +1,168 @@
+"""
+Benchmark: single-pass pattern table (pdf_parser.scan_text) vs the previous
+per-field re.search extraction, on the lab reports in "MMT Specifications/".
+
+Text is extracted once per PDF; only type detection + field extraction is
+timed. Outputs of both implementations are compared field by field and the
+script exits non-zero on any difference.
+
+    cd backend
+    python scripts/bench_pdf_parser.py
+    python scripts/bench_pdf_parser.py --repeat 2000 --dir /path/to/pdfs
+"""
+
+import argparse
+import dataclasses
+import glob
+import os
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fitz
+
+from app.services import pdf_parser
+from app.services.pdf_parser import CROResult, PVTResult, _parse_br_float
+
+SPECS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                         "MMT Specifications")
+
+
+# --- Previous implementation (one re.search per field), kept as the reference ---
+
+def legacy_tag_point(text):
+    m = re.search(r"(\d{3}-AP-\d{4}\s*/\s*P-\d+(?:\s*\([^)]+\))?)", text)
+    return m.group(1).strip() if m else None
+
+
+def legacy_boletim(text):
+    m = re.search(r"Boletim de Resultado de Análise N°\n(.+)", text)
+    if m:
+        value = m.group(1).strip()
+        if re.match(r"(PVT|CRO)\s", value):
+            return value
+    m2 = re.search(r"((PVT|CRO)\s+\S+/\d{2}-\d+)", text)
+    return m2.group(1).strip() if m2 else None
+
+
+def legacy_sampling_date(text):
+    m = re.search(r"FPSO\s+.*?\n(\d{2}/\d{2}/\d{4})", text)
+    if m:
+        return m.group(1)
+    m = re.search(r"Data de Receb.*?\n.*?(\d{2}/\d{2}/\d{4})", text)
+    return m.group(1) if m else None
+
+
+def legacy_detect(text):
+    if re.search(r"RGO ou RS|Fator de Encolhimento|FE\n|Massa específica", text):
+        return "PVT"
+    if re.search(r"Cromatografia|cromatografia|Composição.*Gás|Concentração\s+Molar", text, re.IGNORECASE):
+        return "CRO"
+    if re.search(r"PVT\s", text):
+        return "PVT"
+    if re.search(r"CRO\s", text):
+        return "CRO"
+    return "UNKNOWN"
+
+
+def legacy_pvt(text):
+    result = PVTResult(raw_text=text)
+    result.boletim = legacy_boletim(text)
+    result.tag_point = legacy_tag_point(text)
+    result.sampling_date = legacy_sampling_date(text)
+    m = re.search(r"Massa específica absoluta.*?\n([\d,]+)", text)
+    if m:
+        result.density = _parse_br_float(m.group(1))
+    m = re.search(r"RGO ou RS\n([\d,]+)", text)
+    if m:
+        result.rs = _parse_br_float(m.group(1))
+    m = re.search(r"\bFE\n([\d,]+)", text)
+    if m:
+        result.fe = _parse_br_float(m.group(1))
+    return result
+
+
+def legacy_cro(text):
+    result = CROResult(raw_text=text)
+    result.boletim = legacy_boletim(text)
+    result.tag_point = legacy_tag_point(text)
+    result.sampling_date = legacy_sampling_date(text)
+    m = re.search(r"O2\nOxigênio\n\w+\n([\d,]+)", text)
+    if m:
+        result.o2 = _parse_br_float(m.group(1))
+    m = re.search(r"Densidade Relativa do G[aá]s Real\n\w+\n([\d,]+)", text)
+    if m:
+        result.relative_density_real = _parse_br_float(m.group(1))
+    return result
+
+
+def legacy_extract(text):
+    report_type = legacy_detect(text)
+    if report_type == "PVT":
+        return legacy_pvt(text)
+    if report_type == "CRO":
+        return legacy_cro(text)
+    return None
+
+
+def current_extract(text):
+    try:
+        return pdf_parser._extract(text, keep_raw_text=True)
+    except ValueError:
+        return None
+
+
+def median_us(fn, text, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(text)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dir", default=SPECS_DIR, help="folder with lab report PDFs")
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.dir, "*.pdf")) + glob.glob(os.path.join(args.dir, "*.PDF")))
+    if not paths:
+        sys.exit(f"No PDFs in {args.dir}")
+
+    mismatches = 0
+    total_before = total_after = 0.0
+    for path in paths:
+        with fitz.open(path) as doc:
+            text = "".join(page.get_text() for page in doc)
+        before, after = legacy_extract(text), current_extract(text)
+        same = (dataclasses.asdict(before) if before else None) == (dataclasses.asdict(after) if after else None)
+        # The field helpers must agree too, whatever the detected type
+        same = same and all(
+            old(text) == new(text) for old, new in (
+                (legacy_pvt, pdf_parser.extract_pvt), (legacy_cro, pdf_parser.extract_cro),
+                (legacy_detect, pdf_parser.detect_report_type),
+            )
+        )
+        mismatches += not same
+
+        t_before = median_us(legacy_extract, text, args.repeat)
+        t_after = median_us(current_extract, text, args.repeat)
+        total_before += t_before
+        total_after += t_after
+        kind = after.report_type if after else "UNKNOWN"
+        print(f"{os.path.basename(path)[:60]:60s} {kind:7s} {len(text):8,d} chars  "
+              f"{t_before:8.1f} µs → {t_after:8.1f} µs ({t_before / max(t_after, 1e-9):4.1f}x)  "
+              f"{'identical' if same else 'DIFFERENT'}")
+
+    print(f"\nTotal: {total_before:.1f} µs → {total_after:.1f} µs ({total_before / max(total_after, 1e-9):.1f}x), "
+          f"{mismatches} mismatching file(s)")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,14 +13,24 @@ from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
 import sys
 import os
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+import aiosqlite
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+# Tests drive the scheduler explicitly; no background thread against the dev DB
+os.environ.setdefault("SCHEDULER_ENABLED", "false")
+# The harness user (role "HarnessAdmin") may call the admin-only endpoints
+os.environ.setdefault("AUTH_ADMIN_ROLES", "admin,HarnessAdmin")
+
 from app.main import app
-from app.database import Base, get_db
+from app.database import Base, get_db, get_async_db
 import app.models as db_models
 from app.dependencies import get_current_user
+from app import metrics
 
 # --- Skill (fastapi-pro): SQLite in-memory for ultra-fast durable tests ---
 from sqlalchemy.pool import StaticPool
@@ -43,6 +53,36 @@ def override_get_db():
         db.close()
 
 
+_async_overrides = {}
+
+
+def make_async_db_override(sync_engine):
+    """Skill (fastapi-pro): Async session override bound to a sync StaticPool engine.
+
+    The aiosqlite connection wraps the same sqlite3 connection held by the
+    sync engine, so async read endpoints see the module's in-memory data.
+    """
+    if sync_engine in _async_overrides:
+        return _async_overrides[sync_engine]
+    raw_connection = sync_engine.raw_connection().driver_connection
+
+    async def _creator():
+        return await aiosqlite.Connection(lambda: raw_connection, iter_chunk_size=64)
+
+    async_engine = create_async_engine("sqlite+aiosqlite://", async_creator=_creator, poolclass=StaticPool)
+    session_factory = async_sessionmaker(bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+    async def _override_get_async_db():
+        async with session_factory() as db:
+            yield db
+
+    _async_overrides[sync_engine] = _override_get_async_db
+    return _override_get_async_db
+
+
+override_get_async_db = make_async_db_override(engine)
+
+
 def override_get_current_user():
     """Skill (fastapi-pro): Bypass auth during integration tests."""
     return {
@@ -56,6 +96,7 @@ def override_get_current_user():
 
 # --- Apply dependency overrides ---
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_async_db
 app.dependency_overrides[get_current_user] = override_get_current_user
 
 
@@ -192,7 +233,38 @@ class HierarchyNodeFactory:
         return res.json()
 
 
+class QueryBudget:
+    """Skill (fastapi-pro): SQL query budgets per endpoint — N+1 regressions fail CI."""
+
+    @staticmethod
+    def check(response, max_queries):
+        count = int(response.headers["X-DB-Query-Count"])
+        assert count <= max_queries, f"{response.request.url.path}: {count} queries (budget {max_queries})"
+        return count
+
+    @staticmethod
+    @contextmanager
+    def block(max_queries):
+        """Budget for a direct service/endpoint call made in the test thread."""
+        with metrics.track_queries() as stats:
+            yield stats
+        assert stats.queries <= max_queries, f"{stats.queries} queries (budget {max_queries}): {stats.repeated(2)}"
+
+
 # --- Fixtures ---
+@pytest.fixture
+def query_budget(monkeypatch):
+    """Enables the X-DB-Query-Count header and returns the budget helpers."""
+    monkeypatch.setattr(metrics, "SQL_DEBUG_HEADERS", True)
+    return QueryBudget
+
+
+@pytest.fixture(scope="session")
+def async_db_override_factory():
+    """Builds get_async_db overrides for modules that use their own in-memory engine."""
+    return make_async_db_override
+
+
 @pytest.fixture(scope="module")
 def client():
     """Skill (fastapi-pro): TestClient with full DB lifecycle."""
@@ -210,6 +282,17 @@ def db_session() -> Session:
     db.close()
 
 
+@pytest.fixture(scope="module")
+def empty_db() -> Session:
+    """Session on a fresh, empty schema: no M11 parameters or SLA rules, so built-in defaults apply."""
+    empty_engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=empty_engine)
+    db = sessionmaker(bind=empty_engine)()
+    yield db
+    db.close()
+    empty_engine.dispose()
+
+
 @pytest.fixture
 def sp_factory(client):
     """Fixture that yields a SamplePoint factory bound to the test client."""
@@ -0,0 +1,62 @@
+"""
+Async read path — get_async_db + async GET endpoints.
+
+Cobre:
+ - Mapeamento de URL sync → driver async (aiosqlite / asyncpg, sslmode removido; pooler 6543 sem cache de prepared statements).
+ - Endpoints async enxergam dados gravados pelo caminho sync (write flows).
+ - /samples retorna relacionamentos aninhados (history) sem lazy-load.
+"""
+from app import database
+
+
+def test_async_url_mapping():
+    assert database._async_url("sqlite:///./mmt_mvp.db") == "sqlite+aiosqlite:///./mmt_mvp.db"
+    assert database._async_url(
+        "postgresql://u:p@db.supabase.co:5432/postgres?sslmode=require"
+    ) == "postgresql+asyncpg://u:p@db.supabase.co:5432/postgres"
+    # Transaction pooler: SQLAlchemy's prepared statement cache off too
+    assert database._async_url(
+        "postgresql://u:p@pooler.supabase.com:6543/postgres?sslmode=require"
+    ) == "postgresql+asyncpg://u:p@pooler.supabase.com:6543/postgres?prepared_statement_cache_size=0"
+
+
+def test_asyncpg_kwargs_carry_ssl_and_statement_timeout(monkeypatch):
+    monkeypatch.setattr(database, "SQLALCHEMY_DATABASE_URL", "postgresql://u:p@h/db?sslmode=require")
+    monkeypatch.setattr(database, "DB_STATEMENT_TIMEOUT_MS", 5000)
+    kwargs = database._async_engine_kwargs("postgresql+asyncpg://u:p@h/db")
+    assert kwargs["connect_args"] == {
+        "statement_cache_size": 0, "ssl": "require", "server_settings": {"statement_timeout": "5000"},
+    }
+
+
+def test_async_samples_endpoint_sees_sync_writes(client, sp_factory, sample_factory):
+    sp = sp_factory(fpso_name="FPSO Async")
+    created = sample_factory(sp["id"])
+
+    res = client.get("/api/chemical/samples", params={"fpso_name": "FPSO Async"})
+    assert res.status_code == 200
+    rows = [r for r in res.json() if r["id"] == created["id"]]
+    assert len(rows) == 1
+    assert rows[0]["sample_point"]["id"] == sp["id"]
+    assert {h["status"] for h in rows[0]["history"]} == {"Plan", "Sample"}
+
+
+def test_async_dashboard_stats_counts_sampling_card(client, sp_factory, sample_factory):
+    sp = sp_factory(fpso_name="FPSO Async Dashboard")
+    sample_factory(sp["id"])
+    sample_factory(sp["id"])
+
+    res = client.get("/api/chemical/dashboard-stats", params={"fpso_name": "FPSO Async Dashboard"})
+    assert res.status_code == 200
+    assert res.json()["sampling"]["total"] == 2
+
+
+def test_async_equipment_endpoint_includes_health(client, equipment_factory, certificate_factory):
+    eq = equipment_factory(serial_number="SN-ASYNC-HEALTH")
+    certificate_factory(eq["id"])
+
+    res = client.get("/api/equipment/", params={"serial_number": "SN-ASYNC-HEALTH"})
+    assert res.status_code == 200
+    body = res.json()
+    assert body[0]["health_status"] == "healthy"
+    assert len(body[0]["certificates"]) == 1
@@ -0,0 +1,110 @@
+"""
+Auth — Local JWT verification (AUTH_VERIFY_MODE=local).
+
+Cobre:
+ - Token HS256 válido → AuthenticatedUser com fpso_name do user_metadata.
+ - Expirado / audience / issuer incorretos → 401 sem chamada ao Supabase.
+ - Chave indisponível → 401, ou fallback remoto quando AUTH_REMOTE_FALLBACK=true.
+ - Tokens RS256 resolvidos via JWKS (cliente mockado).
+"""
+import time
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from unittest.mock import MagicMock
+
+from app import dependencies as deps
+
+SECRET = "harness-local-secret-with-at-least-32-bytes"
+ISSUER = "https://harness.supabase.co/auth/v1"
+
+
+def _token(key=SECRET, algorithm="HS256", headers=None, **overrides):
+    claims = {
+        "sub": "user-123",
+        "email": "harness@sbmoffshore.com",
+        "role": "authenticated",
+        "aud": "authenticated",
+        "iss": ISSUER,
+        "exp": int(time.time()) + 3600,
+        "user_metadata": {"fpso_name": "FPSO Harness"},
+    }
+    claims.update(overrides)
+    return jwt.encode(claims, key, algorithm=algorithm, headers=headers)
+
+
+def _creds(token):
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+@pytest.fixture
+def local_mode(monkeypatch):
+    remote = MagicMock(side_effect=AssertionError("remote verification must not be called"))
+    monkeypatch.setattr(deps, "AUTH_VERIFY_MODE", "local")
+    monkeypatch.setattr(deps, "AUTH_REMOTE_FALLBACK", False)
+    monkeypatch.setattr(deps, "JWT_SECRET", SECRET)
+    monkeypatch.setattr(deps, "JWT_ISSUER", ISSUER)
+    monkeypatch.setattr(deps, "_verify_token_remotely", remote)
+    deps.principal_cache.clear()
+    yield remote
+    deps.principal_cache.clear()
+
+
+def test_valid_hs256_token_is_verified_locally(local_mode):
+    user = deps.get_current_user(_creds(_token()))
+    assert isinstance(user, deps.AuthenticatedUser)
+    assert user.id == "user-123"
+    assert deps.get_current_user_fpso(user)["fpso_name"] == "FPSO Harness"
+    local_mode.assert_not_called()
+
+
+@pytest.mark.parametrize("overrides", [
+    {"exp": int(time.time()) - 3600},
+    {"aud": "anon-service"},
+    {"iss": "https://evil.example.com/auth/v1"},
+])
+def test_invalid_claims_are_rejected_without_remote_call(local_mode, overrides):
+    with pytest.raises(HTTPException) as exc:
+        deps.get_current_user(_creds(_token(**overrides)))
+    assert exc.value.status_code == 401
+    local_mode.assert_not_called()
+
+
+def test_tampered_signature_is_rejected(local_mode):
+    token = _token(key="another-secret-with-at-least-32-bytes!!")
+    with pytest.raises(HTTPException) as exc:
+        deps.get_current_user(_creds(token))
+    assert exc.value.status_code == 401
+
+
+def test_missing_secret_without_fallback_rejects(local_mode, monkeypatch):
+    monkeypatch.setattr(deps, "JWT_SECRET", None)
+    with pytest.raises(HTTPException) as exc:
+        deps.get_current_user(_creds(_token()))
+    assert exc.value.status_code == 401
+    local_mode.assert_not_called()
+
+
+def test_missing_secret_falls_back_to_remote_when_configured(local_mode, monkeypatch):
+    monkeypatch.setattr(deps, "JWT_SECRET", None)
+    monkeypatch.setattr(deps, "AUTH_REMOTE_FALLBACK", True)
+    remote_user = object()
+    local_mode.side_effect = None
+    local_mode.return_value = remote_user
+    assert deps.get_current_user(_creds(_token())) is remote_user
+    local_mode.assert_called_once()
+
+
+def test_rs256_token_uses_jwks_signing_key(local_mode, monkeypatch):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwks_client = MagicMock()
+    jwks_client.get_signing_key_from_jwt.return_value = MagicMock(key=private_key.public_key())
+    monkeypatch.setattr(deps, "_get_jwks_client", lambda: jwks_client)
+
+    token = _token(key=private_key, algorithm="RS256", headers={"kid": "rotated-key"})
+    user = deps.get_current_user(_creds(token))
+    assert user.email == "harness@sbmoffshore.com"
+    jwks_client.get_signing_key_from_jwt.assert_called_once_with(token)
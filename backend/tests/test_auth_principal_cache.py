@@ -0,0 +1,209 @@
+"""
+Auth — Principal cache (LRU+TTL keyed by token hash).
+
+Cobre:
+ - Expiração no `exp` do token e no teto de TTL.
+ - Evicção LRU quando o tamanho máximo é atingido.
+ - Invalidação por token (logout) e por usuário (revogação).
+ - get_current_user reaproveita o principal verificado (sem nova verificação).
+ - Harness: get_current_user_fpso continua funcionando com usuários dict.
+ - Revogação: tokens com `iat` anterior são recusados mesmo após nova verificação; novo login passa.
+ - /revoke e /cache-stats exigem papel de administrador (AUTH_ADMIN_ROLES).
+"""
+import time
+
+import jwt
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from unittest.mock import MagicMock
+
+from app import dependencies as deps
+from app.dependencies import get_current_user
+from app.main import app
+from app.services.principal_cache import PrincipalCache, SessionDenylist
+
+
+class _Clock:
+    def __init__(self, now=1_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_entry_expires_at_token_exp():
+    clock = _Clock()
+    cache = PrincipalCache(max_size=10, max_ttl_seconds=300, clock=clock)
+    cache.put("tok", {"user": "u", "fpso_name": None}, expires_at=clock.now + 60)
+    assert cache.get("tok") is not None
+    clock.now += 61
+    assert cache.get("tok") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_entry_is_capped_by_max_ttl():
+    clock = _Clock()
+    cache = PrincipalCache(max_size=10, max_ttl_seconds=30, clock=clock)
+    cache.put("tok", {"user": "u"}, expires_at=clock.now + 3600)
+    clock.now += 31
+    assert cache.get("tok") is None
+
+
+def test_already_expired_token_is_not_stored():
+    clock = _Clock()
+    cache = PrincipalCache(max_size=10, clock=clock)
+    cache.put("tok", {"user": "u"}, expires_at=clock.now - 1)
+    assert cache.stats()["size"] == 0
+
+
+def test_lru_eviction_keeps_recently_used():
+    cache = PrincipalCache(max_size=2)
+    cache.put("a", {"user": "a"})
+    cache.put("b", {"user": "b"})
+    cache.get("a")
+    cache.put("c", {"user": "c"})
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_invalidate_token_and_user():
+    cache = PrincipalCache(max_size=10)
+    cache.put("t1", {"user": "x"}, user_id="u1")
+    cache.put("t2", {"user": "x"}, user_id="u1")
+    cache.put("t3", {"user": "y"}, user_id="u2")
+    assert cache.invalidate("t3") is True
+    assert cache.invalidate("t3") is False
+    assert cache.invalidate_user("u1") == 2
+    assert cache.stats()["size"] == 0
+
+
+def test_zero_size_disables_cache():
+    cache = PrincipalCache(max_size=0)
+    cache.put("tok", {"user": "u"})
+    assert cache.get("tok") is None
+
+
+def test_denylist_rejects_tokens_issued_before_revocation():
+    clock = _Clock()
+    denylist = SessionDenylist(window_seconds=3600, clock=clock)
+    denylist.revoke("u1")
+    assert denylist.is_revoked("u1", clock.now - 1)
+    assert denylist.is_revoked("u1", None)
+    assert not denylist.is_revoked("u1", clock.now + 1)
+    assert not denylist.is_revoked("u2", clock.now - 1)
+    clock.now += 3601
+    assert not denylist.is_revoked("u1", 0)
+    assert len(denylist) == 0
+
+
+def test_raw_token_is_not_kept_in_keys():
+    cache = PrincipalCache(max_size=10)
+    cache.put("secret-token", {"user": "u"})
+    assert "secret-token" not in cache._entries
+    assert PrincipalCache.token_key("secret-token") in cache._entries
+
+
+# ─── Dependency integration ─────────────────────────────────────────────────
+
+@pytest.fixture
+def remote_verifier(monkeypatch):
+    user = MagicMock(id="user-42", user_metadata={"fpso_name": "FPSO Harness"}, spec=["id", "user_metadata"])
+    verifier = MagicMock(return_value=user)
+    monkeypatch.setattr(deps, "AUTH_VERIFY_MODE", "remote")
+    monkeypatch.setattr(deps, "_verify_token_remotely", verifier)
+    deps.principal_cache.clear()
+    yield verifier
+    deps.principal_cache.clear()
+
+
+def _creds(exp_offset=3600, sub="user-42", iat_offset=0):
+    now = int(time.time())
+    token = jwt.encode({"sub": sub, "iat": now + iat_offset, "exp": now + exp_offset}, "k" * 32, algorithm="HS256")
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+def test_second_request_is_served_from_cache(remote_verifier):
+    creds = _creds()
+    first = deps.get_current_user(creds)
+    second = deps.get_current_user(creds)
+    assert first is second
+    remote_verifier.assert_called_once()
+
+    ctx = deps.get_current_user_fpso(second)
+    assert ctx["fpso_name"] == "FPSO Harness"
+    assert deps.principal_cache.stats()["hits"] == 1
+
+
+def test_revocation_forces_reverification(remote_verifier):
+    creds = _creds()
+    deps.get_current_user(creds)
+    deps.principal_cache.invalidate_user("user-42")
+    deps.get_current_user(creds)
+    assert remote_verifier.call_count == 2
+
+
+def test_fpso_context_with_dict_user_from_harness():
+    ctx = deps.get_current_user_fpso({"id": "bot", "fpso_name": "FPSO Other"})
+    assert ctx == {"user": {"id": "bot", "fpso_name": "FPSO Other"}, "fpso_name": "FPSO Other"}
+
+
+def test_logout_endpoint_evicts_token(client, remote_verifier):
+    creds = _creds()
+    deps.get_current_user(creds)
+    res = client.post("/api/auth/logout", headers={"Authorization": f"Bearer {creds.credentials}"})
+    assert res.status_code == 200
+    assert res.json()["evicted"] is True
+    assert deps.principal_cache.stats()["size"] == 0
+
+
+def test_cache_stats_endpoint(client):
+    res = client.get("/api/auth/cache-stats")
+    assert res.status_code == 200
+    assert {"hits", "misses", "size", "max_size"} <= set(res.json())
+
+
+@pytest.fixture
+def denylist(monkeypatch):
+    fresh = SessionDenylist()
+    monkeypatch.setattr(deps, "session_denylist", fresh)
+    monkeypatch.setattr("app.routers.auth.session_denylist", fresh)
+    return fresh
+
+
+def test_revoked_token_stays_rejected_after_cache_eviction(client, remote_verifier, denylist):
+    old = _creds(iat_offset=-60)
+    deps.get_current_user(old)
+
+    res = client.post("/api/auth/revoke/user-42")
+    assert res.status_code == 200 and res.json()["evicted"] == 1
+    with pytest.raises(HTTPException) as exc:
+        deps.get_current_user(old)
+    assert exc.value.status_code == 401
+    assert deps.principal_cache.stats()["size"] == 0
+
+    # A login after the revocation is accepted
+    assert deps.get_current_user(_creds(iat_offset=60)).id == "user-42"
+
+
+@pytest.fixture
+def non_admin():
+    previous = app.dependency_overrides[get_current_user]
+    app.dependency_overrides[get_current_user] = lambda: {"id": "viewer-1", "role": "Operator", "fpso_name": None}
+    yield
+    app.dependency_overrides[get_current_user] = previous
+
+
+def test_revoke_and_cache_stats_require_admin(client, non_admin, denylist):
+    assert client.post("/api/auth/revoke/user-42").status_code == 403
+    assert client.get("/api/auth/cache-stats").status_code == 403
+    assert len(denylist) == 0
+
+
+def test_admin_role_from_supabase_app_metadata():
+    admin = deps.AuthenticatedUser(id="a", role="authenticated", app_metadata={"roles": ["Admin"]})
+    assert deps.require_admin(admin) is admin
+    with pytest.raises(HTTPException):
+        deps.require_admin(deps.AuthenticatedUser(id="b", role="admin"))
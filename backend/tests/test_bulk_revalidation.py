@@ -0,0 +1,153 @@
+"""
+M3 — Re-validação em massa (NumPy) após mudança de SIGMA_MULTIPLIER/HISTORY_SIZE.
+
+Cobre:
+ - sigma_bands reproduz _check_2sigma bit a bit (inclusive bootstrap).
+ - Dry run reporta o diff sem gravar; aplicação grava status/μ/σ e status geral da amostra.
+ - Override por FPSO respeitado; segunda execução não encontra diferenças.
+ - POST /api/chemical/revalidate (dry run por padrão; só papel admin).
+"""
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app import models
+from app.dependencies import get_current_user
+from app.main import app
+from app.services import validation_engine
+from app.services.revalidation import revalidate_history, sigma_bands
+from app.services.validation_engine import _check_2sigma
+from conftest import override_get_current_user
+
+FPSO = "FPSO Revalidation"
+
+
+@pytest.mark.parametrize("history_size,sigma", [(10, 2.0), (5, 1.5), (3, 3.0)])
+def test_sigma_bands_match_check_2sigma(monkeypatch, db_session, history_size, sigma):
+    limits = {"HISTORY_SIZE": history_size, "SIGMA_MULTIPLIER": sigma}
+    monkeypatch.setattr(validation_engine, "_get_config_limit",
+                        lambda db, key, default, fpso=None: limits.get(key, default))
+    rng = random.Random(history_size)
+    values = [round(rng.uniform(0.1, 900.0), rng.choice((1, 3, 6))) for _ in range(25)]
+    values[3] = values[2]  # flat stretch → σ from repeated values
+
+    mean, std, lower, upper, bootstrapped = sigma_bands(np.array(values), history_size, sigma)
+    for i, value in enumerate(values):
+        history = [{"value": v, "date": "d"} for v in reversed(values[max(0, i - history_size):i])]
+        check = _check_2sigma(db_session, "density", value, "u", history)
+        assert (mean[i], std[i], lower[i], upper[i]) == (
+            check.history_mean, check.history_std, check.lower_bound, check.upper_bound)
+        assert bool(bootstrapped[i]) == ("bootstrapped" in check.detail)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def harness_admin():
+    """Re-validation is admin-only: act as the harness admin (earlier modules may leave their own user)."""
+    previous = app.dependency_overrides.get(get_current_user)
+    app.dependency_overrides[get_current_user] = override_get_current_user
+    yield
+    app.dependency_overrides[get_current_user] = previous
+
+
+@pytest.fixture(scope="module")
+def series(db_session):
+    sp = models.SamplePoint(tag_number="SP-REVAL", description="reval", fpso_name=FPSO)
+    db_session.add(sp)
+    db_session.flush()
+    base = datetime(2026, 2, 1)
+    values = [850.0, 850.4, 849.8, 850.2, 850.1, 850.3, 849.9, 850.0, 850.2, 850.1, 850.6, 851.2]
+    samples = []
+    for i, value in enumerate(values):
+        s = models.Sample(sample_id=f"S-REVAL-{i}", type="PVT", status="Approved", sample_point_id=sp.id,
+                          validation_status="Approved")
+        db_session.add(s)
+        db_session.flush()
+        # Stored as validated under an old, very loose band
+        db_session.add(models.SampleResult(sample_id=s.id, parameter="density", value=value, unit="kg/m3",
+                                           validation_status="pass", history_mean=0.0, history_std=0.0,
+                                           created_at=base + timedelta(days=i)))
+        db_session.add(models.SampleResult(sample_id=s.id, parameter="o2", value=0.1, unit="%",
+                                           validation_status="pass", created_at=base + timedelta(days=i)))
+        samples.append(s)
+    # A manual entry (never validated) still counts as history
+    manual = models.Sample(sample_id="S-REVAL-MANUAL", type="PVT", status="Approved", sample_point_id=sp.id)
+    db_session.add(manual)
+    db_session.flush()
+    db_session.add(models.SampleResult(sample_id=manual.id, parameter="density", value=850.0, unit="kg/m3",
+                                       created_at=base - timedelta(days=1)))
+    db_session.add(models.ConfigParameter(key="SIGMA_MULTIPLIER", value="1.0", fpso=FPSO))
+    db_session.commit()
+    return sp
+
+
+def _density_rows(db, sp):
+    db.expire_all()
+    return (
+        db.query(models.SampleResult).join(models.Sample)
+        .filter(models.Sample.sample_point_id == sp.id, models.SampleResult.parameter == "density")
+        .order_by(models.SampleResult.created_at).all()
+    )
+
+
+def test_dry_run_reports_without_writing(db_session, series):
+    report = revalidate_history(db_session, dry_run=True, fpso="SEPETIBA")
+    assert all(d.sample_point_id != series.id for d in report.results)
+
+    report = revalidate_history(db_session, dry_run=True, sample_point_id=series.id)
+    assert report.groups == 1 and report.scanned == 12
+    assert len(report.results) == 12  # every stored μ/σ was stale
+    assert report.status_changes.get("pass → fail", 0) >= 1
+    assert any(d.sample_id == "S-REVAL-11" and d.new_status == "fail" for d in report.results)
+    assert any(d.new_status == "Reproved" for d in report.samples)
+    assert all(r.history_mean == 0.0 for r in _density_rows(db_session, series)[1:])
+
+
+def test_apply_writes_engine_verdicts(db_session, series):
+    report = revalidate_history(db_session, dry_run=False, fpso=FPSO)
+    assert len(report.results) == 12
+
+    rows = _density_rows(db_session, series)
+    manual, validated = rows[0], rows[1:]
+    assert manual.validation_status is None
+    size = int(validation_engine._get_config_limit(db_session, "HISTORY_SIZE", 10, fpso=FPSO))
+    for i, row in enumerate(validated):
+        history = [{"value": r.value, "date": "d"} for r in reversed(rows[max(0, i + 1 - size):i + 1])]
+        check = _check_2sigma(db_session, "density", row.value, "kg/m3", history, fpso=FPSO)
+        assert (row.validation_status, row.history_mean, row.history_std, row.validation_detail) == (
+            check.status, check.history_mean, check.history_std, check.detail)
+
+    reproved = {s.sample_id for s in report.samples}
+    for sample in db_session.query(models.Sample).filter(models.Sample.sample_id.like("S-REVAL-%")):
+        if sample.sample_id in reproved:
+            assert sample.validation_status == "Reproved"
+
+    again = revalidate_history(db_session, dry_run=True, sample_point_id=series.id)
+    assert again.results == [] and again.samples == []
+
+
+def test_revalidate_endpoint_defaults_to_dry_run(client, db_session, series):
+    target = _density_rows(db_session, series)[-1]
+    target.history_std = 123.0
+    db_session.commit()
+
+    res = client.post("/api/chemical/revalidate", params={"sample_point_id": series.id})
+    assert res.status_code == 200
+    body = res.json()
+    assert body["dry_run"] is True and body["changed"] == 1
+    assert body["results"][0]["result_id"] == target.id and body["results"][0]["old_std"] == 123.0
+
+    res = client.post("/api/chemical/revalidate", params={"sample_point_id": series.id, "dry_run": "false"})
+    assert res.json()["changed"] == 1
+    assert client.post("/api/chemical/revalidate", params={"sample_point_id": series.id}).json()["changed"] == 0
+
+
+def test_revalidate_endpoint_requires_admin(client, series):
+    app.dependency_overrides[get_current_user] = lambda: {"id": "viewer-1", "role": "Operator"}
+    try:
+        for dry_run in ("true", "false"):
+            res = client.post("/api/chemical/revalidate", params={"sample_point_id": series.id, "dry_run": dry_run})
+            assert res.status_code == 403
+    finally:
+        app.dependency_overrides[get_current_user] = override_get_current_user
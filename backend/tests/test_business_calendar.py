@@ -0,0 +1,109 @@
+"""
+M3/M11 — Calendário de dias úteis por FPSO com feriados (services/business_calendar.py).
+
+Cobre:
+ - Mesmo resultado dos loops dia a dia anteriores (início em fim de semana, N = 0).
+ - Feriados da FPSO pulados ("SEPETIBA" ≡ "FPSO SEPETIBA"); outras FPSOs não afetadas.
+ - Offsets em lote (um por data ou um para todas) em uma única chamada.
+ - Cache: leituras seguintes sem SQL; POST /api/config/holidays reconstrói.
+ - update-status: fc_expected_date e re-amostragem emergencial respeitam os feriados.
+"""
+from datetime import date, timedelta
+
+import pytest
+
+from app import metrics, models
+from app.database import get_db
+from app.main import app
+from app.services import business_calendar
+from app.services.sla_matrix import get_sla_config
+from conftest import override_get_db
+
+WEDNESDAY = date(2031, 1, 8)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def shared_db():
+    """Point the API at the shared test engine (earlier modules may leave their own override)."""
+    previous = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    yield
+    app.dependency_overrides[get_db] = previous
+
+
+def _loop(start, days, holidays=()):
+    """The while loop update_sample_status used, plus holidays."""
+    current = start
+    while days > 0:
+        current += timedelta(days=1)
+        if current.weekday() < 5 and current not in holidays:
+            days -= 1
+    return current
+
+
+def test_matches_weekday_loop(db_session):
+    starts = [WEDNESDAY + timedelta(days=i) for i in range(21)]
+    for days in range(0, 8):
+        expected = [_loop(start, days) for start in starts]
+        assert business_calendar.add_business_days_many(db_session, starts, days).tolist() == expected
+        assert [business_calendar.add_business_days(db_session, s, days) for s in starts] == expected
+
+
+def test_fpso_holidays_are_skipped(client, db_session):
+    holiday = WEDNESDAY + timedelta(days=2)  # Friday
+    res = client.post("/api/config/holidays", json={
+        "date": f"{holiday}T00:00:00", "description": "Calendar test", "fpso": "CALTEST",
+    })
+    assert res.status_code == 200
+
+    assert business_calendar.add_business_days(db_session, WEDNESDAY, 2, "FPSO CALTEST") == WEDNESDAY + timedelta(days=5)
+    assert business_calendar.add_business_days(db_session, WEDNESDAY, 2, "caltest") == WEDNESDAY + timedelta(days=5)
+    assert business_calendar.add_business_days(db_session, WEDNESDAY, 2, "FPSO OTHER") == holiday
+    assert business_calendar.add_business_days(db_session, WEDNESDAY, 2) == holiday
+
+    starts = [WEDNESDAY + timedelta(days=i) for i in range(10)]
+    offsets = [i % 4 for i in range(10)]
+    expected = [_loop(s, n, {holiday}) for s, n in zip(starts, offsets, strict=True)]
+    assert business_calendar.add_business_days_many(db_session, starts, offsets, "FPSO CALTEST").tolist() == expected
+
+
+def test_calendars_are_cached(db_session):
+    business_calendar.add_business_days(db_session, WEDNESDAY, 3, "FPSO CALTEST")  # warm
+    with metrics.track_queries() as stats:
+        for _ in range(5):
+            business_calendar.add_business_days(db_session, WEDNESDAY, 3, "FPSO CALTEST")
+    assert stats.queries == 0
+
+    version = business_calendar.holiday_calendars.version
+    db_session.add(models.Holiday(date=WEDNESDAY + timedelta(days=1), description="Extra", fpso="CALTEST"))
+    db_session.commit()
+    assert business_calendar.holiday_calendars.version > version
+    assert business_calendar.add_business_days(db_session, WEDNESDAY, 1, "FPSO CALTEST") == WEDNESDAY + timedelta(days=5)
+
+
+def test_status_updates_use_fpso_calendar(client, db_session):
+    cfg = get_sla_config(db_session, "Fiscal", "Chromatography", "Onshore")
+    assert cfg["fc_is_business_days"]
+    holidays = {row.date for row in db_session.query(models.Holiday).filter(models.Holiday.fpso == "CALTEST")}
+
+    point = client.post("/api/chemical/sample-points", json={
+        "tag_number": "SP-CALTEST", "description": "calendar", "fpso_name": "FPSO CALTEST",
+    }).json()
+    sample = client.post("/api/chemical/samples", json={
+        "sample_id": "S-CALTEST-1", "type": "Chromatography", "sample_point_id": point["id"], "local": "Onshore",
+    }).json()
+
+    res = client.post(f"/api/chemical/samples/{sample['id']}/update-status",
+                      json={"status": "Report issue", "event_date": str(WEDNESDAY)})
+    assert res.status_code == 200
+    assert res.json()["fc_expected_date"] == str(_loop(WEDNESDAY, cfg["fc_days"], holidays))
+
+    res = client.post(f"/api/chemical/samples/{sample['id']}/update-status",
+                      json={"status": "Report approve/reprove", "validation_status": "Reprovado"})
+    assert res.status_code == 200
+    emergency = db_session.query(models.Sample).filter(
+        models.Sample.sample_id.like(f"%-EMG-{sample['id']}-%")
+    ).one()
+    reproved = get_sla_config(db_session, "Fiscal", "Chromatography", "Onshore", "Reproved")
+    days = (reproved or {}).get("reproval_reschedule_days") or cfg.get("reproval_reschedule_days") or 3
+    assert emergency.planned_date == _loop(WEDNESDAY, days, holidays)
@@ -0,0 +1,99 @@
+"""
+M11 — Cache versionado de ConfigParameter (validation engine).
+
+Cobre:
+ - Todos os parâmetros carregados em 1 query; leituras seguintes sem SQL.
+ - Invalidação em POST/DELETE /api/config/parameters e em commits diretos via ORM.
+ - Override por FPSO (fpso da tabela) com fallback para GLOBAL/NULL; override de outro FPSO nunca vaza.
+ - Expiração por TTL (escritas feitas por outros workers).
+"""
+from app import metrics, models
+from app.services.config_cache import ConfigCache, config_cache, normalize_fpso
+from app.services.validation_engine import _check_o2_limit, _get_config_limit
+
+
+def _set(client, key, value, fpso="GLOBAL"):
+    res = client.post("/api/config/parameters", json={"key": key, "value": value, "fpso": fpso})
+    assert res.status_code == 200
+
+
+def test_normalize_fpso():
+    assert normalize_fpso("FPSO Sepetiba") == "SEPETIBA"
+    assert normalize_fpso(" sepetiba ") == "SEPETIBA"
+    assert normalize_fpso(None) == "GLOBAL"
+    assert normalize_fpso("") == "GLOBAL"
+
+
+def test_repeated_lookups_hit_memory(client, db_session):
+    _set(client, "CACHE_TEST_SIGMA", "2.5")
+    _get_config_limit(db_session, "CACHE_TEST_SIGMA", 2.0)  # warm
+
+    with metrics.track_queries() as stats:
+        for _ in range(8):
+            assert _get_config_limit(db_session, "CACHE_TEST_SIGMA", 2.0) == 2.5
+            assert _get_config_limit(db_session, "CACHE_TEST_MISSING", 7.0) == 7.0
+    assert stats.queries == 0
+
+
+def test_api_write_and_delete_invalidate(client, db_session):
+    _set(client, "CACHE_TEST_LIMIT", "1.0")
+    assert _get_config_limit(db_session, "CACHE_TEST_LIMIT", 0.0) == 1.0
+    version = config_cache.version
+
+    _set(client, "CACHE_TEST_LIMIT", "3.0")
+    assert config_cache.version > version
+    assert _get_config_limit(db_session, "CACHE_TEST_LIMIT", 0.0) == 3.0
+
+    assert client.delete("/api/config/parameters/CACHE_TEST_LIMIT", params={"fpso": "GLOBAL"}).status_code == 200
+    assert _get_config_limit(db_session, "CACHE_TEST_LIMIT", 0.0) == 0.0
+
+
+def test_direct_orm_commit_invalidates(db_session):
+    assert _get_config_limit(db_session, "CACHE_TEST_ORM", 5.0) == 5.0
+    row = models.ConfigParameter(key="CACHE_TEST_ORM", value="6.0", fpso="GLOBAL")
+    db_session.add(row)
+    db_session.commit()
+    assert _get_config_limit(db_session, "CACHE_TEST_ORM", 5.0) == 6.0
+    db_session.delete(row)
+    db_session.commit()
+    assert _get_config_limit(db_session, "CACHE_TEST_ORM", 5.0) == 5.0
+
+
+def test_per_fpso_override_falls_back_to_global(client, db_session):
+    _set(client, "VALIDATION_LIMIT_O2", "0.5", fpso="GLOBAL")
+    _set(client, "VALIDATION_LIMIT_O2", "0.9", fpso="CACHEFPSO")
+    try:
+        assert _get_config_limit(db_session, "VALIDATION_LIMIT_O2", 0.0, fpso="FPSO CacheFPSO") == 0.9
+        assert _get_config_limit(db_session, "VALIDATION_LIMIT_O2", 0.0, fpso="FPSO Other") == 0.5
+        assert _check_o2_limit(0.7, db_session, "FPSO CacheFPSO").status == "pass"
+        assert _check_o2_limit(0.7, db_session, "FPSO Other").status == "fail"
+    finally:
+        client.delete("/api/config/parameters/VALIDATION_LIMIT_O2", params={"fpso": "CACHEFPSO"})
+        client.delete("/api/config/parameters/VALIDATION_LIMIT_O2", params={"fpso": "GLOBAL"})
+
+
+def test_other_fpso_override_is_not_a_fallback(db_session):
+    row = models.ConfigParameter(key="CACHE_TEST_SCOPED", value="9.0", fpso="CACHEONLY")
+    null_scoped = models.ConfigParameter(key="CACHE_TEST_NULL", value="4.0", fpso=None)
+    db_session.add_all([row, null_scoped])
+    db_session.commit()
+    try:
+        assert _get_config_limit(db_session, "CACHE_TEST_SCOPED", 1.0, fpso="FPSO CacheOnly") == 9.0
+        assert _get_config_limit(db_session, "CACHE_TEST_SCOPED", 1.0, fpso="FPSO Other") == 1.0
+        assert _get_config_limit(db_session, "CACHE_TEST_SCOPED", 1.0) == 1.0
+        assert _get_config_limit(db_session, "CACHE_TEST_NULL", 1.0, fpso="FPSO Other") == 4.0
+    finally:
+        db_session.delete(row)
+        db_session.delete(null_scoped)
+        db_session.commit()
+
+
+def test_snapshot_expires_after_ttl(db_session):
+    now = [0.0]
+    cache = ConfigCache(ttl_seconds=10, clock=lambda: now[0])
+    with metrics.track_queries() as stats:
+        cache.get(db_session, "ANY")
+        cache.get(db_session, "ANY")
+        now[0] += 11
+        cache.get(db_session, "ANY")
+    assert stats.count_matching("FROM config_parameters") == 2
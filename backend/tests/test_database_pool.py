@@ -0,0 +1,99 @@
+"""
+Database — Pool configuration and live stats.
+
+Cobre:
+ - Kwargs do engine: Postgres recebe pool sizing + statement_timeout; SQLite só pre_ping.
+ - InstrumentedQueuePool registra checkouts, overflow e tempo de espera.
+ - Timeout de pool é contado; falha de conexão não conta como timeout.
+ - Endpoint /health/db-pool responde com as estatísticas (somente admin).
+"""
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app import database
+from app.dependencies import get_current_user
+from app.main import app
+
+
+def test_postgres_engine_kwargs_include_pool_and_statement_timeout(monkeypatch):
+    monkeypatch.setattr(database, "DB_STATEMENT_TIMEOUT_MS", 15000)
+    kwargs = database._engine_kwargs("postgresql://u:p@localhost/db")
+    assert kwargs["poolclass"] is database.InstrumentedQueuePool
+    assert kwargs["pool_pre_ping"] is True
+    assert kwargs["pool_size"] == database.DB_POOL_SIZE
+    assert kwargs["connect_args"] == {"options": "-c statement_timeout=15000"}
+
+
+def test_statement_timeout_can_be_disabled(monkeypatch):
+    monkeypatch.setattr(database, "DB_STATEMENT_TIMEOUT_MS", 0)
+    assert "connect_args" not in database._engine_kwargs("postgresql://u:p@localhost/db")
+
+
+def test_sqlite_engine_kwargs_skip_pool_sizing():
+    assert database._engine_kwargs("sqlite:///./x.db") == {"pool_pre_ping": database.DB_POOL_PRE_PING}
+
+
+@pytest.fixture
+def pooled_engine(tmp_path):
+    eng = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=database.InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.05,
+    )
+    yield eng
+    eng.dispose()
+
+
+def test_pool_stats_track_checkouts_and_overflow(pooled_engine):
+    c1 = pooled_engine.connect()
+    c2 = pooled_engine.connect()
+    c1.execute(text("SELECT 1"))
+    stats = database.pool_stats(pooled_engine)
+    assert stats["pool_class"] == "InstrumentedQueuePool"
+    assert stats["checked_out"] == 2
+    assert stats["overflow"] == 1
+    assert stats["checkouts"] == 2
+    assert stats["wait_max_seconds"] >= 0.0
+    c1.close()
+    c2.close()
+    assert database.pool_stats(pooled_engine)["checked_out"] == 0
+
+
+def test_pool_timeout_is_counted(pooled_engine):
+    held = [pooled_engine.connect(), pooled_engine.connect()]
+    with pytest.raises(PoolTimeoutError):
+        pooled_engine.connect()
+    stats = database.pool_stats(pooled_engine)
+    assert stats["timeouts"] == 1
+    assert stats["wait_max_seconds"] >= 0.05
+    for c in held:
+        c.close()
+
+
+def test_connect_failure_is_not_a_timeout():
+    def _refuse():
+        raise OSError("connection refused")
+
+    eng = create_engine("sqlite://", creator=_refuse, poolclass=database.InstrumentedQueuePool, pool_size=1)
+    with pytest.raises(OSError):
+        eng.connect()
+    assert database.pool_stats(eng)["timeouts"] == 0
+    eng.dispose()
+
+
+def test_db_pool_health_endpoint(client):
+    res = client.get("/health/db-pool")
+    assert res.status_code == 200
+    assert "pool_class" in res.json()
+
+
+def test_db_pool_health_requires_admin(client):
+    previous = app.dependency_overrides[get_current_user]
+    app.dependency_overrides[get_current_user] = lambda: {"id": "viewer-1", "role": "Operator"}
+    try:
+        assert client.get("/health/db-pool").status_code == 403
+    finally:
+        app.dependency_overrides[get_current_user] = previous
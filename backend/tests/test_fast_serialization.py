@@ -0,0 +1,167 @@
+"""
+Responses — orjson fast path (ORM → JSON) and gzip/brotli compression.
+
+Cobre:
+ - Caminho rápido produz bytes idênticos ao response_model padrão
+   (/api/equipment/tags, /api/chemical/samples, /api/chemical/meters).
+ - Modo verify serve o padrão e não acusa divergência.
+ - Modelos com validators/aliases não são "trusted" e caem no caminho padrão.
+ - Negociação br > gzip > identity acima de COMPRESSION_MIN_BYTES; q=0 respeitado.
+ - Brotli de corpos grandes roda no threadpool; respostas em streaming e já codificadas.
+ - Mídia já comprimida (zip, gzip, PDF, imagens) não é recomprimida em br nem gzip.
+"""
+import gzip
+import logging
+import os
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, field_validator
+from starlette.applications import Starlette
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+
+from app import compression, responses
+from app.compression import CompressionMiddleware, accepted_encodings
+
+
+@pytest.fixture
+def populated(client, sp_factory, sample_factory, equipment_factory, tag_factory,
+              installation_factory, certificate_factory):
+    for i in range(3):
+        sp = sp_factory(fpso_name="FPSO Fast", description=f"Ponto de coleta ç{i}")
+        sample = sample_factory(sp["id"])
+        client.patch(f"/api/chemical/samples/{sample['id']}/status",
+                     json={"status": "Sample", "comments": "coletado", "event_date": "2026-02-01"})
+        eq = equipment_factory(fpso_name="FPSO Fast")
+        certificate_factory(eq["id"])
+        tag = tag_factory()
+        installation_factory(eq["id"], tag["id"], installation_date=datetime(2026, 1, 5, 8, 30, 15, 250000).isoformat())
+
+
+def _bytes(client, monkeypatch, mode, url, **params):
+    monkeypatch.setattr(responses, "FAST_ORM_SERIALIZATION", mode)
+    res = client.get(url, params=params, headers={"Accept-Encoding": "identity"})
+    assert res.status_code == 200
+    return res.content
+
+
+@pytest.mark.parametrize("url,params", [
+    ("/api/equipment/tags", {"limit": 10000}),
+    ("/api/chemical/samples", {"fpso_name": "FPSO Fast"}),
+    ("/api/chemical/meters", {}),
+])
+def test_fast_path_is_byte_identical(client, monkeypatch, populated, url, params):
+    standard = _bytes(client, monkeypatch, "off", url, **params)
+    fast = _bytes(client, monkeypatch, "on", url, **params)
+    assert fast == standard
+    assert len(standard) > 2
+
+
+def test_verify_mode_reports_no_mismatch(client, monkeypatch, populated, caplog):
+    with caplog.at_level(logging.WARNING, logger="app.responses"):
+        verified = _bytes(client, monkeypatch, "verify", "/api/equipment/tags")
+    assert "mismatch" not in caplog.text
+    assert verified == _bytes(client, monkeypatch, "off", "/api/equipment/tags")
+
+
+def test_models_with_validators_are_not_trusted():
+    class Guarded(BaseModel):
+        name: str
+
+        @field_validator("name")
+        @classmethod
+        def upper(cls, v):
+            return v.upper()
+
+    rows = [object()]
+    assert responses.is_trusted(Guarded) is False
+    assert responses.orm_list_response(rows, Guarded, mode="on") is rows
+
+
+def test_accept_encoding_parsing():
+    assert accepted_encodings("gzip, deflate, br") == {"gzip", "deflate", "br"}
+    assert accepted_encodings("br;q=0, gzip;q=0.5") == {"gzip"}
+    assert accepted_encodings("") == set()
+
+
+def test_large_responses_are_compressed(client, populated):
+    res = client.get("/api/equipment/tags", headers={"Accept-Encoding": "br, gzip"})
+    assert res.headers["content-encoding"] == "br"
+    assert res.json()
+
+    res = client.get("/api/equipment/tags", headers={"Accept-Encoding": "br;q=0, gzip"})
+    assert res.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in res.headers["vary"]
+
+
+def test_small_responses_are_not_compressed(client):
+    res = client.get("/health", headers={"Accept-Encoding": "br, gzip"})
+    assert "content-encoding" not in res.headers
+
+
+def _compressed_app(**kw):
+    async def big(request):
+        return Response(b"x" * 4096, media_type="text/plain")
+
+    async def stream(request):
+        async def chunks():
+            for _ in range(3):
+                yield b"y" * 2048
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    async def encoded(request):
+        return Response(gzip.compress(b"z" * 4096), headers={"Content-Encoding": "gzip"})
+
+    async def media(request):
+        payload = os.urandom(5000)  # incompressible, like a real zip export
+        return Response(payload, media_type=request.query_params["type"])
+
+    app = Starlette(routes=[Route("/big", big), Route("/stream", stream), Route("/encoded", encoded),
+                            Route("/media", media)])
+    return TestClient(CompressionMiddleware(app, minimum_size=1024, **kw))
+
+
+def test_brotli_of_large_bodies_runs_in_threadpool(monkeypatch):
+    offloaded = []
+
+    async def _recording(func, *args):
+        offloaded.append(len(args[0]))
+        return func(*args)
+
+    monkeypatch.setattr(compression, "run_in_threadpool", _recording)
+    headers = {"Accept-Encoding": "br"}
+
+    res = _compressed_app(brotli_thread_min_bytes=1 << 20).get("/big", headers=headers)
+    assert res.headers["content-encoding"] == "br" and offloaded == []
+
+    res = _compressed_app(brotli_thread_min_bytes=4096).get("/big", headers=headers)
+    assert res.headers["content-encoding"] == "br" and offloaded == [4096]
+    assert res.content == b"x" * 4096  # httpx decodes br
+
+
+def test_streaming_and_pre_encoded_responses():
+    client = _compressed_app()
+    res = client.get("/stream", headers={"Accept-Encoding": "br"})
+    assert res.headers["content-encoding"] == "br"
+    assert "content-length" not in res.headers
+    assert res.content == b"y" * 6144
+
+    res = client.get("/encoded", headers={"Accept-Encoding": "br"})
+    assert res.headers["content-encoding"] == "gzip"
+    assert res.content == b"z" * 4096
+
+
+@pytest.mark.parametrize("encoding", ["br", "gzip"])
+@pytest.mark.parametrize("media_type", ["application/zip", "application/gzip", "application/pdf", "image/png"])
+def test_compressed_media_is_not_recompressed(encoding, media_type):
+    res = _compressed_app().get("/media", params={"type": media_type}, headers={"Accept-Encoding": encoding})
+    assert "content-encoding" not in res.headers
+    assert len(res.content) == int(res.headers["content-length"]) == 5000
+
+
+def test_gzip_streaming_response():
+    res = _compressed_app().get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert res.headers["content-encoding"] == "gzip"
+    assert res.content == b"y" * 6144
@@ -0,0 +1,71 @@
+"""
+M3 — Índices compostos para histórico/2σ e varreduras de SLA.
+
+Cobre:
+ - `manage migrate` cria os índices novos em um banco já existente (sem eles).
+ - Plano da consulta de histórico 2σ usa (sample_point_id, sampling_date) e
+   (parameter, sample_id, created_at) em vez de varrer sample_results.
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.orm import sessionmaker
+
+from app import manage, models
+from app.services.validation_engine import _get_parameter_histories
+
+NEW_INDEXES = {
+    "sample_results": {"ix_sample_results_parameter_sample_created", "ix_sample_results_sample_id"},
+    "samples": {"ix_samples_sample_point_sampling_date", "ix_samples_status_due_date"},
+}
+
+
+def _index_names(eng, table):
+    return {ix["name"] for ix in inspect(eng).get_indexes(table)}
+
+
+def test_migrate_adds_indexes_to_existing_schema(tmp_path, monkeypatch):
+    eng = create_engine(f"sqlite:///{tmp_path / 'idx.db'}")
+    models.Base.metadata.create_all(bind=eng)
+    for table in (models.SampleResult.__table__, models.Sample.__table__):
+        for index in table.indexes:
+            if index.name in NEW_INDEXES[table.name]:
+                index.drop(bind=eng)
+    assert not NEW_INDEXES["samples"] & _index_names(eng, "samples")
+
+    monkeypatch.setattr(manage, "engine", eng)
+    manage.main(["migrate"])
+    manage.main(["migrate"])  # idempotent
+    for table, names in NEW_INDEXES.items():
+        assert names <= _index_names(eng, table)
+
+
+def test_history_query_plan_uses_composite_indexes(tmp_path):
+    eng = create_engine(f"sqlite:///{tmp_path / 'plan.db'}")
+    models.Base.metadata.create_all(bind=eng)
+    Session = sessionmaker(bind=eng)
+    with Session() as db:
+        points = [models.SamplePoint(tag_number=f"SP-IDX-{i}", fpso_name="FPSO Idx") for i in range(20)]
+        db.add_all(points)
+        db.flush()
+        for i in range(400):
+            s = models.Sample(sample_id=f"S-IDX-{i}", sample_point_id=points[i % 20].id, status="Sample")
+            db.add(s)
+            db.flush()
+            for param in ("density", "rs", "fe", "o2"):
+                db.add(models.SampleResult(sample_id=s.id, parameter=param, value=1.0,
+                                           created_at=datetime(2026, 1, 1) + timedelta(hours=i)))
+        db.commit()
+        with eng.begin() as conn:
+            conn.exec_driver_sql("ANALYZE")
+
+        captured = []
+        event.listen(eng, "before_cursor_execute", lambda *a: captured.append((a[2], a[3])))
+        _get_parameter_histories(db, points[3].id, ["density", "rs", "fe"], limit=10)
+        statement, params = captured[-1]
+
+    with eng.connect() as conn:
+        plan = " | ".join(row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, params))
+    assert "ix_sample_results_parameter_sample_created" in plan
+    assert "ix_samples_sample_point_sampling_date" in plan
+    assert "SCAN sample_results" not in plan
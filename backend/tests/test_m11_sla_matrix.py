@@ -20,7 +20,7 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
 from app.main import app
-from app.database import Base, get_db
+from app.database import Base, get_db, get_async_db
 from app.dependencies import get_current_user
 from app.services.sla_matrix import get_sla_config
 
@@ -47,9 +47,10 @@ def override_get_current_user_sla():
 
 
 @pytest.fixture(scope="module")
-def sla_client():
+def sla_client(async_db_override_factory):
     """Dedicated client for SLA matrix tests. Seeds required SLA rules before tests run."""
     app.dependency_overrides[get_db] = override_get_db_sla
+    app.dependency_overrides[get_async_db] = async_db_override_factory(sla_engine)
     app.dependency_overrides[get_current_user] = override_get_current_user_sla
     Base.metadata.create_all(bind=sla_engine)
     with TestClient(app) as c:
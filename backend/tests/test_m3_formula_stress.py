@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import patch, mock_open
+from unittest.mock import patch
 from app.services.pdf_parser import PVTResult, CROResult
 
 def test_m3_bsw_boundary_pass(client, sp_factory, sample_factory):
@@ -16,7 +16,7 @@ def test_m3_bsw_boundary_pass(client, sp_factory, sample_factory):
     )
     
     with patch("app.routers.chemical.parse_pdf_bytes", return_value=mock_pvt), \
-         patch("app.routers.chemical.open", mock_open()), \
+         patch("app.routers.chemical._write_file"), \
          patch("app.routers.chemical.os.makedirs"):
         res = client.post(
             f"/api/chemical/samples/{sample['id']}/validate-report",
@@ -43,7 +43,7 @@ def test_m3_bsw_boundary_warn(client, sp_factory, sample_factory):
     )
     
     with patch("app.routers.chemical.parse_pdf_bytes", return_value=mock_pvt), \
-         patch("app.routers.chemical.open", mock_open()), \
+         patch("app.routers.chemical._write_file"), \
          patch("app.routers.chemical.os.makedirs"):
         res = client.post(
             f"/api/chemical/samples/{sample['id']}/validate-report",
@@ -70,7 +70,7 @@ def test_m3_h2s_boundary_pass(client, sp_factory, sample_factory):
     )
     
     with patch("app.routers.chemical.parse_pdf_bytes", return_value=mock_cro), \
-         patch("app.routers.chemical.open", mock_open()), \
+         patch("app.routers.chemical._write_file"), \
          patch("app.routers.chemical.os.makedirs"):
         res = client.post(
             f"/api/chemical/samples/{sample['id']}/validate-report",
@@ -91,7 +91,7 @@ def test_m3_h2s_boundary_warn(client, sp_factory, sample_factory):
     )
     
     with patch("app.routers.chemical.parse_pdf_bytes", return_value=mock_cro), \
-         patch("app.routers.chemical.open", mock_open()), \
+         patch("app.routers.chemical._write_file"), \
          patch("app.routers.chemical.os.makedirs"):
         res = client.post(
             f"/api/chemical/samples/{sample['id']}/validate-report",
@@ -117,7 +117,7 @@ def test_m3_o2_boundary_fail(client, sp_factory, sample_factory):
     )
     
     with patch("app.routers.chemical.parse_pdf_bytes", return_value=mock_cro), \
-         patch("app.routers.chemical.open", mock_open()), \
+         patch("app.routers.chemical._write_file"), \
          patch("app.routers.chemical.os.makedirs"):
         res = client.post(
             f"/api/chemical/samples/{sample['id']}/validate-report",
@@ -24,7 +24,7 @@ from sqlalchemy.pool import StaticPool
 from unittest.mock import patch
 
 from app.main import app
-from app.database import Base, get_db
+from app.database import Base, get_db, get_async_db
 from app.dependencies import get_current_user
 from app.services.sla_matrix import get_sla_config
 from app.services.validation_engine import _get_config_limit
@@ -53,8 +53,9 @@ def override_current_user():
 
 
 @pytest.fixture(scope="module")
-def iclient():
+def iclient(async_db_override_factory):
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = async_db_override_factory(int_engine)
     app.dependency_overrides[get_current_user] = override_current_user
     Base.metadata.create_all(bind=int_engine)
     with TestClient(app) as c:
@@ -139,14 +140,9 @@ def _emg_children(client, sp_id, parent_id):
 class TestINT1_SigmaMultiplierFromM11:
     """Validation engine usa SIGMA_MULTIPLIER da ConfigParameter do M11."""
 
-    def test_default_sigma_falls_back_to_2(self):
+    def test_default_sigma_falls_back_to_2(self, empty_db):
         """Sem parametro no DB, _get_config_limit retorna default=2.0."""
-        class _EmptyDb:
-            def query(self, *a): return self
-            def filter(self, *a): return self
-            def first(self): return None
-
-        val = _get_config_limit(_EmptyDb(), "SIGMA_MULTIPLIER", 2.0)
+        val = _get_config_limit(empty_db, "SIGMA_MULTIPLIER", 2.0)
         assert val == 2.0
 
     def test_sigma_saved_in_m11_is_read(self, iclient, idb):
@@ -160,27 +156,22 @@ class TestINT1_SigmaMultiplierFromM11:
         val = _get_config_limit(idb, "SIGMA_MULTIPLIER", 2.0)
         assert val == 3.0
 
-    def test_larger_sigma_widens_acceptance_band(self):
+    def test_larger_sigma_widens_acceptance_band(self, idb):
         """Com sigma=3.0, band é mais larga → valores antes reprovados passam."""
         from app.services.validation_engine import _check_2sigma
         from unittest.mock import patch
 
-        class _EmptyDb:
-            def query(self, *a): return self
-            def filter(self, *a): return self
-            def first(self): return None
-
         # Histórico com std≈0.8; mean=9.9; com sigma=2 → range [8.3, 11.5]; com sigma=3 → range [7.5, 12.3]
         history = [{"value": float(v), "date": f"2026-01-{i+1:02d}", "sample_id": f"S{i}"}
                    for i, v in enumerate([9, 10, 11, 10, 9, 10, 11, 10, 9, 10])]
         
-        def mock_get_config(db, key, default):
+        def mock_get_config(db, key, default, fpso=None):
             if key == "SIGMA_MULTIPLIER":
                 return 3.0
             return default
             
         with patch("app.services.validation_engine._get_config_limit", side_effect=mock_get_config):
-            result = _check_2sigma(_EmptyDb(), "density", 12.0, "kg/m³", history)
+            result = _check_2sigma(idb, "density", 12.0, "kg/m³", history)
             
         assert result.status == "pass", "sigma=3 → 12.0 must be inside wider band"
 
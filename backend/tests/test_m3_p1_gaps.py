@@ -20,7 +20,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.main import app
-from app.database import Base, get_db
+from app.database import Base, get_db, get_async_db
 from app.dependencies import get_current_user
 from app import models
 
@@ -43,9 +43,10 @@ def override_get_current_user_p1():
 
 
 @pytest.fixture(scope="module")
-def p1_client():
+def p1_client(async_db_override_factory):
     """Dedicated client for P1 integration tests."""
     app.dependency_overrides[get_db] = override_get_db_p1
+    app.dependency_overrides[get_async_db] = async_db_override_factory(p1_engine)
     app.dependency_overrides[get_current_user] = override_get_current_user_p1
     Base.metadata.create_all(bind=p1_engine)
     with TestClient(app) as c:
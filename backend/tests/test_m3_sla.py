@@ -11,13 +11,6 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 from app.services.sla_matrix import get_sla_config
 
-class _MockDb:
-    def query(self, *args, **kwargs):
-        class _MockQuery:
-            def filter(self, *args, **kwargs): return self
-            def first(self): return None
-        return _MockQuery()
-
 
 class TestSlaMatrixFullSweep:
     """Testa TODAS as 20 combinações da planilha Excel (Classification × Type × Local)."""
@@ -26,8 +19,8 @@ class TestSlaMatrixFullSweep:
     # CHROMATOGRAPHY
     # ──────────────────────────────────────────────────────────────
 
-    def test_fiscal_chromatography_onshore(self):
-        c = get_sla_config(_MockDb(), "Fiscal", "Chromatography", "Onshore")
+    def test_fiscal_chromatography_onshore(self, empty_db):
+        c = get_sla_config(empty_db, "Fiscal", "Chromatography", "Onshore")
         assert c["interval_days"] == 30
         assert c["disembark_days"] == 10
         assert c["lab_days"] == 20
@@ -35,8 +28,8 @@ class TestSlaMatrixFullSweep:
         assert c["fc_days"] == 3
         assert c["fc_is_business_days"] is True
 
-    def test_fiscal_chromatography_offshore(self):
-        c = get_sla_config(_MockDb(), "Fiscal", "Chromatography", "Offshore")
+    def test_fiscal_chromatography_offshore(self, empty_db):
+        c = get_sla_config(empty_db, "Fiscal", "Chromatography", "Offshore")
         assert c["interval_days"] == 30
         assert c["disembark_days"] is None, "Offshore: Disembark deve ser NA"
         assert c["lab_days"] is None, "Offshore: Lab deve ser NA"
@@ -44,8 +37,8 @@ class TestSlaMatrixFullSweep:
         assert c["fc_days"] == 3
         assert c["fc_is_business_days"] is True
 
-    def test_apropriation_chromatography_onshore(self):
-        c = get_sla_config(_MockDb(), "Apropriation", "Chromatography", "Onshore")
+    def test_apropriation_chromatography_onshore(self, empty_db):
+        c = get_sla_config(empty_db, "Apropriation", "Chromatography", "Onshore")
         assert c["interval_days"] == 90
         assert c["disembark_days"] == 10
         assert c["lab_days"] == 20
@@ -53,16 +46,16 @@ class TestSlaMatrixFullSweep:
         assert c["fc_days"] == 3
         assert c["fc_is_business_days"] is True
 
-    def test_apropriation_chromatography_offshore(self):
-        c = get_sla_config(_MockDb(), "Apropriation", "Chromatography", "Offshore")
+    def test_apropriation_chromatography_offshore(self, empty_db):
+        c = get_sla_config(empty_db, "Apropriation", "Chromatography", "Offshore")
         assert c["interval_days"] == 90
         assert c["disembark_days"] is None
         assert c["lab_days"] is None
         assert c["report_days"] == 25
         assert c["fc_days"] == 3
 
-    def test_operational_chromatography_onshore(self):
-        c = get_sla_config(_MockDb(), "Operational", "Chromatography", "Onshore")
+    def test_operational_chromatography_onshore(self, empty_db):
+        c = get_sla_config(empty_db, "Operational", "Chromatography", "Onshore")
         assert c["interval_days"] == 180
         assert c["disembark_days"] == 10
         assert c["lab_days"] == 20
@@ -70,8 +63,8 @@ class TestSlaMatrixFullSweep:
         assert c["fc_days"] == 10
         assert c["fc_is_business_days"] is True
 
-    def test_operational_chromatography_offshore(self):
-        c = get_sla_config(_MockDb(), "Operational", "Chromatography", "Offshore")
+    def test_operational_chromatography_offshore(self, empty_db):
+        c = get_sla_config(empty_db, "Operational", "Chromatography", "Offshore")
         assert c["interval_days"] == 180
         assert c["disembark_days"] is None
         assert c["lab_days"] is None
@@ -82,16 +75,16 @@ class TestSlaMatrixFullSweep:
     # PVT
     # ──────────────────────────────────────────────────────────────
 
-    def test_apropriation_pvt_onshore(self):
-        c = get_sla_config(_MockDb(), "Apropriation", "PVT", "Onshore")
+    def test_apropriation_pvt_onshore(self, empty_db):
+        c = get_sla_config(empty_db, "Apropriation", "PVT", "Onshore")
         assert c["interval_days"] == 90
         assert c["disembark_days"] == 10
         assert c["lab_days"] == 20
         assert c["report_days"] == 25
         assert c["fc_days"] is None, "PVT nunca exige FC Update"
 
-    def test_apropriation_pvt_offshore(self):
-        c = get_sla_config(_MockDb(), "Apropriation", "PVT", "Offshore")
+    def test_apropriation_pvt_offshore(self, empty_db):
+        c = get_sla_config(empty_db, "Apropriation", "PVT", "Offshore")
         assert c["interval_days"] == 90
         assert c["disembark_days"] is None
         assert c["lab_days"] is None
@@ -102,16 +95,16 @@ class TestSlaMatrixFullSweep:
     # ENXOFRE (Sulfur)
     # ──────────────────────────────────────────────────────────────
 
-    def test_fiscal_enxofre_onshore(self):
-        c = get_sla_config(_MockDb(), "Fiscal", "Enxofre", "Onshore")
+    def test_fiscal_enxofre_onshore(self, empty_db):
+        c = get_sla_config(empty_db, "Fiscal", "Enxofre", "Onshore")
         assert c["interval_days"] == 365
         assert c["disembark_days"] == 10
         assert c["lab_days"] == 20
         assert c["report_days"] == 25
         assert c["fc_days"] is None, "Enxofre não gera FC"
 
-    def test_fiscal_enxofre_offshore(self):
-        c = get_sla_config(_MockDb(), "Fiscal", "Enxofre", "Offshore")
+    def test_fiscal_enxofre_offshore(self, empty_db):
+        c = get_sla_config(empty_db, "Fiscal", "Enxofre", "Offshore")
         assert c["interval_days"] == 365
         assert c["disembark_days"] is None
         assert c["lab_days"] is None
@@ -122,32 +115,32 @@ class TestSlaMatrixFullSweep:
     # VISCOSITY
     # ──────────────────────────────────────────────────────────────
 
-    def test_fiscal_viscosity_onshore(self):
-        c = get_sla_config(_MockDb(), "Fiscal", "Viscosity", "Onshore")
+    def test_fiscal_viscosity_onshore(self, empty_db):
+        c = get_sla_config(empty_db, "Fiscal", "Viscosity", "Onshore")
         assert c["interval_days"] == 365
         assert c["disembark_days"] == 10
         assert c["lab_days"] == 20
         assert c["report_days"] == 45
         assert c["fc_days"] is None
 
-    def test_fiscal_viscosity_offshore(self):
-        c = get_sla_config(_MockDb(), "Fiscal", "Viscosity", "Offshore")
+    def test_fiscal_viscosity_offshore(self, empty_db):
+        c = get_sla_config(empty_db, "Fiscal", "Viscosity", "Offshore")
         assert c["interval_days"] == 365
         assert c["disembark_days"] is None
         assert c["lab_days"] is None
         assert c["report_days"] == 45
         assert c["fc_days"] is None
 
-    def test_custody_transfer_viscosity_onshore(self):
-        c = get_sla_config(_MockDb(), "Custody Transfer", "Viscosity", "Onshore")
+    def test_custody_transfer_viscosity_onshore(self, empty_db):
+        c = get_sla_config(empty_db, "Custody Transfer", "Viscosity", "Onshore")
         assert c["interval_days"] == 365
         assert c["disembark_days"] == 10
         assert c["lab_days"] == 20
         assert c["report_days"] == 45
         assert c["fc_days"] is None
 
-    def test_custody_transfer_viscosity_offshore(self):
-        c = get_sla_config(_MockDb(), "Custody Transfer", "Viscosity", "Offshore")
+    def test_custody_transfer_viscosity_offshore(self, empty_db):
+        c = get_sla_config(empty_db, "Custody Transfer", "Viscosity", "Offshore")
         assert c["interval_days"] == 365
         assert c["disembark_days"] is None
         assert c["lab_days"] is None
@@ -158,14 +151,14 @@ class TestSlaMatrixFullSweep:
     # EDGE CASES & NEGATIVE TESTS
     # ──────────────────────────────────────────────────────────────
 
-    def test_invalid_combination_returns_none(self):
+    def test_invalid_combination_returns_none(self, empty_db):
         """Combinação inexistente na matriz não pode crashar o backend."""
-        result = get_sla_config(_MockDb(), "Inventado", "Inexistente", "Marte")
+        result = get_sla_config(empty_db, "Inventado", "Inexistente", "Marte")
         assert result is None, "get_sla_config DEVE retornar None para combinações inexistentes"
 
-    def test_case_sensitivity_guard(self):
+    def test_case_sensitivity_guard(self, empty_db):
         """Verifica se a lookup é case-sensitive (deve ser, conforme implementação)."""
-        result = get_sla_config(_MockDb(), "fiscal", "chromatography", "onshore")
+        result = get_sla_config(empty_db, "fiscal", "chromatography", "onshore")
         # Se a implementação for case-insensitive, isso passará; se for case-sensitive, retornará None
         # Este test documenta o comportamento atual para evitar regressões silenciosas
         assert result is None or result["interval_days"] == 30
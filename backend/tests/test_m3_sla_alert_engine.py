@@ -16,7 +16,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.main import app
-from app.database import Base, get_db
+from app.database import Base, get_db, get_async_db
 from app.dependencies import get_current_user
 from app import models
 
@@ -39,9 +39,10 @@ def override_get_current_user_sla():
 
 
 @pytest.fixture(scope="module")
-def sla_client():
+def sla_client(async_db_override_factory):
     """Dedicated client with its own DB for SLA tests."""
     app.dependency_overrides[get_db] = override_get_db_sla
+    app.dependency_overrides[get_async_db] = async_db_override_factory(sla_engine)
     app.dependency_overrides[get_current_user] = override_get_current_user_sla
     Base.metadata.create_all(bind=sla_engine)
     with TestClient(app) as c:
@@ -5,13 +5,13 @@ trigger de Emergency Sample após reprovação, e a proteção
 contra uploads em amostras em estado inválido.
 """
 import pytest
-from unittest.mock import patch, mock_open
+from unittest.mock import patch
 from app.services.pdf_parser import CROResult, PVTResult
 
 
 def _upload(client, sample_id, mock_result):
     with patch("app.routers.chemical.parse_pdf_bytes", return_value=mock_result), \
-         patch("app.routers.chemical.open", mock_open()), \
+         patch("app.routers.chemical._write_file"), \
          patch("app.routers.chemical.os.makedirs"):
         return client.post(
             f"/api/chemical/samples/{sample_id}/validate-report",
@@ -111,7 +111,7 @@ def test_reupload_does_not_duplicate_results(client, sp_factory, sample_factory)
 def test_upload_to_nonexistent_sample_returns_404(client):
     """Upload para sample inexistente deve retornar 404."""
     with patch("app.routers.chemical.os.makedirs"), \
-         patch("app.routers.chemical.open", mock_open()):
+         patch("app.routers.chemical._write_file"):
         res = client.post(
             "/api/chemical/samples/999999/validate-report",
             files={"file": ("r.pdf", b"dummy", "application/pdf")}
@@ -16,7 +16,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.main import app
-from app.database import Base, get_db
+from app.database import Base, get_db, get_async_db
 from app.dependencies import get_current_user
 
 # --- Isolated DB for Pipeline tests ---
@@ -38,9 +38,10 @@ def override_get_current_user_pipe():
 
 
 @pytest.fixture(scope="module")
-def pipe_client():
+def pipe_client(async_db_override_factory):
     """Dedicated client for pipeline tests."""
     app.dependency_overrides[get_db] = override_get_db_pipe
+    app.dependency_overrides[get_async_db] = async_db_override_factory(pipe_engine)
     app.dependency_overrides[get_current_user] = override_get_current_user_pipe
     Base.metadata.create_all(bind=pipe_engine)
     with TestClient(app) as c:
@@ -107,11 +108,10 @@ class TestValidateReportPipeline:
 
     def _upload_pdf(self, client, sample_id, mock_result, filename="test_report.pdf"):
         """Helper to upload a fake PDF with mocked parsing and file I/O."""
-        from unittest.mock import mock_open
         fake_pdf = BytesIO(b"%PDF-1.4 fake content")
         # Patch at the import site (the router), not at the definition site (pdf_parser)
         with patch("app.routers.chemical.parse_pdf_bytes", return_value=mock_result), \
-             patch("app.routers.chemical.open", mock_open()), \
+             patch("app.routers.chemical._write_file"), \
              patch("app.routers.chemical.os.makedirs"):
             response = client.post(
                 f"/api/chemical/samples/{sample_id}/validate-report",
@@ -155,7 +155,7 @@ class TestValidateReportPipeline:
             "app.routers.chemical.parse_pdf_bytes",
             side_effect=ValueError("Unknown report type"),
         ), patch("app.routers.chemical.os.makedirs"), \
-           patch("app.routers.chemical.open"):
+           patch("app.routers.chemical._write_file"):
             response = pipe_client.post(
                 f"/api/chemical/samples/{sample['id']}/validate-report",
                 files={"file": ("garbage.pdf", fake_pdf, "application/pdf")},
@@ -0,0 +1,99 @@
+"""
+M3 — Pool de processos para parse de laudos PDF.
+
+Cobre:
+ - Parse no pool (processo separado) produz o mesmo resultado do parse inline; ValueError propaga.
+ - Limite PDF_PARSE_MAX_PENDING: excedente recebe ParserBusyError; gauges de fila voltam a zero.
+ - validate-report faz o parse fora da thread do event loop e responde 503 quando o pool está cheio.
+"""
+import asyncio
+import glob
+import os
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from app.services import parse_pool, pdf_parser
+from app.services.parse_pool import ParserBusyError
+from app.services.pdf_parser import CROResult
+
+REPORTS = os.path.join(os.path.dirname(os.path.dirname(__file__)), "uploads", "reports")
+
+
+def _gauge(metric):
+    return metric._value.get()
+
+
+def test_pool_matches_inline_parse(monkeypatch):
+    monkeypatch.setattr(parse_pool, "PDF_PARSE_WORKERS", 1)
+    with open(sorted(glob.glob(os.path.join(REPORTS, "*CRO*.pdf")))[0], "rb") as f:
+        data = f.read()
+    try:
+        assert parse_pool.run(pdf_parser.parse_pdf_bytes, data, "x.pdf") == pdf_parser.parse_pdf_bytes(data, "x.pdf")
+        with pytest.raises(ValueError, match="valid PDF"):
+            parse_pool.run(pdf_parser.parse_pdf_bytes, b"not a pdf", "x.pdf")
+    finally:
+        parse_pool.shutdown()
+    assert _gauge(parse_pool.PENDING) == 0
+
+
+def test_pending_limit_rejects_excess(monkeypatch):
+    monkeypatch.setattr(parse_pool, "PDF_PARSE_WORKERS", 0)
+    monkeypatch.setattr(parse_pool, "PDF_PARSE_MAX_PENDING", 1)
+    started, release = threading.Event(), threading.Event()
+
+    def slow_parse():
+        started.set()
+        release.wait(5)
+        return "done"
+
+    results = []
+    worker = threading.Thread(target=lambda: results.append(parse_pool.run(slow_parse)))
+    worker.start()
+    assert started.wait(5)
+    assert _gauge(parse_pool.PENDING) == 1
+
+    rejected = parse_pool.REJECTED._value.get()
+    with pytest.raises(ParserBusyError):
+        parse_pool.run(slow_parse)
+    assert parse_pool.REJECTED._value.get() == rejected + 1
+
+    release.set()
+    worker.join(5)
+    assert results == ["done"]
+    assert _gauge(parse_pool.PENDING) == 0 and _gauge(parse_pool.QUEUE_DEPTH) == 0
+
+
+def _upload(client, sample_id, **parse_kwargs):
+    with patch("app.routers.chemical.parse_pdf_bytes", **parse_kwargs), \
+         patch("app.routers.chemical._write_file"), \
+         patch("app.routers.chemical.os.makedirs"):
+        return client.post(
+            f"/api/chemical/samples/{sample_id}/validate-report",
+            files={"file": ("r.pdf", b"%PDF-1.4", "application/pdf")},
+        )
+
+
+def test_endpoint_parses_off_event_loop_thread(client, sp_factory, sample_factory):
+    sample = sample_factory(sample_point_id=sp_factory()["id"], status="Report issue")
+    on_loop = []
+
+    def fake_parse(pdf_bytes, filename=""):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return CROResult(boletim="CRO-POOL-001", o2=0.1)
+
+    res = _upload(client, sample["id"], side_effect=fake_parse)
+    assert res.status_code == 200
+    assert on_loop == [False]
+
+
+def test_endpoint_returns_503_when_pool_full(client, sp_factory, sample_factory):
+    sample = sample_factory(sample_point_id=sp_factory()["id"], status="Report issue")
+    res = _upload(client, sample["id"], side_effect=ParserBusyError("busy"))
+    assert res.status_code == 503
+    assert res.headers["retry-after"] == "5"
@@ -0,0 +1,82 @@
+"""
+M3 — Extração de texto página a página com parada antecipada.
+
+Cobre:
+ - Laudo completo na 1ª página: páginas anexas (cromatogramas) não são lidas; mesmos valores.
+ - Campos incompletos: leitura para em PDF_MAX_PAGES (0 = todas as páginas).
+ - raw_text só é mantido com keep_raw_text / PDF_KEEP_RAW_TEXT.
+"""
+import glob
+import os
+
+import fitz
+import pytest
+
+from app.services import pdf_parser
+from scripts.bench_pdf_parser import SPECS_DIR, legacy_extract
+
+
+def _with_attachments(path, extra_pages):
+    doc = fitz.open(path)
+    for i in range(extra_pages):
+        doc.new_page().insert_text((72, 72), f"Cromatograma anexo {i}")
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+@pytest.fixture
+def pages_read(monkeypatch):
+    calls = []
+    original = fitz.Page.get_text
+
+    def counting(self, *args, **kwargs):
+        calls.append(self.number)
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(fitz.Page, "get_text", counting)
+    return calls
+
+
+@pytest.mark.parametrize("kind", ["PVT", "CRO"])
+def test_complete_first_page_stops_early(kind, pages_read):
+    path = glob.glob(os.path.join(SPECS_DIR, f"{kind}*.pdf"))[0]
+    with fitz.open(path) as doc:
+        full_text = "".join(page.get_text() for page in doc)
+    pages_read.clear()
+
+    result = pdf_parser.parse_pdf_bytes(_with_attachments(path, 8), max_pages=0)
+    assert pages_read == [0]
+    expected = legacy_extract(full_text)
+    expected.raw_text = ""
+    assert result == expected and result.type_source == "content"
+
+
+def test_incomplete_report_reads_up_to_page_cap(pages_read, monkeypatch):
+    doc = fitz.open()
+    for i in range(6):
+        doc.new_page().insert_text((72, 72), f"Boletim PVT parcial {i}")
+    data = doc.tobytes()
+    doc.close()
+
+    result = pdf_parser.parse_pdf_bytes(data, max_pages=3)
+    assert pages_read == [0, 1, 2] and result.report_type == "PVT"
+
+    pages_read.clear()
+    pdf_parser.parse_pdf_bytes(data, max_pages=0)
+    assert pages_read == list(range(6))
+
+    pages_read.clear()
+    monkeypatch.setattr(pdf_parser, "PDF_MAX_PAGES", 2)
+    pdf_parser.parse_pdf_bytes(data)
+    assert pages_read == [0, 1]
+
+
+def test_raw_text_retention_is_optional(monkeypatch):
+    path = glob.glob(os.path.join(SPECS_DIR, "PVT*.pdf"))[0]
+    assert pdf_parser.parse_pdf(path).raw_text == ""
+    kept = pdf_parser.parse_pdf(path, keep_raw_text=True)
+    assert "Massa específica" in kept.raw_text
+
+    monkeypatch.setattr(pdf_parser, "PDF_KEEP_RAW_TEXT", True)
+    assert pdf_parser.parse_pdf(path).raw_text == kept.raw_text
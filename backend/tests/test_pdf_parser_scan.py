@@ -0,0 +1,79 @@
+"""
+M3 — Tabela de padrões pré-compilada do pdf_parser (scan único).
+
+Cobre:
+ - Mesmos campos que a extração anterior (um re.search por campo) nos laudos de
+   "MMT Specifications/" e em textos sintéticos com casos de borda
+   (espaços atravessando linhas, \\b de FE, maiúsculas/minúsculas, cabeçalho sem boletim).
+ - Regras sem gatilho no texto não executam o regex.
+"""
+import dataclasses
+import glob
+import os
+
+import fitz
+import pytest
+from scripts.bench_pdf_parser import SPECS_DIR, legacy_cro, legacy_detect, legacy_extract, legacy_pvt
+
+from app.services import pdf_parser
+
+SYNTHETIC = [
+    "",
+    "PVT",
+    "PVT\n",
+    "CRO\t x",
+    "xPVT y\nCRO z",
+    "Boletim de Resultado de Análise N°\nPVT Sepetiba/26-16901\n",
+    "Boletim de Resultado de Análise N°\nRelatório 12\nPVT\nSepetiba/26-1\n",
+    "Boletim de Resultado de Análise N°\n\nBoletim de Resultado de Análise N°\nCRO X/26-2",
+    "Ponto: 662-AP-2233\n/\nP-02\n(MRO\n16)\nfim",
+    "xx 12-AP-2233 / P-02 and 771-AP-0602 / P-02 (MRO-16)",
+    "FPSO\n\nSepetiba\n17/01/2026\n",
+    "FPSO Sepetiba 01/01/2025\nlixo\nData de Receb. da Amostra:\nem 02/02/2026 e 03/03/2026",
+    "COMPOSIÇÃO do GÁS natural",
+    "concentração \n  molar",
+    "CROMATOGRAFIA",
+    "İstanbul cromatografia",
+    "REFE\n1,0\nFE\n0,8241\n",
+    "Massa específica absoluta do óleo - 20 °C\nk = 2\nMassa específica absoluta\n875,39\n",
+    "RGO ou RS\n\nRGO ou RS\n88,0571",
+    "O2\nOxigênio\n% mol\n0,1\nO2\nOxigênio\nmol\n0,02\n",
+    "Densidade Relativa do Gas Real\n-\n0,6\nDensidade Relativa do Gás Real\nx\n0,7",
+]
+
+
+def _texts():
+    texts = list(SYNTHETIC)
+    for path in sorted(glob.glob(os.path.join(SPECS_DIR, "*.pdf"))):
+        with fitz.open(path) as doc:
+            texts.append("".join(page.get_text() for page in doc))
+    return texts
+
+
+@pytest.mark.parametrize("text", _texts())
+def test_scan_matches_per_field_search(text):
+    assert pdf_parser.detect_report_type(text) == legacy_detect(text)
+    assert pdf_parser.extract_pvt(text) == legacy_pvt(text)
+    assert pdf_parser.extract_cro(text) == legacy_cro(text)
+    try:
+        current = dataclasses.asdict(pdf_parser._extract(text, keep_raw_text=True))
+    except ValueError:
+        current = None
+    legacy = legacy_extract(text)
+    assert current == (dataclasses.asdict(legacy) if legacy else None)
+
+
+def test_rules_without_triggers_never_run(monkeypatch):
+    ran = []
+    rule = pdf_parser._RULES["tag_point"]
+
+    class Spy:
+        def search(self, *args):
+            ran.append(args)
+            return rule.pattern.search(*args)
+
+    monkeypatch.setitem(pdf_parser._RULES, "tag_point", dataclasses.replace(rule, pattern=Spy()))
+    assert pdf_parser._extract_tag_point("PVT report without a point") is None
+    assert ran == []
+    assert pdf_parser._extract_tag_point("a\nb 662-AP-2233 / P-02") == "662-AP-2233 / P-02"
+    assert ran[0][1] == 2  # started at the line holding "-AP-"
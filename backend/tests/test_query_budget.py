@@ -0,0 +1,127 @@
+"""
+Observability — SQL query budgets and N+1 detection.
+
+Cobre:
+ - Header X-DB-Query-Count / X-DB-Query-Time-Ms só com SQL_DEBUG_HEADERS.
+ - GET /api/equipment/: nº de queries constante (calculate_health sobre certificates).
+ - POST /api/chemical/check-slas: sem lazy-load de meter / sample_point por amostra.
+ - ExportService: sem lazy-load de res.task.equipment / sample_point.
+ - Detector de N+1 registra a rota no contador Prometheus.
+"""
+from datetime import date, datetime, timedelta
+
+from app import metrics, models
+from app.database import get_db
+from app.main import app
+from app.routers.chemical import check_sampling_slas
+from app.schemas.export import ExportRequest
+from app.services.export_service import ExportService
+from conftest import override_get_db
+
+
+def test_debug_headers_are_opt_in(client):
+    assert "X-DB-Query-Count" not in client.get("/api/chemical/meters").headers
+
+
+def test_debug_headers_report_count_and_time(client, query_budget):
+    res = client.get("/api/chemical/meters")
+    assert int(res.headers["X-DB-Query-Count"]) >= 1
+    assert float(res.headers["X-DB-Query-Time-Ms"]) >= 0.0
+
+
+def test_equipment_list_query_count_is_constant(client, query_budget, equipment_factory, certificate_factory):
+    def _list():
+        return client.get("/api/equipment/", params={"fpso_name": "FPSO Budget Equipment"})
+
+    for _ in range(2):
+        certificate_factory(equipment_factory(fpso_name="FPSO Budget Equipment")["id"])
+    res = _list()
+    small = query_budget.check(res, max_queries=5)
+    listed = len(res.json())
+
+    for _ in range(6):
+        certificate_factory(equipment_factory(fpso_name="FPSO Budget Equipment")["id"])
+    res = _list()
+    assert len(res.json()) == listed + 6
+    assert query_budget.check(res, max_queries=small)
+
+
+def _seed_overdue_samples(db, n):
+    meter = models.InstrumentTag(tag_number=f"FT-BUDGET-{n}", description="Budget meter", classification="Fiscal")
+    db.add(meter)
+    db.flush()
+    for i in range(n):
+        sp = models.SamplePoint(tag_number=f"SP-BUDGET-{n}-{i}", fpso_name="FPSO Budget")
+        db.add(sp)
+        db.flush()
+        db.add(models.Sample(
+            sample_id=f"S-BUDGET-{n}-{i}", type="Chromatography", local="Onshore",
+            status=models.SampleStatus.SAMPLE.value, sampling_date=date.today() - timedelta(days=60),
+            sample_point_id=sp.id, meter_id=meter.id,
+        ))
+    db.commit()
+
+
+def test_check_slas_does_not_lazy_load_relationships(db_session, query_budget):
+    _seed_overdue_samples(db_session, 12)
+    db_session.expunge_all()  # force relationship loads to hit the DB
+    with query_budget.block(max_queries=200) as stats:
+        check_sampling_slas(db=db_session)
+    assert stats.count_matching("FROM sample_points WHERE") == 0
+    assert stats.count_matching("FROM instrument_tags WHERE") == 0
+
+
+def test_export_does_not_lazy_load_equipment(db_session, query_budget):
+    node = models.HierarchyNode(tag="SYS-BUDGET", description="Budget system", level_type="System")
+    db_session.add(node)
+    db_session.flush()
+    db_session.add(models.InstrumentTag(tag_number="PT-BUDGET-EXPORT", description="x", hierarchy_node_id=node.id))
+    for i in range(10):
+        eq = models.Equipment(serial_number=f"SN-BUDGET-EXP-{i}", model="M", equipment_type="Pressure Transmitter")
+        db_session.add(eq)
+        db_session.flush()
+        task = models.CalibrationTask(equipment_id=eq.id, tag="PT-BUDGET-EXPORT", exec_date=date.today())
+        db_session.add(task)
+        db_session.flush()
+        db_session.add(models.CalibrationResult(task_id=task.id, certificate_url="c.pdf"))
+    db_session.commit()
+    node_id = node.id
+    db_session.expunge_all()
+
+    request = ExportRequest(
+        fpso_name="FPSO Budget", fpso_nodes=[node_id],
+        start_date=datetime.utcnow() - timedelta(days=1), end_date=datetime.utcnow() + timedelta(days=1),
+        file_types=["CERTS", "SAMPLING"], format="ZIP",
+    )
+    ExportService.export_jobs["job_budget"] = {"status": "PENDING", "progress": 0}
+    with query_budget.block(max_queries=10) as stats:
+        ExportService.generate_export_zip("job_budget", request, db_session)
+
+    assert ExportService.export_jobs["job_budget"]["status"] == "COMPLETED"
+    assert stats.count_matching("FROM equipments WHERE") == 0
+    assert stats.count_matching("FROM calibration_tasks WHERE") == 0
+
+
+def test_repeated_statement_is_flagged_as_n_plus_one(client, db_session, monkeypatch):
+    _seed_overdue_samples(db_session, 3)
+    # The request must see the seeded samples (earlier modules may leave their own override)
+    monkeypatch.setitem(app.dependency_overrides, get_db, override_get_db)
+    labels = {"method": "POST", "route": "/api/chemical/check-slas"}
+    before = metrics.registry.get_sample_value("mmt_sql_n_plus_one_total", labels) or 0.0
+
+    # The set-based scan runs each statement once, however many samples are overdue
+    monkeypatch.setattr(metrics, "SQL_N_PLUS_ONE_THRESHOLD", 2)
+    client.post("/api/chemical/check-slas")
+    assert (metrics.registry.get_sample_value("mmt_sql_n_plus_one_total", labels) or 0.0) == before
+
+    monkeypatch.setattr(metrics, "SQL_N_PLUS_ONE_THRESHOLD", 1)
+    client.post("/api/chemical/check-slas")
+    assert metrics.registry.get_sample_value("mmt_sql_n_plus_one_total", labels) == before + 1
+
+
+def test_stats_repeated_uses_threshold():
+    with metrics.track_queries() as stats:
+        pass
+    stats.statements = {"SELECT a": 3, "SELECT b": 1}
+    assert stats.repeated(2) == {"SELECT a": 3}
+    assert stats.count_matching("SELECT") == 4
@@ -11,7 +11,7 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
 from app.main import app
-from app.database import Base, get_db
+from app.database import Base, get_db, get_async_db
 from app.dependencies import get_current_user
 
 
@@ -54,8 +54,9 @@ def override_get_db_rbac():
 # ─── Client Fixtures ─────────────────────────────────────────────────────────
 
 @pytest.fixture(scope="module")
-def viewer_client():
+def viewer_client(async_db_override_factory):
     app.dependency_overrides[get_db] = override_get_db_rbac
+    app.dependency_overrides[get_async_db] = async_db_override_factory(rbac_engine)
     app.dependency_overrides[get_current_user] = override_viewer
     Base.metadata.create_all(bind=rbac_engine)
     with TestClient(app) as c:
@@ -63,8 +64,9 @@ def viewer_client():
 
 
 @pytest.fixture(scope="module")
-def inspector_client():
+def inspector_client(async_db_override_factory):
     app.dependency_overrides[get_db] = override_get_db_rbac
+    app.dependency_overrides[get_async_db] = async_db_override_factory(rbac_engine)
     app.dependency_overrides[get_current_user] = override_inspector
     Base.metadata.create_all(bind=rbac_engine)
     with TestClient(app) as c:
@@ -72,8 +74,9 @@ def inspector_client():
 
 
 @pytest.fixture(scope="module")
-def admin_client():
+def admin_client(async_db_override_factory):
     app.dependency_overrides[get_db] = override_get_db_rbac
+    app.dependency_overrides[get_async_db] = async_db_override_factory(rbac_engine)
     app.dependency_overrides[get_current_user] = override_admin
     Base.metadata.create_all(bind=rbac_engine)
     with TestClient(app) as c:
@@ -187,7 +190,7 @@ class TestInspectorAccess:
 
     def test_inspector_can_upload_report(self, inspector_client):
         """Inspector deve conseguir usar o endpoint de upload (sem 401/403)."""
-        from unittest.mock import patch, mock_open
+        from unittest.mock import patch
         from app.services.pdf_parser import CROResult
 
         sp = inspector_client.post("/api/chemical/sample-points", json={
@@ -205,7 +208,7 @@ class TestInspectorAccess:
 
         mock = CROResult(report_type="CRO", boletim="INSP-CRO-001", o2=0.1)
         with patch("app.routers.chemical.parse_pdf_bytes", return_value=mock), \
-             patch("app.routers.chemical.open", mock_open()), \
+             patch("app.routers.chemical._write_file"), \
              patch("app.routers.chemical.os.makedirs"):
             res = inspector_client.post(
                 f"/api/chemical/samples/{sample['id']}/validate-report",
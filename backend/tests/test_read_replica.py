@@ -0,0 +1,105 @@
+"""
+Database — Read replica routing (get_read_db / get_async_read_db).
+
+Cobre:
+ - Sem DATABASE_READ_URL, leituras usam o primário.
+ - Com réplica configurada (segundo arquivo SQLite), GETs pesados leem dela.
+ - Read-your-writes: header explícito e janela após um write do mesmo cliente.
+ - Réplica indisponível → fallback automático para o primário.
+"""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import database
+import app.models as db_models
+from app.database import Base, RecentWriters
+
+
+@pytest.fixture
+def replica(tmp_path, monkeypatch):
+    """Second SQLite file acting as the replica, seeded with one PVT result."""
+    eng = create_engine(f"sqlite:///{tmp_path / 'replica.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=eng)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=eng)
+    with Session() as db:
+        sp = db_models.SamplePoint(tag_number="SP-REPLICA", fpso_name="FPSO Replica")
+        db.add(sp)
+        db.flush()
+        s = db_models.Sample(sample_id="S-REPLICA", type="PVT", sample_point_id=sp.id, status="Plan",
+                             sampling_date=datetime(2026, 1, 10).date())
+        db.add(s)
+        db.flush()
+        db.add(db_models.SampleResult(sample_id=s.id, parameter="density", value=812.5))
+        db.commit()
+        point_id = sp.id
+
+    monkeypatch.setattr(database, "read_engine", eng)
+    monkeypatch.setattr(database, "ReadSessionLocal", Session)
+    monkeypatch.setattr(database, "_replica_down_until", 0.0)
+    database.recent_writers.clear()
+    yield point_id
+    database.recent_writers.clear()
+    eng.dispose()
+
+
+def _history(client, point_id, **headers):
+    return client.get(
+        f"/api/chemical/sample-points/{point_id}/parameter-history",
+        params={"parameter": "density"},
+        headers=headers,
+    )
+
+
+def test_reads_go_to_primary_without_replica(client):
+    assert database.ReadSessionLocal is None
+    assert _history(client, 987654).json() == []
+
+
+def test_reads_are_served_by_replica(client, replica):
+    res = _history(client, replica)
+    assert res.status_code == 200
+    assert [item["value"] for item in res.json()] == [812.5]
+
+
+def test_read_your_writes_header_forces_primary(client, replica):
+    res = _history(client, replica, **{database.READ_YOUR_WRITES_HEADER: "true"})
+    assert res.json() == []
+
+
+def test_client_that_just_wrote_is_pinned_to_primary(client, replica, sp_factory):
+    sp_factory(fpso_name="FPSO Replica Writer")
+    assert _history(client, replica).json() == []
+
+    database.recent_writers.clear()
+    assert len(_history(client, replica).json()) == 1
+
+
+def test_unreachable_replica_falls_back_to_primary(client, tmp_path, monkeypatch):
+    broken = create_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    monkeypatch.setattr(database, "ReadSessionLocal", sessionmaker(bind=broken))
+    monkeypatch.setattr(database, "_replica_down_until", 0.0)
+    database.recent_writers.clear()
+
+    res = _history(client, 1)
+    assert res.status_code == 200
+    assert database._replica_down_until > 0.0
+
+
+def test_recent_writers_window_expires():
+    now = [100.0]
+    writers = RecentWriters(window_seconds=5, clock=lambda: now[0])
+    writers.mark("k")
+    assert writers.is_recent("k")
+    now[0] += 6
+    assert not writers.is_recent("k")
+
+
+def test_recent_writers_stay_bounded():
+    writers = RecentWriters(window_seconds=60, max_size=3)
+    for i in range(10):
+        writers.mark(str(i))
+    assert len(writers._last_write) <= 3
+    assert writers.is_recent("9")
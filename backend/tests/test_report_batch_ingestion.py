@@ -0,0 +1,219 @@
+"""
+M3 — Ingestão em lote de laudos (ZIP ou vários PDFs).
+
+Cobre:
+ - Casamento laudo → amostra por boletim (Laudo Nº) ou tag do ponto + data de coleta;
+   linhas "unmatched", "ambiguous", "duplicate" e "error" sem derrubar o lote.
+ - Lote valida na ordem da data de coleta com histórico compartilhado (1 query por ponto)
+   e chega ao mesmo veredito de uploads sequenciais.
+ - dry_run não grava; lote acima do limite → 413; membro de ZIP grande é recusado pelo cabeçalho.
+ - PDF truncado (erro do PyMuPDF) vira linha "error" sem derrubar o lote; limite de bytes na leitura.
+"""
+import io
+import zipfile
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app import metrics, models
+from app.database import get_db
+from app.main import app
+from conftest import override_get_db
+from app.services import report_cache, report_ingestion
+from app.services.pdf_parser import CROResult, PVTResult
+from app.services.report_cache import parse_pdf_bytes as real_parse_pdf_bytes
+from app.services.validation_engine import _check_2sigma, _get_parameter_histories
+
+FPSO = "FPSO Batch Ingest"
+
+
+@pytest.fixture(scope="module", autouse=True)
+def shared_db():
+    """Point the API at the shared test engine (earlier modules may leave their own override)."""
+    previous = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    yield
+    app.dependency_overrides[get_db] = previous
+
+
+@pytest.fixture(autouse=True)
+def fake_reports(monkeypatch, tmp_path):
+    """Uploaded bytes name the parsed result to return; files go to a temp reports dir."""
+    reports = {}
+
+    def _parse(pdf_bytes, filename=""):
+        if pdf_bytes not in reports:
+            raise ValueError("File does not appear to be a valid PDF")
+        return reports[pdf_bytes]
+
+    monkeypatch.setattr(report_cache, "parse_pdf_bytes", _parse)
+    monkeypatch.setattr(report_cache, "REPORTS_DIR", str(tmp_path))
+    return reports
+
+
+def _zip(members):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return buf.getvalue()
+
+
+def _point(db, tag):
+    sp = models.SamplePoint(tag_number=tag, description="batch", fpso_name=FPSO)
+    db.add(sp)
+    db.flush()
+    return sp
+
+
+def _sample(db, sp, code, day, **kw):
+    s = models.Sample(sample_id=code, type="PVT", status="Report issue", sample_point_id=sp.id,
+                      sampling_date=day, **kw)
+    db.add(s)
+    db.flush()
+    return s
+
+
+def test_tag_key_tolerates_lab_ocr():
+    assert report_ingestion.tag_key("771-AP-0602 / P-02 (MRO-16)") == report_ingestion.tag_key("T71-AP-0602")
+    assert report_ingestion.tag_key("Poço LL-28 (P-1)") is None
+
+
+def test_zip_batch_matches_and_reports_every_file(client, db_session, fake_reports):
+    sp = _point(db_session, "T91-AP-0911 (Batch)")
+    crowded = _point(db_session, "T91-AP-0912")
+    by_boletim = _sample(db_session, sp, "S-BATCH-BOL", date(2026, 3, 1), laudo_number="PVT Batch/26-001")
+    by_tag = _sample(db_session, sp, "S-BATCH-TAG", date(2026, 3, 2))
+    for i in range(2):
+        _sample(db_session, crowded, f"S-BATCH-TWIN-{i}", date(2026, 3, 3))
+    db_session.commit()
+
+    fake_reports.update({
+        b"%PDF bol": PVTResult(boletim="pvt  batch/26-001", density=850.0),
+        b"%PDF tag": CROResult(boletim="CRO Batch/26-002", tag_point="991-AP-0911 / P-01",
+                               sampling_date="02/03/2026", o2=0.9),
+        b"%PDF dup": CROResult(tag_point="T91-AP-0911", sampling_date="02/03/2026", o2=0.1),
+        b"%PDF twin": CROResult(tag_point="T91-AP-0912", sampling_date="03/03/2026", o2=0.1),
+        b"%PDF none": CROResult(tag_point="T91-AP-0999", sampling_date="03/03/2026", o2=0.1),
+    })
+    archive = _zip({"lab/bol.pdf": b"%PDF bol", "lab/tag.pdf": b"%PDF tag", "lab/dup.pdf": b"%PDF dup",
+                    "lab/notes.txt": b"x", "__MACOSX/lab/._bol.pdf": b"junk"})
+    res = client.post("/api/chemical/reports/validate-batch", files=[
+        ("files", ("delivery.zip", archive, "application/zip")),
+        ("files", ("twin.pdf", b"%PDF twin", "application/pdf")),
+        ("files", ("none.pdf", b"%PDF none", "application/pdf")),
+        ("files", ("broken.pdf", b"garbage", "application/pdf")),
+    ])
+    assert res.status_code == 200
+    body = res.json()
+    rows = {f["filename"]: f for f in body["files"]}
+    assert body["total"] == 7 and body["validated"] == 2 and body["reproved"] == 1
+
+    assert rows["delivery.zip/lab/bol.pdf"]["sample_id"] == "S-BATCH-BOL"
+    assert rows["delivery.zip/lab/bol.pdf"]["detail"] == "Matched by boletim"
+    assert rows["delivery.zip/lab/tag.pdf"]["sample_id"] == "S-BATCH-TAG"
+    assert rows["delivery.zip/lab/tag.pdf"]["overall_status"] == "Reproved"
+    assert rows["delivery.zip/lab/dup.pdf"]["status"] == "duplicate"
+    assert rows["delivery.zip/lab/notes.txt"]["status"] == "error"
+    assert rows["twin.pdf"]["status"] == "ambiguous"
+    assert rows["none.pdf"]["status"] == "unmatched"
+    assert rows["broken.pdf"]["status"] == "error"
+
+    db_session.expire_all()
+    tagged = db_session.get(models.Sample, by_tag.id)
+    assert tagged.validation_status == "Reproved" and tagged.lab_report_url.endswith("_tag.pdf")
+    assert [(r.parameter, r.source_pdf) for r in tagged.results] == [("o2", "tag.pdf")]
+    assert db_session.get(models.Sample, by_boletim.id).results[0].parameter == "density"
+
+
+def test_batch_matches_sequential_uploads_with_one_history_query(db_session, fake_reports):
+    sp = _point(db_session, "SP-BATCH-SEQ")
+    base = datetime(2026, 1, 1)
+    for i, value in enumerate([850.0, 850.4, 849.8, 850.2, 850.1, 850.3, 849.9, 850.0, 850.2, 850.1]):
+        s = _sample(db_session, sp, f"S-BATCH-SEQ-{i}", date(2026, 1, 1) + timedelta(days=i))
+        db_session.add(models.SampleResult(sample_id=s.id, parameter="density", value=value, unit="kg/m³",
+                                           created_at=base + timedelta(days=i)))
+    first = _sample(db_session, sp, "S-BATCH-SEQ-A", date(2026, 2, 1), laudo_number="PVT Seq/26-A")
+    second = _sample(db_session, sp, "S-BATCH-SEQ-B", date(2026, 2, 2), laudo_number="PVT Seq/26-B")
+    db_session.commit()
+    fake_reports.update({
+        b"%PDF seq-b": PVTResult(boletim="PVT Seq/26-B", density=851.0, rs=90.0),
+        b"%PDF seq-a": PVTResult(boletim="PVT Seq/26-A", density=856.0, rs=91.0),
+    })
+
+    uploads = [("b.pdf", b"%PDF seq-b"), ("a.pdf", b"%PDF seq-a")]
+    with metrics.track_queries() as stats:
+        report_ingestion.ingest(db_session, uploads, dry_run=True)
+    assert stats.count_matching("FROM sample_results JOIN samples") == 1
+
+    before = _get_parameter_histories(db_session, sp.id, ["density", "rs"], first.id)
+    outcomes = report_ingestion.ingest(db_session, uploads)
+    assert [o.status for o in outcomes] == ["validated", "validated"]
+
+    # A (older) is validated first against the stored history; B then sees A — as if uploaded one by one
+    db_session.expire_all()
+    expected_history = {
+        first.id: before,
+        second.id: _get_parameter_histories(db_session, sp.id, ["density", "rs"], second.id),
+    }
+    for sample in (first, second):
+        for row in db_session.get(models.Sample, sample.id).results:
+            history = expected_history[sample.id][row.parameter]
+            check = _check_2sigma(db_session, row.parameter, row.value, row.unit, history)
+            assert (row.validation_status, row.history_mean, row.history_std) == (
+                check.status, check.history_mean, check.history_std)
+    assert 856.0 in [h["value"] for h in _get_parameter_histories(db_session, sp.id, ["density"], second.id)["density"]]
+
+
+def test_dry_run_and_limits(client, db_session, fake_reports, monkeypatch):
+    sp = _point(db_session, "SP-BATCH-DRY")
+    sample = _sample(db_session, sp, "S-BATCH-DRY", date(2026, 4, 1), laudo_number="CRO Dry/26-1")
+    db_session.commit()
+    fake_reports[b"%PDF dry"] = CROResult(boletim="CRO Dry/26-1", o2=0.1)
+
+    res = client.post("/api/chemical/reports/validate-batch", params={"dry_run": "true"},
+                      files=[("files", ("dry.pdf", b"%PDF dry", "application/pdf"))])
+    assert res.json()["validated"] == 1 and res.json()["dry_run"] is True
+    db_session.expire_all()
+    assert db_session.get(models.Sample, sample.id).results == []
+
+    monkeypatch.setattr(report_ingestion, "MAX_PDF_SIZE_BYTES", 4)
+    outcomes = report_ingestion.ingest(db_session, [("big.zip", _zip({"big.pdf": b"%PDF dry"}))], dry_run=True)
+    assert outcomes[0].status == "error" and "maximum allowed size" in outcomes[0].detail
+
+    monkeypatch.setattr(report_ingestion, "REPORT_BATCH_MAX_FILES", 1)
+    res = client.post("/api/chemical/reports/validate-batch", files=[
+        ("files", ("a.pdf", b"%PDF dry", "application/pdf")), ("files", ("b.pdf", b"%PDF dry", "application/pdf")),
+    ])
+    assert res.status_code == 413
+
+
+def test_corrupt_pdf_is_an_error_row(db_session, monkeypatch):
+    fitz = pytest.importorskip("fitz")
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "Boletim")
+    data = doc.tobytes()
+    truncated = data[: len(data) // 3]
+    monkeypatch.setattr(report_cache, "parse_pdf_bytes", real_parse_pdf_bytes)
+
+    [error] = report_ingestion.parse_all([("bad.pdf", truncated)])
+    assert isinstance(error, RuntimeError)  # pymupdf.FileDataError, not a ValueError
+
+    outcomes = report_ingestion.ingest(db_session, [("bad.pdf", truncated), ("junk.pdf", b"junk")], dry_run=True)
+    assert [(o.filename, o.status) for o in outcomes] == [("bad.pdf", "error"), ("junk.pdf", "error")]
+
+
+def test_upload_size_is_checked_while_reading(monkeypatch):
+    monkeypatch.setattr(report_ingestion, "REPORT_BATCH_MAX_BYTES", 8)
+    reads = []
+
+    class _Stream(io.BytesIO):
+        def read(self, size=-1):
+            reads.append(size)
+            return super().read(size)
+
+    assert report_ingestion.read_uploads([("a.pdf", _Stream(b"x" * 6))], chunk_size=4) == [("a.pdf", b"x" * 6)]
+    reads.clear()
+    with pytest.raises(report_ingestion.BatchTooLargeError):
+        report_ingestion.read_uploads([("a.pdf", _Stream(b"x" * 6)), ("b.pdf", _Stream(b"y" * 1000))], chunk_size=4)
+    assert len(reads) == 4  # a.pdf: 2 chunks + EOF, b.pdf: stopped after its first chunk
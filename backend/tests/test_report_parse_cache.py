@@ -0,0 +1,81 @@
+"""
+M3 — Cache de extração de laudos PDF por SHA-256.
+
+Cobre:
+ - Reenvio dos mesmos bytes não abre o PDF (fitz) e devolve o mesmo resultado.
+ - Mudança de PARSER_VERSION invalida a entrada (novo parse, entrada regravada).
+ - Tipo detectado só pelo nome do arquivo não é cacheado; PDFs inválidos continuam 400/ValueError.
+ - Entrada corrompida é ignorada.
+"""
+import glob
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+
+from app.services import parse_pool, pdf_parser, report_cache
+
+REPORTS = os.path.join(os.path.dirname(os.path.dirname(__file__)), "uploads", "reports")
+
+
+@pytest.fixture(autouse=True)
+def inline_parsing(monkeypatch):
+    # fitz is patched in this process; keep misses out of the worker processes
+    monkeypatch.setattr(parse_pool, "PDF_PARSE_WORKERS", 0)
+
+
+@pytest.fixture
+def pvt_bytes():
+    path = sorted(glob.glob(os.path.join(REPORTS, "*PVT*.pdf")))[0]
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _no_fitz(*args, **kwargs):
+    raise AssertionError("fitz.open called on a cache hit")
+
+
+def test_identical_bytes_skip_fitz(tmp_path, pvt_bytes):
+    first = report_cache.parse_pdf_bytes(pvt_bytes, "a.pdf", reports_dir=str(tmp_path))
+    entry = tmp_path / report_cache.CACHE_SUBDIR / f"{report_cache.content_hash(pvt_bytes)}.json"
+    assert entry.exists()
+
+    with patch.object(pdf_parser.fitz, "open", side_effect=_no_fitz):
+        again = report_cache.parse_pdf_bytes(pvt_bytes, "renamed.pdf", reports_dir=str(tmp_path))
+    assert again == first
+    assert isinstance(again, pdf_parser.PVTResult) and again.density is not None
+
+
+def test_parser_version_change_invalidates(tmp_path, pvt_bytes, monkeypatch):
+    report_cache.parse_pdf_bytes(pvt_bytes, reports_dir=str(tmp_path))
+    monkeypatch.setattr(pdf_parser, "PARSER_VERSION", pdf_parser.PARSER_VERSION + "-next")
+
+    with patch.object(pdf_parser.fitz, "open", wraps=pdf_parser.fitz.open) as opened:
+        report_cache.parse_pdf_bytes(pvt_bytes, reports_dir=str(tmp_path))
+        assert opened.call_count == 1
+        report_cache.parse_pdf_bytes(pvt_bytes, reports_dir=str(tmp_path))
+        assert opened.call_count == 1  # re-cached under the new version
+
+    entry = tmp_path / report_cache.CACHE_SUBDIR / f"{report_cache.content_hash(pvt_bytes)}.json"
+    assert json.loads(entry.read_text())["parser_version"] == pdf_parser.PARSER_VERSION
+
+
+def test_filename_fallback_and_invalid_pdfs_not_cached(tmp_path):
+    with patch.object(pdf_parser.fitz, "open") as mock_fitz:
+        mock_fitz.return_value.__iter__.return_value = [type("P", (), {"get_text": lambda self: "no type"})()]
+        result = report_cache.parse_pdf_bytes(b"%PDF-1.4\n", "Laudo PVT.pdf", reports_dir=str(tmp_path))
+    assert result.report_type == "PVT"
+    assert not (tmp_path / report_cache.CACHE_SUBDIR).exists()
+
+    with pytest.raises(ValueError, match="valid PDF"):
+        report_cache.parse_pdf_bytes(b"not a pdf", reports_dir=str(tmp_path))
+
+
+def test_corrupt_entry_is_ignored(tmp_path, pvt_bytes):
+    entry = tmp_path / report_cache.CACHE_SUBDIR / f"{report_cache.content_hash(pvt_bytes)}.json"
+    entry.parent.mkdir()
+    entry.write_text("{truncated")
+    result = report_cache.parse_pdf_bytes(pvt_bytes, reports_dir=str(tmp_path))
+    assert result.density is not None
+    assert json.loads(entry.read_text())["report_type"] == "PVT"
@@ -0,0 +1,55 @@
+"""
+Observability — Prometheus /metrics and per-request instrumentation.
+
+Cobre:
+ - Latência e contagem por rota templated (não pelo path concreto).
+ - Contagem por status code (incluindo 404 de rota inexistente).
+ - Tempo de banco e nº de queries por request.
+ - Tamanho de resposta e gauge de requests em andamento.
+"""
+from app import metrics
+
+
+def _sample(name, **labels):
+    return metrics.registry.get_sample_value(name, labels) or 0.0
+
+
+def test_latency_is_recorded_per_templated_route(client, sp_factory, sample_factory):
+    sp = sp_factory()
+    s = sample_factory(sp["id"])
+    route = "/api/chemical/samples/{sample_id}"
+    before = _sample("mmt_http_request_duration_seconds_count", method="GET", route=route)
+
+    assert client.get(f"/api/chemical/samples/{s['id']}").status_code == 200
+    assert client.get("/api/chemical/samples/999999").status_code == 404
+
+    assert _sample("mmt_http_request_duration_seconds_count", method="GET", route=route) == before + 2
+    assert _sample("mmt_http_requests_total", method="GET", route=route, status="404") >= 1
+
+
+def test_db_time_and_query_count_per_request(client):
+    route = "/api/chemical/meters"
+    queries_before = _sample("mmt_http_request_db_queries_sum", method="GET", route=route)
+    count_before = _sample("mmt_http_request_db_seconds_count", method="GET", route=route)
+
+    client.get(route)
+
+    assert _sample("mmt_http_request_db_seconds_count", method="GET", route=route) == count_before + 1
+    assert _sample("mmt_http_request_db_queries_sum", method="GET", route=route) >= queries_before + 1
+
+
+def test_response_size_and_unmatched_routes(client):
+    client.get("/health")
+    assert _sample("mmt_http_response_size_bytes_count", method="GET", route="/health") >= 1
+    client.get("/definitely/not/a/route")
+    assert _sample("mmt_http_requests_total", method="GET", route="<unmatched>", status="404") >= 1
+
+
+def test_metrics_endpoint_exposition(client):
+    client.get("/health")
+    res = client.get("/metrics")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain")
+    body = res.text
+    assert 'mmt_http_request_duration_seconds_bucket{le="0.005",method="GET",route="/health"}' in body
+    assert "mmt_http_requests_in_progress" in body
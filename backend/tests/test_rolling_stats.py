@@ -0,0 +1,182 @@
+"""
+M3 — Janelas móveis de estatísticas (2σ) mantidas por (sample point, parâmetro).
+
+Cobre:
+ - Inserções via ORM criam/avançam a janela no mesmo commit (igual ao histórico bruto).
+ - Delete em massa (re-validação), delete ORM, linhas retroativas e rollback.
+ - validate_pvt usa a janela (sem varrer sample_results) com o mesmo resultado.
+ - rebuild_all regenera as janelas e reporta divergências.
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from app import metrics, models
+from app.services import rolling_stats
+from app.services.pdf_parser import PVTResult
+from app.services.validation_engine import _check_2sigma, _get_parameter_histories, validate_pvt
+
+BASE = datetime(2026, 3, 1)
+
+
+def _point(db, tag):
+    sp = models.SamplePoint(tag_number=tag, description="rolling", fpso_name="FPSO Rolling")
+    db.add(sp)
+    db.commit()
+    return sp
+
+
+def _sample(db, sp, code):
+    s = models.Sample(sample_id=code, type="PVT", status="Report issue", sample_point_id=sp.id)
+    db.add(s)
+    db.flush()
+    return s
+
+
+def _add_results(db, sp, start, count, params=("density",)):
+    for i in range(start, start + count):
+        s = _sample(db, sp, f"{sp.tag_number}-{i}")
+        for j, param in enumerate(params):
+            db.add(models.SampleResult(sample_id=s.id, parameter=param, value=850 + (i % 7) * 0.5 + j,
+                                       unit="kg/m3", created_at=BASE + timedelta(days=i)))
+    db.commit()
+
+
+def _window(db, sp, parameter="density"):
+    db.expire_all()
+    return db.query(models.ParameterRollingWindow).filter_by(sample_point_id=sp.id, parameter=parameter).one_or_none()
+
+
+def _assert_matches_raw(db, sp, parameter="density"):
+    window = _window(db, sp, parameter)
+    assert window.capacity == rolling_stats.window_capacity(db, sp.fpso_name)
+    raw = _get_parameter_histories(db, sp.id, [parameter], limit=window.capacity)[parameter]
+    entries = rolling_stats.history_entries(window)
+    assert [{k: e[k] for k in ("value", "date", "sample_id")} for e in entries] == raw
+    assert window.count == len(raw)
+    assert (window.mean, window.std) == rolling_stats.summarize([h["value"] for h in raw])
+    return window
+
+
+def test_inserts_build_and_advance_window(db_session):
+    sp = _point(db_session, "SP-ROLL-INSERT")
+    _add_results(db_session, sp, 0, 4, params=("density", "rs"))
+    assert _assert_matches_raw(db_session, sp).count == 4
+
+    _add_results(db_session, sp, 4, 10, params=("density", "rs"))
+    window = _assert_matches_raw(db_session, sp)
+    assert window.count == window.capacity
+    _assert_matches_raw(db_session, sp, "rs")
+
+
+def test_bulk_delete_and_reupload_reloads_window(db_session):
+    sp = _point(db_session, "SP-ROLL-REUPLOAD")
+    _add_results(db_session, sp, 0, 12)
+    latest = db_session.query(models.Sample).filter_by(sample_id="SP-ROLL-REUPLOAD-11").one()
+
+    # Same sequence as validate_report_endpoint
+    db_session.query(models.SampleResult).filter(models.SampleResult.sample_id == latest.id).delete()
+    rolling_stats.discard_sample(db_session, latest)
+    db_session.add(models.SampleResult(sample_id=latest.id, parameter="density", value=900.0, unit="kg/m3",
+                                       created_at=BASE + timedelta(days=40)))
+    db_session.commit()
+    window = _assert_matches_raw(db_session, sp)
+    assert rolling_stats.history_entries(window)[0]["value"] == 900.0
+
+    db_session.query(models.SampleResult).filter(models.SampleResult.sample_id == latest.id).delete()
+    rolling_stats.discard_sample(db_session, latest)
+    db_session.commit()
+    window = _assert_matches_raw(db_session, sp)
+    assert all(e["sample_pk"] != latest.id for e in rolling_stats.history_entries(window))
+
+
+def test_orm_delete_update_and_backdated_rows(db_session):
+    sp = _point(db_session, "SP-ROLL-ORM")
+    _add_results(db_session, sp, 0, 12)
+
+    newest = db_session.query(models.SampleResult).join(models.Sample).filter(
+        models.Sample.sample_point_id == sp.id).order_by(models.SampleResult.created_at.desc()).first()
+    db_session.delete(newest)
+    db_session.commit()
+    _assert_matches_raw(db_session, sp)
+
+    edited = db_session.query(models.SampleResult).join(models.Sample).filter(
+        models.Sample.sample_point_id == sp.id).order_by(models.SampleResult.created_at.desc()).first()
+    edited.value = 870.0
+    db_session.commit()
+    _assert_matches_raw(db_session, sp)
+
+    s = _sample(db_session, sp, "SP-ROLL-ORM-BACKDATED")
+    db_session.add(models.SampleResult(sample_id=s.id, parameter="density", value=860.0, unit="kg/m3",
+                                       created_at=BASE + timedelta(days=5, hours=12)))
+    db_session.commit()
+    _assert_matches_raw(db_session, sp)
+
+
+def test_rollback_leaves_window_untouched(db_session):
+    sp = _point(db_session, "SP-ROLL-ROLLBACK")
+    _add_results(db_session, sp, 0, 3)
+    before = _window(db_session, sp).entries
+
+    s = _sample(db_session, sp, "SP-ROLL-ROLLBACK-X")
+    db_session.add(models.SampleResult(sample_id=s.id, parameter="density", value=1.0, unit="kg/m3"))
+    db_session.flush()
+    db_session.rollback()
+    assert _window(db_session, sp).entries == before
+    assert rolling_stats.is_current(db_session)
+
+
+def test_validate_pvt_reads_window_instead_of_history(db_session):
+    sp = _point(db_session, "SP-ROLL-VALIDATE")
+    _add_results(db_session, sp, 0, 12, params=("density", "rs", "fe"))
+    current = _sample(db_session, sp, "SP-ROLL-VALIDATE-NEW")
+    db_session.commit()
+    db_session.refresh(current)
+    extracted = PVTResult(density=852.0, rs=853.0, fe=999.0)
+    validate_pvt(extracted, current, db_session)  # warm config cache
+
+    with metrics.track_queries() as stats:
+        result = validate_pvt(extracted, current, db_session)
+    assert stats.count_matching("FROM sample_results JOIN samples") == 0
+    assert stats.count_matching("FROM parameter_rolling_windows") == 1
+
+    raw = _get_parameter_histories(db_session, sp.id, ["density", "rs", "fe"], current.id)
+    for check in result.checks:
+        expected = _check_2sigma(db_session, check.parameter, check.value, check.unit, raw[check.parameter])
+        assert check == expected
+    assert [c.status for c in result.checks] == ["pass", "pass", "fail"]
+
+
+def test_sample_in_window_falls_back_to_history_query(db_session):
+    sp = _point(db_session, "SP-ROLL-EXCLUDE")
+    _add_results(db_session, sp, 0, 11)
+    latest = db_session.query(models.Sample).filter_by(sample_id="SP-ROLL-EXCLUDE-10").one()
+
+    with metrics.track_queries() as stats:
+        result = validate_pvt(PVTResult(density=851.0), latest, db_session)
+    assert stats.count_matching("FROM sample_results JOIN samples") == 1
+    raw = _get_parameter_histories(db_session, sp.id, ["density"], latest.id)["density"]
+    assert result.checks[0].history_values == [h["value"] for h in raw]
+
+
+def test_rebuild_all_repairs_drift(db_session):
+    sp = _point(db_session, "SP-ROLL-REBUILD")
+    _add_results(db_session, sp, 0, 5)
+    s = _sample(db_session, sp, "SP-ROLL-REBUILD-RAW")
+    db_session.commit()
+    # Raw SQL bypasses the ORM hooks, so the window goes stale
+    db_session.execute(
+        text("INSERT INTO sample_results (sample_id, parameter, value, unit, created_at) "
+             "VALUES (:sid, 'density', 777.0, 'kg/m3', :ts)"),
+        {"sid": s.id, "ts": BASE + timedelta(days=60)},
+    )
+    db_session.commit()
+    assert _window(db_session, sp).count == 5
+
+    report = rolling_stats.rebuild_all(db_session)
+    assert report["changed"] >= 1 and report["windows"] >= 1
+    window = _assert_matches_raw(db_session, sp)
+    assert rolling_stats.history_entries(window)[0]["value"] == 777.0
+
+    again = rolling_stats.rebuild_all(db_session)
+    assert again["changed"] == 0 and again["removed"] == 0
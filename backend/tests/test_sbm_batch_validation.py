@@ -0,0 +1,132 @@
+"""
+M3 — Validação SBM agrupada (uma query de histórico) e em lote.
+
+Cobre:
+ - GET /samples/{id}/validate: mesmo resultado do algoritmo original (loop por parâmetro).
+ - Número de queries de histórico constante (1) independente de parâmetros/amostras.
+ - POST /samples/validate com sample_ids e/ou campaign_id; amostras sem resultados/inexistentes em "skipped".
+ - Lote acima de SBM_BATCH_LIMIT é recusado pela contagem, sem carregar amostras/resultados.
+"""
+from datetime import date, timedelta
+
+import pytest
+
+from app import metrics, models
+from app.database import get_db
+from app.main import app
+from app.services.sbm_validation import validate_samples
+from conftest import override_get_db
+
+
+def _legacy(db, sample):
+    """The original per-result implementation, kept as the reference."""
+    out = []
+    for res in sample.results:
+        history = db.query(models.SampleResult.value).join(models.Sample).filter(
+            models.Sample.sample_point_id == sample.sample_point_id,
+            models.SampleResult.parameter == res.parameter,
+            models.Sample.status == models.SampleStatus.FLOW_COMPUTER_UPDATE,
+            models.Sample.id != sample.id,
+        ).order_by(models.Sample.sampling_date.desc(), models.SampleResult.id.desc()).limit(10).all()
+        values = [h[0] for h in history]
+        if len(values) < 3:
+            out.append({"parameter": res.parameter, "status": "Inconclusive (Need 3+ samples)",
+                        "avg": sum(values) / len(values) if values else 0, "std": 0})
+            continue
+        avg = sum(values) / len(values)
+        std = (sum((v - avg) ** 2 for v in values) / len(values)) ** 0.5
+        ok = (avg - 2 * std) <= res.value <= (avg + 2 * std)
+        out.append({"parameter": res.parameter, "status": "Pass" if ok else "Fail", "current": res.value,
+                    "avg": avg, "std": std, "range": [avg - 2 * std, avg + 2 * std]})
+    return {"sample_id": sample.sample_id,
+            "overall_status": "Approved" if all(r["status"] != "Fail" for r in out) else "Reproved",
+            "parameters": out}
+
+
+@pytest.fixture(scope="module", autouse=True)
+def shared_db():
+    """Point the API at the shared test engine (earlier modules may leave their own override)."""
+    previous = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    yield
+    app.dependency_overrides[get_db] = previous
+
+
+@pytest.fixture(scope="module")
+def campaign(db_session):
+    camp = models.SamplingCampaign(name="SBM Batch Campaign", fpso_name="FPSO SBM Batch")
+    db_session.add(camp)
+    db_session.flush()
+    points = [models.SamplePoint(tag_number=f"SP-SBM-BATCH-{i}", fpso_name="FPSO SBM Batch") for i in range(2)]
+    db_session.add_all(points)
+    db_session.flush()
+    base = date(2025, 1, 1)
+    for p_idx, sp in enumerate(points):
+        for i in range(14):
+            s = models.Sample(sample_id=f"SBM-B-{p_idx}-{i}", type="PVT", sample_point_id=sp.id,
+                              status=models.SampleStatus.FLOW_COMPUTER_UPDATE.value,
+                              sampling_date=base + timedelta(days=i * 3), campaign_id=camp.id if i >= 12 else None)
+            db_session.add(s)
+            db_session.flush()
+            db_session.add(models.SampleResult(sample_id=s.id, parameter="density", value=875.0 + (i % 5) * 0.13))
+            db_session.add(models.SampleResult(sample_id=s.id, parameter="rs", value=88.0 + (i % 3) * 0.07))
+        current = models.Sample(sample_id=f"SBM-B-{p_idx}-CURR", type="PVT", sample_point_id=sp.id,
+                                status="Report issue", campaign_id=camp.id)
+        db_session.add(current)
+        db_session.flush()
+        db_session.add(models.SampleResult(sample_id=current.id, parameter="density", value=875.2 if p_idx else 990.0))
+        db_session.add(models.SampleResult(sample_id=current.id, parameter="rs", value=88.05))
+        db_session.add(models.SampleResult(sample_id=current.id, parameter="viscosity", value=3.0))
+    empty = models.Sample(sample_id="SBM-B-EMPTY", type="PVT", sample_point_id=points[0].id, campaign_id=camp.id)
+    db_session.add(empty)
+    db_session.commit()
+    return camp
+
+
+def _campaign_samples(db, camp):
+    return db.query(models.Sample).filter(models.Sample.campaign_id == camp.id).order_by(models.Sample.id).all()
+
+
+def test_single_endpoint_matches_legacy_algorithm(client, db_session, campaign):
+    for sample in _campaign_samples(db_session, campaign):
+        if not sample.results:
+            continue
+        res = client.get(f"/api/chemical/samples/{sample.id}/validate")
+        assert res.status_code == 200
+        assert res.json() == _legacy(db_session, sample)
+
+
+def test_batch_matches_single_and_uses_one_history_query(client, db_session, campaign, query_budget):
+    samples = [s for s in _campaign_samples(db_session, campaign) if s.results]
+    res = client.post("/api/chemical/samples/validate", json={"campaign_id": campaign.id})
+    assert res.status_code == 200
+    query_budget.check(res, max_queries=4)  # samples + results + history (+ auth/session noise)
+    body = res.json()
+    assert [s["sample_id"] for s in body["samples"]] == [s.sample_id for s in samples]
+    for sample, summary in zip(samples, body["samples"], strict=True):
+        assert summary == _legacy(db_session, sample)
+    assert {s["sample_id"]: s["overall_status"] for s in body["samples"]}["SBM-B-0-CURR"] == "Reproved"
+    assert body["skipped"] == [{"id": s.id, "sample_id": "SBM-B-EMPTY", "detail": "No results found for validation"}
+                               for s in _campaign_samples(db_session, campaign) if s.sample_id == "SBM-B-EMPTY"]
+
+    with metrics.track_queries() as stats:
+        validate_samples(db_session, samples)
+    assert stats.count_matching("FROM sample_results JOIN samples") == 1
+
+
+def test_batch_by_ids_reports_missing(client, db_session, campaign):
+    sample = next(s for s in _campaign_samples(db_session, campaign) if s.sample_id == "SBM-B-1-CURR")
+    res = client.post("/api/chemical/samples/validate", json={"sample_ids": [sample.id, 99999999]})
+    body = res.json()
+    assert [s["sample_id"] for s in body["samples"]] == ["SBM-B-1-CURR"]
+    assert body["samples"][0]["overall_status"] == "Approved"
+    assert body["skipped"] == [{"id": 99999999, "sample_id": None, "detail": "Sample not found"}]
+
+    assert client.post("/api/chemical/samples/validate", json={}).status_code == 400
+
+
+def test_oversized_batch_is_refused_by_count(client, campaign, monkeypatch, query_budget):
+    monkeypatch.setattr("app.routers.chemical.SBM_BATCH_LIMIT", 2)
+    res = client.post("/api/chemical/samples/validate", json={"campaign_id": campaign.id})
+    assert res.status_code == 400 and "At most 2" in res.json()["detail"]
+    query_budget.check(res, max_queries=1)  # the count only: no samples or results loaded
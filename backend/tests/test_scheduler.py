@@ -0,0 +1,288 @@
+"""
+M6/M2 — Scheduler em background com lease por job no banco (services/scheduler.py).
+
+Cobre:
+ - Lease: um segundo worker não roda o job enquanto o lease está ativo; lease expirado é retomado.
+ - Cadência compartilhada via next_run_at; job com erro fica registrado, libera o lease e é
+   re-tentado após SCHEDULER_RETRY_SECONDS.
+ - Execução longa renova o lease (SCHEDULER_LEASE_RENEW_SECONDS); com o lease perdido, o job é
+   interrompido no próximo commit e nada mais é gravado.
+ - GET /api/scheduler/jobs, GET /jobs/{name}/runs, POST /jobs/{name}/run (404 / 409 / 403 sem papel admin).
+ - Varredura de calibração: Pending vencida → Overdue + um alerta por ciclo.
+ - Re-check de alertas reconhecidos: reabre se a condição persiste, senão encerra o re-check.
+"""
+import time
+from datetime import date, datetime, timedelta
+from itertools import count
+
+import pytest
+
+from app import models
+from app.database import get_db
+from app.dependencies import get_current_user
+from app.main import app
+from app.models import SampleStatus
+from app.services import scheduler
+from app.services.alerts_service import AlertsService
+from app.services.calibration_service import CALIBRATION_OVERDUE, CalibrationService
+from conftest import override_get_current_user, override_get_db
+
+TODAY = date.today()
+_ids = count(1)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def shared_db():
+    """Point the API at the shared test engine (earlier modules may leave their own override)."""
+    previous = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    yield
+    app.dependency_overrides[get_db] = previous
+
+
+@pytest.fixture(scope="module", autouse=True)
+def harness_admin():
+    """Manual runs are admin-only: act as the harness admin (earlier modules may leave their own user)."""
+    previous = app.dependency_overrides.get(get_current_user)
+    app.dependency_overrides[get_current_user] = override_get_current_user
+    yield
+    app.dependency_overrides[get_current_user] = previous
+
+
+@pytest.fixture
+def fake_job(monkeypatch):
+    """Registers a 'test_job' whose body is set per test."""
+    calls = []
+
+    def _register(run=lambda db, job: {"ok": True}, interval=60):
+        def _run(db, job):
+            calls.append(scheduler.HOLDER)
+            return run(db, job)
+        monkeypatch.setitem(scheduler.JOBS, "test_job", scheduler.Job("test_job", _run, interval, "test"))
+        return calls
+
+    yield _register
+
+
+def _lease(db):
+    db.expire_all()
+    return db.get(models.SchedulerLease, "test_job")
+
+
+def test_active_lease_excludes_other_workers(db_session, fake_job, monkeypatch):
+    calls = fake_job()
+    monkeypatch.setattr(scheduler, "HOLDER", "other-host:1:aaaa")
+    job = scheduler.JOBS["test_job"]
+    assert scheduler.acquire(db_session, job, datetime.utcnow())
+
+    monkeypatch.setattr(scheduler, "HOLDER", "this-host:2:bbbb")
+    assert scheduler.run_job(db_session, "test_job") is None
+    assert scheduler.run_job(db_session, "test_job", force=True) is None
+    assert calls == []
+
+    # The other worker died: its lease expires and this one takes over
+    lease = _lease(db_session)
+    lease.expires_at = datetime.utcnow() - timedelta(seconds=1)
+    db_session.commit()
+    run = scheduler.run_job(db_session, "test_job")
+    assert run.status == "success" and run.holder == "this-host:2:bbbb"
+    assert calls == ["this-host:2:bbbb"]
+
+
+def test_next_run_at_sets_shared_cadence(db_session, fake_job):
+    calls = fake_job(interval=3600)
+    _lease(db_session).next_run_at = None
+    db_session.commit()
+
+    run = scheduler.run_job(db_session, "test_job")
+    lease = _lease(db_session)
+    assert lease.holder is None and lease.expires_at is None
+    assert lease.next_run_at == run.finished_at + timedelta(seconds=3600)
+
+    # Not due yet for any worker; a manual run ignores the cadence
+    assert scheduler.run_job(db_session, "test_job") is None
+    assert scheduler.run_job(db_session, "test_job", trigger="manual", force=True).trigger == "manual"
+    assert len(calls) == 2
+
+
+def test_failed_run_records_error_and_releases(db_session, fake_job, monkeypatch):
+    def _boom(db, job):
+        db.add(models.Alert(title="never committed", type="System"))
+        db.flush()
+        raise RuntimeError("lab system offline")
+
+    monkeypatch.setattr(scheduler, "SCHEDULER_RETRY_SECONDS", 120)
+    fake_job(run=_boom, interval=86400)
+    run = scheduler.run_job(db_session, "test_job", force=True)
+    assert run.status == "error" and run.error == "RuntimeError: lab system offline"
+    assert run.finished_at is not None and run.duration_ms >= 0
+    lease = _lease(db_session)
+    assert lease.holder is None
+    assert lease.next_run_at == run.finished_at + timedelta(seconds=120)  # retried soon, not in a day
+    assert db_session.query(models.Alert).filter(models.Alert.title == "never committed").count() == 0
+
+
+def test_long_run_renews_its_lease(db_session, fake_job, monkeypatch):
+    monkeypatch.setattr(scheduler, "SCHEDULER_LEASE_SECONDS", 2)
+    monkeypatch.setattr(scheduler, "SCHEDULER_LEASE_RENEW_SECONDS", 0.05)
+    seen = []
+
+    def _slow(db, job):
+        claimed = _lease(db).expires_at
+        time.sleep(0.3)
+        seen.append((claimed, _lease(db).expires_at, _lease(db).holder))
+        return {}
+
+    fake_job(run=_slow)
+    assert scheduler.run_job(db_session, "test_job", force=True).status == "success"
+    claimed, renewed, holder = seen[0]
+    assert renewed > claimed and holder == scheduler.HOLDER
+    assert _lease(db_session).holder is None
+
+
+def test_run_that_lost_its_lease_is_stopped(db_session, fake_job, monkeypatch):
+    monkeypatch.setattr(scheduler, "SCHEDULER_LEASE_RENEW_SECONDS", 0.05)
+
+    def _taken_over(db, job):
+        lease = _lease(db)
+        lease.holder = "other-host:1:dddd"  # e.g. this worker stalled past its lease
+        db.commit()
+        time.sleep(0.3)
+        db.add(models.Alert(title="after lease loss", type="System"))
+        db.commit()
+        return {}
+
+    fake_job(run=_taken_over)
+    try:
+        run = scheduler.run_job(db_session, "test_job", force=True)
+        assert run.status == "error" and run.error.startswith("LeaseLostError")
+        assert db_session.query(models.Alert).filter(models.Alert.title == "after lease loss").count() == 0
+        assert _lease(db_session).holder == "other-host:1:dddd"  # not released from under the new holder
+    finally:
+        lease = _lease(db_session)
+        lease.holder = lease.expires_at = None
+        db_session.commit()
+
+
+def test_history_is_pruned(db_session, fake_job, monkeypatch):
+    fake_job()
+    monkeypatch.setattr(scheduler, "SCHEDULER_HISTORY_SIZE", 3)
+    runs = [scheduler.run_job(db_session, "test_job", force=True).id for _ in range(5)]
+    kept = db_session.query(models.JobRun.id).filter(models.JobRun.job_name == "test_job").all()
+    assert sorted(run_id for run_id, in kept) == runs[-3:]
+
+
+def test_scheduler_api(client, db_session):
+    res = client.post("/api/scheduler/jobs/sla_scan/run")
+    assert res.status_code == 200
+    body = res.json()
+    assert body["status"] == "success" and body["trigger"] == "manual"
+    assert set(body["result"]) == {"alerts_created"}
+
+    jobs = {job["name"]: job for job in client.get("/api/scheduler/jobs").json()}
+    assert set(jobs) == {"sla_scan", "alert_recheck", "calibration_sweep"}
+    assert jobs["sla_scan"]["last_run"]["id"] == body["id"]
+    assert jobs["sla_scan"]["next_run_at"] is not None
+
+    runs = client.get("/api/scheduler/jobs/sla_scan/runs?limit=1").json()
+    assert [run["id"] for run in runs] == [body["id"]]
+
+    assert client.get("/api/scheduler/jobs/nope/runs").status_code == 404
+    assert client.post("/api/scheduler/jobs/nope/run").status_code == 404
+
+
+def test_manual_run_requires_admin(client):
+    previous = app.dependency_overrides[get_current_user]
+    app.dependency_overrides[get_current_user] = lambda: {"id": "viewer-1", "role": "Operator"}
+    try:
+        assert client.post("/api/scheduler/jobs/sla_scan/run").status_code == 403
+        assert client.get("/api/scheduler/jobs").status_code == 200
+    finally:
+        app.dependency_overrides[get_current_user] = previous
+
+
+def test_manual_run_conflicts_with_running_job(client, db_session, monkeypatch):
+    monkeypatch.setattr(scheduler, "HOLDER", "other-host:1:cccc")
+    assert scheduler.acquire(db_session, scheduler.JOBS["calibration_sweep"], datetime.utcnow(), force=True)
+    monkeypatch.undo()
+    try:
+        assert client.post("/api/scheduler/jobs/calibration_sweep/run").status_code == 409
+    finally:
+        lease = db_session.get(models.SchedulerLease, "calibration_sweep")
+        lease.holder = lease.expires_at = None
+        db_session.commit()
+
+
+def _task(db, tag, due_date, status=models.CalibrationTaskStatus.PENDING.value):
+    equipment = models.Equipment(serial_number=f"SN-SWEEP-{next(_ids)}", model="M", fpso_name="FPSO Sweep")
+    db.add(equipment)
+    db.flush()
+    task = models.CalibrationTask(equipment_id=equipment.id, tag=tag, due_date=due_date, status=status)
+    db.add(task)
+    db.commit()
+    return task
+
+
+def _calibration_alerts(db, tag):
+    return db.query(models.Alert).filter(models.Alert.tag_number == tag, models.Alert.type == CALIBRATION_OVERDUE).all()
+
+
+def test_calibration_sweep(db_session):
+    late = _task(db_session, "FT-SWEEP-1", TODAY - timedelta(days=3))
+    planned = _task(db_session, "FT-SWEEP-2", TODAY - timedelta(days=1), models.CalibrationTaskStatus.SCHEDULED.value)
+    on_time = _task(db_session, "FT-SWEEP-3", TODAY)
+
+    CalibrationService.sweep_overdue_tasks(db_session)
+    assert CalibrationService.sweep_overdue_tasks(db_session) == {"tasks_marked_overdue": 0, "alerts_created": 0}
+
+    db_session.expire_all()
+    assert (late.status, planned.status, on_time.status) == ("Overdue", "Scheduled", "Pending")
+    [alert] = _calibration_alerts(db_session, "FT-SWEEP-1")
+    assert alert.fpso_name == "FPSO Sweep" and alert.severity == "High"
+    assert len(_calibration_alerts(db_session, "FT-SWEEP-2")) == 1
+    assert _calibration_alerts(db_session, "FT-SWEEP-3") == []
+
+    # Executed late; the next cycle's task falls due too: the same tag is alerted again
+    late.status = models.CalibrationTaskStatus.EXECUTED.value
+    _task(db_session, "FT-SWEEP-1", TODAY + timedelta(days=5))
+    CalibrationService.sweep_overdue_tasks(db_session, today=TODAY + timedelta(days=10))
+    assert len(_calibration_alerts(db_session, "FT-SWEEP-1")) == 2
+
+
+def test_alert_recheck_reopens_or_clears(db_session):
+    point = models.SamplePoint(tag_number="SP-RECHECK", fpso_name="FPSO Recheck")
+    db_session.add(point)
+    db_session.flush()
+    waiting = models.Sample(sample_id="S-RECHECK-1", type="PVT", local="Onshore", sample_point_id=point.id,
+                            status=SampleStatus.SAMPLE.value)
+    done = models.Sample(sample_id="S-RECHECK-2", type="PVT", local="Onshore", sample_point_id=point.id,
+                         status=SampleStatus.REPORT_ISSUE.value)
+    db_session.add_all([waiting, done])
+    _task(db_session, "FT-RECHECK", TODAY - timedelta(days=2))
+
+    acked = datetime.utcnow() - timedelta(days=2)
+    alerts = {
+        key: models.Alert(tag_number=tag, type=kind, acknowledged=1, acknowledged_at=acked, run_recheck=recheck)
+        for key, tag, kind, recheck in (
+            ("still_waiting", "S-RECHECK-1", "Lab Report Overdue", 1),
+            ("moved_on", "S-RECHECK-2", "Lab Report Overdue", 1),
+            ("still_late", "FT-RECHECK", CALIBRATION_OVERDUE, 1),
+            ("opted_out", "S-RECHECK-1", "Lab Report Overdue", 0),
+        )
+    }
+    db_session.add_all(alerts.values())
+    db_session.commit()
+
+    # Acknowledged too recently for a 3-day cycle
+    assert AlertsService.recheck_alerts(db_session, min_age=timedelta(days=3))["checked"] == 0
+    result = AlertsService.recheck_alerts(db_session, min_age=timedelta(days=1))
+    assert result["reopened"] >= 2 and result["cleared"] >= 1
+
+    db_session.expire_all()
+    state = {key: (alert.acknowledged, alert.run_recheck) for key, alert in alerts.items()}
+    assert state == {
+        "still_waiting": (0, 1),
+        "moved_on": (1, 0),
+        "still_late": (0, 1),
+        "opted_out": (1, 0),
+    }
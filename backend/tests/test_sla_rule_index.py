@@ -0,0 +1,113 @@
+"""
+M11 — Índice versionado em memória das regras de SLA (get_sla_config).
+
+Cobre:
+ - Regras do banco + SLA_MATRIX carregadas em 1 query; leituras seguintes sem SQL.
+ - Precedência: status_variation exato → 'Any' no banco → SLA_MATRIX.
+ - Reconstrução em POST/PUT/DELETE /api/config/sla-rules e em commits diretos via ORM.
+ - Regra ainda não commitada não vaza para o índice compartilhado; expiração por TTL.
+"""
+import pytest
+
+from app import metrics, models
+from app.database import get_db
+from app.main import app
+from app.services.sla_matrix import SLARuleIndex, get_sla_config, normalize_key, sla_rules
+from conftest import override_get_db
+
+RULE = {
+    "classification": "Index Test", "analysis_type": "Chromatography", "local": "Onshore",
+    "status_variation": "Reproved", "interval_days": 15, "report_days": 12,
+    "fc_days": None, "fc_is_business_days": False, "reproval_reschedule_days": 4,
+    "needs_validation": True,
+}
+
+
+@pytest.fixture(scope="module", autouse=True)
+def shared_db():
+    """Point the API at the shared test engine (earlier modules may leave their own override)."""
+    previous = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    yield
+    app.dependency_overrides[get_db] = previous
+
+
+def test_normalize_key():
+    assert normalize_key(" fiscal ", "CRO", "onshore", "approved") == ("Fiscal", "Chromatography", "Onshore", "Approved")
+    assert normalize_key("Apropriation", "pvt", None, None) == ("Apropriation", "PVT", "Onshore", "Any")
+
+
+def test_repeated_lookups_hit_memory(db_session):
+    get_sla_config(db_session, "Fiscal", "Chromatography", "Onshore")  # warm
+
+    with metrics.track_queries() as stats:
+        for _ in range(8):
+            assert get_sla_config(db_session, "Fiscal", "CRO", "Onshore")["report_days"] == 25
+            assert get_sla_config(db_session, "Fiscal", "PVT", "Offshore", "Reproved")["interval_days"] == 90
+            assert get_sla_config(db_session, "Unknown", "Nothing", "Mars") is None
+    assert stats.queries == 0
+
+
+def test_api_create_update_delete_rebuild_index(client, db_session):
+    version = sla_rules.version
+    res = client.post("/api/config/sla-rules", json=RULE)
+    assert res.status_code == 200
+    rule_id = res.json()["id"]
+    assert sla_rules.version > version
+
+    try:
+        reproved = get_sla_config(db_session, "Index Test", "CRO", "Onshore", "Reproved")
+        assert reproved["interval_days"] == 15 and reproved["reproval_reschedule_days"] == 4
+        # No 'Any' rule and no SLA_MATRIX row for this classification
+        assert get_sla_config(db_session, "Index Test", "CRO", "Onshore", "Approved") is None
+
+        assert client.put(f"/api/config/sla-rules/{rule_id}", json={**RULE, "interval_days": 20}).status_code == 200
+        assert get_sla_config(db_session, "Index Test", "CRO", "Onshore", "Reproved")["interval_days"] == 20
+    finally:
+        assert client.delete(f"/api/config/sla-rules/{rule_id}").status_code == 200
+    assert get_sla_config(db_session, "Index Test", "CRO", "Onshore", "Reproved") is None
+
+
+def test_db_rule_overrides_matrix_and_any_fallback(db_session):
+    matrix = get_sla_config(db_session, "Operational", "Chromatography", "Offshore", "Approved")
+    assert matrix["interval_days"] == 180
+
+    rule = models.SLARule(classification="Operational", analysis_type="Chromatography", local="Offshore",
+                          status_variation="Any", interval_days=120, report_days=40)
+    db_session.add(rule)
+    db_session.commit()
+    try:
+        cfg = get_sla_config(db_session, "Operational", "CRO", "Offshore", "Approved")
+        assert cfg["interval_days"] == 120 and cfg["status_variation"] == "Any"
+    finally:
+        db_session.delete(rule)
+        db_session.commit()
+    assert get_sla_config(db_session, "Operational", "CRO", "Offshore", "Approved") == matrix
+
+
+def test_uncommitted_rule_is_not_published(db_session):
+    rule = models.SLARule(classification="Pending", analysis_type="PVT", local="Onshore",
+                          status_variation="Any", interval_days=7)
+    db_session.add(rule)
+    db_session.flush()
+    assert get_sla_config(db_session, "Pending", "PVT", "Onshore")["interval_days"] == 7
+    db_session.rollback()
+    assert get_sla_config(db_session, "Pending", "PVT", "Onshore") is None
+
+
+def test_returned_config_is_a_copy(db_session):
+    cfg = get_sla_config(db_session, "Fiscal", "Chromatography", "Onshore")
+    cfg["report_days"] = 999
+    assert get_sla_config(db_session, "Fiscal", "Chromatography", "Onshore")["report_days"] == 25
+
+
+def test_index_expires_after_ttl(db_session):
+    now = [0.0]
+    index = SLARuleIndex(ttl_seconds=10, clock=lambda: now[0])
+    key = normalize_key("Fiscal", "PVT", "Onshore")
+    with metrics.track_queries() as stats:
+        index.get(db_session, key)
+        index.get(db_session, key)
+        now[0] = 11.0
+        index.get(db_session, key)
+    assert stats.queries == 2
@@ -0,0 +1,211 @@
+"""
+M3 — Varredura de SLA incremental (POST /api/chemical/check-slas → services/sla_scan.py).
+
+Cobre:
+ - Corte exato por combinação (classification, type, local) no limite do prazo.
+ - Validation Pending a partir de report_issue_date / fc_days.
+ - Sem duplicar alertas existentes (mesmo reconhecidos); 2ª varredura não cria nada.
+ - Sample point ausente → fpso "Unknown".
+ - Nº de statements constante, independente de quantas amostras estão atrasadas.
+ - sla_check_date recalculado em update-status / due-date; só amostras vencidas são lidas.
+ - Prazo que cai antes de uma varredura anterior (data retroativa) ainda gera alerta.
+ - Reconstrução completa na 1ª execução, com full=True e quando as regras de SLA mudam.
+"""
+from datetime import date, timedelta
+from itertools import count
+
+import pytest
+
+from app import metrics, models
+from app.database import get_db
+from app.main import app
+from app.models import SampleStatus
+from app.services import sla_scan
+from app.services.sla_matrix import get_sla_config
+from conftest import override_get_db
+
+TODAY = date.today()
+_ids = count(1)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def shared_db():
+    """Point the API at the shared test engine (earlier modules may leave their own override)."""
+    previous = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    yield
+    app.dependency_overrides[get_db] = previous
+
+
+def _meter(db, classification):
+    meter = models.InstrumentTag(tag_number=f"FT-SCAN-{next(_ids)}", description="scan", classification=classification)
+    db.add(meter)
+    db.flush()
+    return meter
+
+
+def _sample(db, meter=None, status=SampleStatus.SAMPLE.value, with_point=True, **dates):
+    point = None
+    if with_point:
+        point = models.SamplePoint(tag_number=f"SP-SCAN-{next(_ids)}", description="scan", fpso_name="FPSO Scan")
+        db.add(point)
+        db.flush()
+    sample = models.Sample(
+        sample_id=f"S-SCAN-{next(_ids)}", type="Chromatography", local="Onshore", status=status,
+        sample_point_id=point.id if point else None, meter_id=meter.id if meter else None, **dates,
+    )
+    db.add(sample)
+    db.flush()
+    sla_scan.refresh_sla_check(db, sample)  # as update_sample_status does
+    db.commit()
+    return sample
+
+
+def _alerts(db, sample_id):
+    return db.query(models.Alert).filter(models.Alert.tag_number == sample_id).all()
+
+
+def test_cutoff_is_exact_per_combination(db_session):
+    fiscal, operational = _meter(db_session, "Fiscal"), _meter(db_session, "Operational")
+    fiscal_days = get_sla_config(db_session, "Fiscal", "Chromatography", "Onshore")["report_days"]
+    operational_days = get_sla_config(db_session, "Operational", "Chromatography", "Onshore")["report_days"]
+    assert fiscal_days < operational_days
+
+    due = _sample(db_session, fiscal, sampling_date=TODAY - timedelta(days=fiscal_days))
+    not_yet = _sample(db_session, fiscal, sampling_date=TODAY - timedelta(days=fiscal_days - 1))
+    longer_sla = _sample(db_session, operational, sampling_date=TODAY - timedelta(days=fiscal_days))
+
+    sla_scan.check_sampling_slas(db_session)
+
+    [alert] = _alerts(db_session, due.sample_id)
+    assert (alert.type, alert.severity, alert.fpso_name) == ("Lab Report Overdue", "High", "FPSO Scan")
+    assert f"(>{fiscal_days} days)" in alert.message and str(due.sampling_date) in alert.message
+    assert _alerts(db_session, not_yet.sample_id) == []
+    assert _alerts(db_session, longer_sla.sample_id) == []
+
+
+def test_validation_pending_and_missing_point(db_session):
+    fc_days = get_sla_config(db_session, "Fiscal", "Chromatography", "Onshore")["fc_days"]
+    sample = _sample(db_session, status=SampleStatus.REPORT_ISSUE.value, with_point=False,
+                     report_issue_date=TODAY - timedelta(days=fc_days + 1))
+
+    sla_scan.check_sampling_slas(db_session)
+
+    [alert] = _alerts(db_session, sample.sample_id)
+    assert (alert.type, alert.severity, alert.fpso_name) == ("Validation Pending", "Medium", "Unknown")
+
+
+def test_existing_alerts_are_not_duplicated(db_session):
+    acknowledged = _sample(db_session, sampling_date=TODAY - timedelta(days=200))
+    db_session.add(models.Alert(tag_number=acknowledged.sample_id, type="Lab Report Overdue", acknowledged=1))
+    db_session.commit()
+    fresh = _sample(db_session, sampling_date=TODAY - timedelta(days=200))
+
+    sla_scan.check_sampling_slas(db_session)
+    assert sla_scan.check_sampling_slas(db_session) == 0
+
+    assert len(_alerts(db_session, acknowledged.sample_id)) == 1
+    assert len(_alerts(db_session, fresh.sample_id)) == 1
+
+
+def test_statement_count_does_not_grow_with_overdue_samples(db_session):
+    def _scan_statements(n):
+        for _ in range(n):
+            _sample(db_session, sampling_date=TODAY - timedelta(days=300))
+        with metrics.track_queries() as stats:
+            sla_scan.check_sampling_slas(db_session)
+        return stats.queries
+
+    assert _scan_statements(2) == _scan_statements(12)
+
+
+def test_check_date_follows_status_updates(client, db_session):
+    fc_days = get_sla_config(db_session, "Fiscal", "Chromatography", "Offshore")["fc_days"]
+    report_days = get_sla_config(db_session, "Fiscal", "Chromatography", "Offshore")["report_days"]
+    sample = _sample(db_session)
+    sample.local = "Offshore"
+    db_session.commit()
+    assert sample.sla_check_date is None  # not collected yet
+
+    collected = TODAY - timedelta(days=2)
+    res = client.post(f"/api/chemical/samples/{sample.id}/update-status",
+                      json={"status": "Report issue", "event_date": str(collected)})
+    assert res.status_code == 200
+    db_session.refresh(sample)
+    assert sample.sla_check_date == collected + timedelta(days=fc_days)
+
+    res = client.post(f"/api/chemical/samples/{sample.id}/update-status", json={"status": "Report under validation"})
+    assert res.status_code == 200
+    db_session.refresh(sample)
+    assert sample.sla_check_date is None
+
+    # Back in the watched step with a backdated collection: already due
+    sample.status, sample.sampling_date = SampleStatus.SAMPLE.value, None
+    db_session.commit()
+    res = client.patch(f"/api/chemical/samples/{sample.id}/due-date", json={"due_date": str(TODAY)})
+    assert res.status_code == 200
+    db_session.refresh(sample)
+    assert sample.sla_check_date is None
+    sample.sampling_date = TODAY - timedelta(days=report_days + 3)
+    db_session.commit()
+    client.patch(f"/api/chemical/samples/{sample.id}/due-date", json={"due_date": str(TODAY)})
+    db_session.refresh(sample)
+    assert sample.sla_check_date == TODAY - timedelta(days=3)
+
+    assert client.post("/api/chemical/check-slas").json()["alerts_created"] >= 1
+    assert [a.type for a in _alerts(db_session, sample.sample_id)] == ["Lab Report Overdue"]
+
+
+def test_only_due_samples_are_read(db_session):
+    days = get_sla_config(db_session, "Fiscal", "Chromatography", "Onshore")["report_days"]
+    later = _sample(db_session, sampling_date=TODAY - timedelta(days=days - 2))
+    sla_scan.check_sampling_slas(db_session)
+
+    db_session.refresh(later)
+    assert later.sla_check_date == TODAY + timedelta(days=2)
+    sla_scan.check_sampling_slas(db_session, today=TODAY + timedelta(days=1))
+    assert _alerts(db_session, later.sample_id) == []
+    sla_scan.check_sampling_slas(db_session, today=TODAY + timedelta(days=2))
+    assert len(_alerts(db_session, later.sample_id)) == 1
+    db_session.refresh(later)
+    assert later.sla_check_date is None
+
+
+def test_backdated_deadline_is_still_picked_up(db_session):
+    days = get_sla_config(db_session, "Fiscal", "Chromatography", "Onshore")["report_days"]
+    sla_scan.check_sampling_slas(db_session, today=TODAY + timedelta(days=10))
+    # Entered after that scan, with a deadline that already passed before it
+    late = _sample(db_session, sampling_date=TODAY - timedelta(days=days + 1))
+    sla_scan.check_sampling_slas(db_session)
+    assert len(_alerts(db_session, late.sample_id)) == 1
+
+
+def test_full_rebuild_on_first_run_and_rule_change(db_session):
+    rule = models.SLARule(classification="Rebuild Test", analysis_type="Chromatography", local="Onshore",
+                          status_variation="Any", report_days=20)
+    db_session.add(rule)
+    db_session.commit()
+    sla_scan.check_sampling_slas(db_session)  # picks up the new rules
+    try:
+        # Written outside the API: no check date until a full rebuild
+        legacy = _sample(db_session, _meter(db_session, "Rebuild Test"), sampling_date=TODAY - timedelta(days=15))
+        legacy.sla_check_date = None
+        db_session.commit()
+        sla_scan.check_sampling_slas(db_session)
+        db_session.refresh(legacy)
+        assert legacy.sla_check_date is None
+
+        sla_scan.check_sampling_slas(db_session, full=True)
+        db_session.refresh(legacy)
+        assert legacy.sla_check_date == TODAY + timedelta(days=5)
+
+        # A stricter rule moves the deadline into the past on the next scan
+        rule.report_days = 10
+        db_session.commit()
+        sla_scan.check_sampling_slas(db_session)
+        [alert] = _alerts(db_session, legacy.sample_id)
+        assert "(>10 days)" in alert.message
+    finally:
+        db_session.delete(rule)
+        db_session.commit()
+        sla_scan.check_sampling_slas(db_session)
@@ -0,0 +1,69 @@
+"""
+Cache de snapshots versionado (config M11, regras de SLA, feriados).
+
+Cobre:
+ - Um load por banco; commit de escrita no model observado invalida só esse cache.
+ - Escrita ainda não commitada é vista pela própria sessão e não é publicada; rollback descarta.
+ - Expiração por TTL.
+"""
+from datetime import date
+
+from app import models
+from app.services.snapshot_cache import SnapshotCache
+
+
+def _counting_cache(model, **kw):
+    loads = []
+
+    def _loader(db):
+        loads.append(1)
+        return sorted(row.description for row in db.query(model))
+
+    kw.setdefault("ttl_seconds", 60)
+    return SnapshotCache(model, _loader, **kw), loads
+
+
+def test_commit_invalidates_only_the_watched_model(empty_db):
+    holidays, holiday_loads = _counting_cache(models.Holiday)
+    rules, rule_loads = _counting_cache(models.ConfigParameter)
+    assert holidays.snapshot(empty_db) == [] and rules.snapshot(empty_db) == []
+    holidays.snapshot(empty_db)
+    assert len(holiday_loads) == 1
+
+    row = models.Holiday(date=date(2026, 12, 25), description="Natal", fpso="SNAPTEST")
+    empty_db.add(row)
+    empty_db.commit()
+    assert holidays.version == 1 and rules.version == 0
+    assert holidays.snapshot(empty_db) == ["Natal"]
+    rules.snapshot(empty_db)
+    assert len(rule_loads) == 1
+
+    empty_db.delete(row)
+    empty_db.commit()
+    assert holidays.snapshot(empty_db) == []
+
+
+def test_uncommitted_writes_stay_private(empty_db):
+    cache, loads = _counting_cache(models.Holiday)
+    cache.snapshot(empty_db)
+
+    empty_db.add(models.Holiday(date=date(2026, 11, 2), description="Finados", fpso="SNAPTEST"))
+    empty_db.flush()
+    assert cache.snapshot(empty_db) == ["Finados"]
+    assert cache.snapshot(empty_db) == ["Finados"]
+    assert len(loads) == 3  # read-through while the write is pending
+
+    empty_db.rollback()
+    assert cache.snapshot(empty_db) == []
+    assert len(loads) == 3  # the published snapshot never saw the rolled-back row
+
+
+def test_snapshot_expires_after_ttl(empty_db):
+    now = [0.0]
+    cache, loads = _counting_cache(models.Holiday, ttl_seconds=10, clock=lambda: now[0])
+    cache.snapshot(empty_db)
+    now[0] += 9
+    cache.snapshot(empty_db)
+    now[0] += 2
+    cache.snapshot(empty_db)
+    assert len(loads) == 2
@@ -0,0 +1,76 @@
+"""
+Startup — Worker boot sem create_all/seed + CLI de migração.
+
+Cobre:
+ - Startup do worker não cria schema nem faz seed; só abre o pool.
+ - /health reporta boot_seconds dentro do orçamento (STARTUP_BUDGET_SECONDS).
+ - `python -m app.manage migrate|seed` cria o schema e popula um banco vazio (idempotente).
+ - Colunas novas são adicionadas com identificadores citados (nomes reservados / maiúsculas).
+"""
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, inspect
+from sqlalchemy.orm import sessionmaker
+
+from app import main as app_main, manage, models, seed
+
+
+def test_worker_startup_skips_schema_and_seed(monkeypatch):
+    def _forbidden(*args, **kwargs):
+        raise AssertionError("startup must not touch schema or seed")
+
+    monkeypatch.setattr(models.Base.metadata, "create_all", _forbidden)
+    monkeypatch.setattr(seed, "seed_data", _forbidden)
+
+    with TestClient(app_main.app) as c:
+        body = c.get("/health").json()
+
+    assert body["status"] == "ok"
+    assert body["db_ready"] is True
+    assert body["within_budget"] is True
+    assert body["boot_seconds"] < app_main.STARTUP_BUDGET_SECONDS
+
+
+def test_startup_survives_unreachable_database(monkeypatch):
+    monkeypatch.setattr(app_main, "engine", create_engine("sqlite:////nonexistent-dir/x.db"))
+    with TestClient(app_main.app) as c:
+        body = c.get("/health").json()
+    assert body["status"] == "ok"
+    assert body["db_ready"] is False
+
+
+def test_manage_migrate_and_seed(tmp_path, monkeypatch, capsys):
+    eng = create_engine(f"sqlite:///{tmp_path / 'cli.db'}")
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=eng)
+    monkeypatch.setattr(manage, "engine", eng)
+    monkeypatch.setattr(seed, "SessionLocal", Session)
+
+    manage.main(["migrate"])
+    assert "equipments" in inspect(eng).get_table_names()
+
+    manage.main(["seed"])
+    with Session() as db:
+        seeded = db.query(models.Equipment).count()
+    assert seeded > 0
+
+    manage.main(["init"])
+    with Session() as db:
+        assert db.query(models.Equipment).count() == seeded
+    assert "migrate: done" in capsys.readouterr().out
+
+
+def test_add_missing_columns_quotes_identifiers(tmp_path, monkeypatch):
+    eng = create_engine(f"sqlite:///{tmp_path / 'quoted.db'}")
+    old = MetaData()
+    Table("Order", old, Column("id", Integer, primary_key=True))
+    old.create_all(eng)
+
+    new = MetaData()
+    Table("Order", new, Column("id", Integer, primary_key=True),
+          Column("group", String(20), nullable=True), Column("Status", String(20), nullable=True))
+    monkeypatch.setattr(manage, "engine", eng)
+    monkeypatch.setattr(manage, "models", SimpleNamespace(Base=SimpleNamespace(metadata=new)))
+
+    manage._add_missing_columns()
+    assert {c["name"] for c in inspect(eng).get_columns("Order")} == {"id", "group", "Status"}
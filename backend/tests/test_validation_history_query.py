@@ -0,0 +1,82 @@
+"""
+M3 — Histórico multi-parâmetro em uma única query (ROW_NUMBER OVER PARTITION BY).
+
+Cobre:
+ - Mesmo resultado que a consulta antiga por parâmetro (últimos N, mais recente primeiro).
+ - exclude_sample_id e limite por parâmetro respeitados.
+ - validate_pvt faz 1 query de histórico para density/rs/fe.
+"""
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import desc
+
+from app import metrics, models
+from app.services.pdf_parser import PVTResult
+from app.services.validation_engine import _get_parameter_histories, validate_pvt
+
+
+@pytest.fixture(scope="module")
+def seeded(db_session):
+    sp = models.SamplePoint(tag_number="SP-WINDOW", description="w", fpso_name="FPSO Window")
+    other_sp = models.SamplePoint(tag_number="SP-WINDOW-OTHER", description="w", fpso_name="FPSO Window")
+    db_session.add_all([sp, other_sp])
+    db_session.flush()
+    base = datetime(2026, 1, 1)
+    for i in range(14):
+        for point in (sp, other_sp):
+            s = models.Sample(sample_id=f"S-WIN-{point.id}-{i}", type="PVT", status="Approved",
+                              sample_point_id=point.id,
+                              sampling_date=(date(2026, 1, 1) + timedelta(days=i)) if i % 3 else None)
+            db_session.add(s)
+            db_session.flush()
+            for j, param in enumerate(("density", "rs", "fe")):
+                db_session.add(models.SampleResult(sample_id=s.id, parameter=param, value=800 + i + j / 10,
+                                                   unit="u", created_at=base + timedelta(days=i)))
+    current = models.Sample(sample_id="S-WIN-CURRENT", type="PVT", status="Report issue", sample_point_id=sp.id)
+    db_session.add(current)
+    db_session.flush()
+    db_session.add(models.SampleResult(sample_id=current.id, parameter="density", value=1.0, unit="u",
+                                       created_at=base + timedelta(days=30)))
+    db_session.commit()
+    return sp.id, current.id
+
+
+def _legacy_history(db, sample_point_id, parameter, exclude_sample_id, limit):
+    rows = (
+        db.query(models.SampleResult, models.Sample)
+        .join(models.Sample, models.SampleResult.sample_id == models.Sample.id)
+        .filter(models.Sample.sample_point_id == sample_point_id, models.SampleResult.parameter == parameter,
+                models.Sample.id != exclude_sample_id)
+        .order_by(desc(models.SampleResult.created_at))
+        .limit(limit)
+        .all()
+    )
+    return [{"value": sr.value, "date": s.sampling_date.isoformat() if s.sampling_date else str(sr.created_at),
+             "sample_id": s.sample_id} for sr, s in rows]
+
+
+def test_windowed_query_matches_per_parameter_queries(db_session, seeded):
+    point_id, current_id = seeded
+    histories = _get_parameter_histories(db_session, point_id, ["density", "rs", "fe"], current_id, limit=10)
+    for param in ("density", "rs", "fe"):
+        assert histories[param] == _legacy_history(db_session, point_id, param, current_id, 10)
+        assert len(histories[param]) == 10
+
+
+def test_unknown_parameter_and_empty_request(db_session, seeded):
+    point_id, current_id = seeded
+    assert _get_parameter_histories(db_session, point_id, ["o2"], current_id, limit=5) == {"o2": []}
+    assert _get_parameter_histories(db_session, point_id, [], current_id, limit=5) == {}
+
+
+def test_validate_pvt_fetches_history_once(db_session, seeded):
+    _point_id, current_id = seeded
+    sample = db_session.get(models.Sample, current_id)
+    extracted = PVTResult(density=813.0, rs=813.1, fe=813.2)
+    validate_pvt(extracted, sample, db_session)  # warm config cache
+
+    with metrics.track_queries() as stats:
+        result = validate_pvt(extracted, sample, db_session)
+    assert len(result.checks) == 3
+    assert stats.count_matching("FROM sample_results JOIN samples") == 1